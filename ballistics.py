@@ -0,0 +1,446 @@
+"""
+    弹道数值积分核心 (无 GUI 依赖)
+
+    这里的函数只依赖 numpy，可以被界面程序、批处理脚本和机器人端代码直接导入。
+"""
+
+import math
+
+import numpy as np
+
+# simulate_batch 每隔多少步淘汰一次失速或落地的弹道 (欧拉法)
+_LIVENESS_CHECK_INTERVAL = 8
+# 活跃弹道不超过该条数时改为逐条用纯 Python 积分 (欧拉法)。numpy 每步约有 20 us 的固定开销，
+# 而纯 Python 每条弹道每步不到 1 us；近距离时少数几条高抛或打不到的弹道往往要飞几百步，逐条积分快得多
+_SCALAR_LANE_LIMIT = 16
+# RK 方法的最大步数，防止异常参数导致死循环
+_MAX_RK_STEPS = 100000
+# 自适应步长的上限 (秒)，步长过大时 Hermite 插值定位穿越点的误差会变大
+_MAX_ADAPTIVE_STEP_S = 0.25
+# 定位穿越点时的牛顿迭代次数
+_CROSSING_NEWTON_ITERATIONS = 3
+
+# 各积分方法每一步的导数计算次数 (Dormand-Prince 利用 FSAL 每步只需 6 次)
+DERIVATIVE_EVALUATIONS_PER_STEP = {'euler': 1, 'rk4': 4, 'dopri5': 6}
+
+
+def simulate_batch(launch_angles_deg, initial_velocities_ms, distance_m, *, gravity_ms2, air_density,
+                   drag_coefficient, cross_sectional_area_m2, mass_kg, time_step_s, stop_below_m=None,
+                   method='euler', tolerance_m=1e-4, stats=None):
+    """
+    同时积分一组 (发射俯仰角, 初速度) 的弹道，返回每条弹道穿过 x = distance_m 时的高度和时间。
+
+    method 选择积分方法:
+        'euler'   显式欧拉法 + 线性插值，与 BallisticSolver.run_simulation_for_angle_and_velocity 完全一致
+        'rk4'     固定步长 (time_step_s) 的四阶龙格-库塔法
+        'dopri5'  Dormand-Prince 5(4) 自适应步长，time_step_s 为初始步长，tolerance_m 为每步的误差上限
+    两种 RK 方法用三次 Hermite 插值精确定位穿越 x = distance_m 的时刻，并据此判断落地是否发生在穿越之前。
+
+    所有弹道作为 numpy 数组一起推进。已穿过目标平面、落地或失速的弹道会被剔除，不再参与后续计算。
+    未能到达目标平面的弹道，其高度和时间均为 -1.0。
+
+    如果调用方只关心弹道是否高于某个高度 (例如搜索发射速度时)，可以传入 stop_below_m：
+    已经在下降且低于该高度的弹道不可能再升高，会被提前放弃并同样记为 -1.0。
+
+    传入 stats 字典时，会在其中累加 'steps' (积分循环次数) 和 'derivative_evaluations' (每条弹道的导数计算次数之和)。
+
+    drag_coefficient 和 mass_kg 也可以是与发射参数同形状 (或可广播) 的数组，每条弹道使用各自的值，
+    例如模拟每个弹丸的质量和阻力系数都略有不同。
+    """
+    angles_rad = np.radians(np.asarray(launch_angles_deg, dtype=float))
+    velocities = np.asarray(initial_velocities_ms, dtype=float)
+    # 阻力加速度 = (drag_factor / m) * |v| * v
+    drag_per_mass = (0.5 * air_density * np.asarray(drag_coefficient, dtype=float) * cross_sectional_area_m2
+                     / np.asarray(mass_kg, dtype=float))
+    angles_rad, velocities, lane_drag = np.broadcast_arrays(angles_rad, velocities, drag_per_mass)
+    shape = angles_rad.shape
+    # 逐条弹道的阻力与弹道一起被剔除和压缩；所有弹道相同时保持标量
+    drag_per_mass = lane_drag.ravel().copy() if drag_per_mass.ndim else float(drag_per_mass)
+
+    hit_h = np.full(angles_rad.size, -1.0)
+    hit_t = np.full(angles_rad.size, -1.0)
+    vx = velocities.ravel() * np.cos(angles_rad.ravel())
+    vy = velocities.ravel() * np.sin(angles_rad.ravel())
+
+    # 低于 floor 且仍在下降的弹道视为落地；stop_below_m 为正时它同时包含了落地判定
+    floor = 0.0 if stop_below_m is None else max(stop_below_m, 0.0)
+    if stats is not None:
+        stats.setdefault('steps', 0)
+        stats.setdefault('derivative_evaluations', 0)
+
+    if method == 'euler':
+        _simulate_batch_euler(vx, vy, distance_m, drag_per_mass, gravity_ms2, time_step_s, floor,
+                              hit_h, hit_t, stats)
+    elif method in ('rk4', 'dopri5'):
+        _simulate_batch_rk(vx, vy, distance_m, drag_per_mass, gravity_ms2, time_step_s, floor,
+                           hit_h, hit_t, stats, adaptive=(method == 'dopri5'), tolerance_m=tolerance_m)
+    else:
+        raise ValueError(f"Unknown integration method: {method}")
+    return hit_h.reshape(shape), hit_t.reshape(shape)
+
+
+def _simulate_batch_euler(vx, vy, distance_m, drag_per_mass, gravity_ms2, dt, floor, hit_h, hit_t, stats):
+    """simulate_batch 的欧拉法实现，结果写入 hit_h / hit_t"""
+    # 阻力加速度乘以时间步长，预先算好
+    drag_per_mass_dt = drag_per_mass * dt
+    gravity_dt = gravity_ms2 * dt
+
+    lanes = np.arange(vx.size)
+    x = np.zeros(lanes.size)
+    y = np.zeros(lanes.size)
+    # 初速度大到一步之内阻力就让水平速度反向的弹道，在第二步开始时必然失速
+    active = (vx > 0) & (drag_per_mass_dt * np.hypot(vx, vy) < 1.0)
+    x[~active] = -np.inf
+    active_count = np.count_nonzero(active)
+    current_time, step = 0.0, 0
+
+    # 失速和“低于 floor 且在下降”这两种状态一旦出现就不会再消失，所以不必每一步都检查：
+    # 每隔几步淘汰一次即可，期间穿越目标平面的弹道用上一步的状态判断它当时是否还有效。
+    # 淘汰的通道 x 被置为 -inf，永远不会再被判定为穿越；数组只在活跃通道不足一半时压缩。
+    with np.errstate(over='ignore', invalid='ignore'):
+        while active_count:
+            if step % _LIVENESS_CHECK_INTERVAL == 0:
+                alive = (vx > 0) & (np.maximum(y - floor, vy) >= 0)
+                x[active & ~alive] = -np.inf
+                active &= alive
+                active_count = np.count_nonzero(active)
+                if not active_count:
+                    break
+                if active_count * 2 < lanes.size:
+                    lanes, vx, vy, x, y = lanes[active], vx[active], vy[active], x[active], y[active]
+                    if np.ndim(drag_per_mass_dt):
+                        drag_per_mass_dt = drag_per_mass_dt[active]
+                    active = np.ones(active_count, dtype=bool)
+                if active_count <= _SCALAR_LANE_LIMIT:
+                    _finish_lanes_scalar(np.flatnonzero(active), lanes, vx, vy, x, y, distance_m, drag_per_mass_dt,
+                                         gravity_dt, dt, floor, current_time, hit_h, hit_t, stats)
+                    break
+
+            # 显式欧拉: 先更新速度，再用新速度更新位置
+            prev_x, prev_y, prev_vy = x, y, vy
+            drag_dt = drag_per_mass_dt * np.sqrt(vx * vx + vy * vy)
+            vx = vx - drag_dt * vx
+            vy = vy - (gravity_dt + drag_dt * vy)
+            x = x + vx * dt
+            y = y + vy * dt
+            current_time += dt
+            step += 1
+            if stats is not None:
+                stats['steps'] += 1
+                stats['derivative_evaluations'] += active_count
+
+            crossed = np.flatnonzero(x >= distance_m)
+            if crossed.size:
+                # 在上一步与当前步之间线性插值，求出穿越目标平面时的高度和时间
+                px, py, cx, cy = prev_x[crossed], prev_y[crossed], x[crossed], y[crossed]
+                frac = (distance_m - px) / (cx - px)
+                valid = np.maximum(py - floor, prev_vy[crossed]) >= 0
+                hit_lanes = lanes[crossed]
+                hit_h[hit_lanes] = np.where(valid, py + (cy - py) * frac, -1.0)
+                hit_t[hit_lanes] = np.where(valid, (current_time - dt) + dt * frac, -1.0)
+                x[crossed] = -np.inf
+                active[crossed] = False
+                active_count -= crossed.size
+
+
+def _finish_lanes_scalar(remaining, lanes, vx, vy, x, y, distance_m, drag_per_mass_dt, gravity_dt, dt, floor,
+                         current_time, hit_h, hit_t, stats):
+    """
+    从当前状态起逐条积分 remaining 中的弹道直到穿越、落地或失速，结果写入 hit_h / hit_t。
+    每一步的运算顺序与 _simulate_batch_euler 完全相同，结果逐位一致；每步都检查失速和落地，
+    效果与批量积分中“隔几步淘汰、穿越时用上一步的状态判断”相同。
+    """
+    per_lane_drag = np.ndim(drag_per_mass_dt) > 0
+    max_steps = 0
+    for i in remaining.tolist():
+        k = float(drag_per_mass_dt[i]) if per_lane_drag else drag_per_mass_dt
+        lane_vx, lane_vy, lane_x, lane_y = float(vx[i]), float(vy[i]), float(x[i]), float(y[i])
+        t, steps = current_time, 0
+        while lane_vx > 0 and (lane_y >= floor or lane_vy >= 0):
+            prev_x, prev_y = lane_x, lane_y
+            drag_dt = k * math.sqrt(lane_vx * lane_vx + lane_vy * lane_vy)
+            lane_vx = lane_vx - drag_dt * lane_vx
+            lane_vy = lane_vy - (gravity_dt + drag_dt * lane_vy)
+            lane_x = lane_x + lane_vx * dt
+            lane_y = lane_y + lane_vy * dt
+            t += dt
+            steps += 1
+            if lane_x >= distance_m:
+                frac = (distance_m - prev_x) / (lane_x - prev_x)
+                hit_h[lanes[i]] = prev_y + (lane_y - prev_y) * frac
+                hit_t[lanes[i]] = (t - dt) + dt * frac
+                break
+        max_steps = max(max_steps, steps)
+        if stats is not None:
+            stats['derivative_evaluations'] += steps
+    if stats is not None:
+        stats['steps'] += max_steps
+
+
+def _acceleration(vx, vy, drag_per_mass, gravity_ms2):
+    """重力 + 空气阻力产生的加速度，vx / vy 既可以是浮点数也可以是 numpy 数组"""
+    drag = drag_per_mass * (vx * vx + vy * vy) ** 0.5
+    return -drag * vx, -gravity_ms2 - drag * vy
+
+
+def _rk4_step(x, y, vx, vy, h, drag_per_mass, gravity_ms2):
+    """经典四阶龙格-库塔法前进一步。加速度只与速度有关，位置的各级导数就是各级速度"""
+    ax1, ay1 = _acceleration(vx, vy, drag_per_mass, gravity_ms2)
+    vx2, vy2 = vx + 0.5 * h * ax1, vy + 0.5 * h * ay1
+    ax2, ay2 = _acceleration(vx2, vy2, drag_per_mass, gravity_ms2)
+    vx3, vy3 = vx + 0.5 * h * ax2, vy + 0.5 * h * ay2
+    ax3, ay3 = _acceleration(vx3, vy3, drag_per_mass, gravity_ms2)
+    vx4, vy4 = vx + h * ax3, vy + h * ay3
+    ax4, ay4 = _acceleration(vx4, vy4, drag_per_mass, gravity_ms2)
+    h6 = h / 6.0
+    return (x + h6 * (vx + 2.0 * vx2 + 2.0 * vx3 + vx4),
+            y + h6 * (vy + 2.0 * vy2 + 2.0 * vy3 + vy4),
+            vx + h6 * (ax1 + 2.0 * ax2 + 2.0 * ax3 + ax4),
+            vy + h6 * (ay1 + 2.0 * ay2 + 2.0 * ay3 + ay4))
+
+
+# Dormand-Prince 5(4) 系数 (第 7 级与下一步的第 1 级相同，FSAL)
+_DP_A = (
+    (),
+    (1 / 5,),
+    (3 / 40, 9 / 40),
+    (44 / 45, -56 / 15, 32 / 9),
+    (19372 / 6561, -25360 / 2187, 64448 / 6561, -212 / 729),
+    (9017 / 3168, -355 / 33, 46732 / 5247, 49 / 176, -5103 / 18656),
+    (35 / 384, 0.0, 500 / 1113, 125 / 192, -2187 / 6784, 11 / 84),
+)
+# 五阶解的权重 (即最后一级的系数，第 7 级权重为 0)
+_DP_B = _DP_A[6] + (0.0,)
+# 五阶解与嵌入的四阶解之差，用于估计局部误差
+_DP_E = (71 / 57600, 0.0, -71 / 16695, 71 / 1920, -17253 / 339200, 22 / 525, -1 / 40)
+
+
+def _dopri5_step(x, y, vx, vy, ax1, ay1, h, drag_per_mass, gravity_ms2):
+    """
+    Dormand-Prince 5(4) 前进一步。ax1 / ay1 为步首的加速度 (可由上一步的末级复用)。
+
+    返回 (x, y, vx, vy, 步末加速度 ax, ay, 误差估计 ex, ey, evx, evy)。
+    """
+    stage_v = [(vx, vy)]
+    stage_a = [(ax1, ay1)]
+    for coefficients in _DP_A[1:]:
+        svx, svy = vx, vy
+        for a, (sax, say) in zip(coefficients, stage_a):
+            if a:
+                svx = svx + h * a * sax
+                svy = svy + h * a * say
+        stage_v.append((svx, svy))
+        stage_a.append(_acceleration(svx, svy, drag_per_mass, gravity_ms2))
+
+    # 第 7 级的速度就是五阶解的新速度
+    new_vx, new_vy = stage_v[6]
+    dx = dy = evx = evy = ex = ey = 0.0
+    for b, e, (svx, svy), (sax, say) in zip(_DP_B, _DP_E, stage_v, stage_a):
+        if b:
+            dx = dx + b * svx
+            dy = dy + b * svy
+        ex = ex + e * svx
+        ey = ey + e * svy
+        evx = evx + e * sax
+        evy = evy + e * say
+    ax7, ay7 = stage_a[6]
+    return (x + h * dx, y + h * dy, new_vx, new_vy, ax7, ay7, h * ex, h * ey, h * evx, h * evy)
+
+
+def _hermite(p0, p1, m0, m1, h, theta):
+    """三次 Hermite 插值：端点值 p0/p1、端点导数 m0/m1、步长 h，theta 为步内的归一化时间"""
+    theta2 = theta * theta
+    theta3 = theta2 * theta
+    return ((2 * theta3 - 3 * theta2 + 1) * p0 + (theta3 - 2 * theta2 + theta) * h * m0
+            + (-2 * theta3 + 3 * theta2) * p1 + (theta3 - theta2) * h * m1)
+
+
+def _locate_crossing(x0, x1, vx0, vx1, h, distance_m):
+    """在一步之内求 x(theta) = distance_m 的 theta，先线性估计，再用 Hermite 插值做几次牛顿迭代"""
+    theta = (distance_m - x0) / (x1 - x0)
+    for _ in range(_CROSSING_NEWTON_ITERATIONS):
+        theta2 = theta * theta
+        slope = ((6 * theta2 - 6 * theta) * x0 + (3 * theta2 - 4 * theta + 1) * h * vx0
+                 + (-6 * theta2 + 6 * theta) * x1 + (3 * theta2 - 2 * theta) * h * vx1)
+        theta = theta - (_hermite(x0, x1, vx0, vx1, h, theta) - distance_m) / slope
+        theta = np.clip(theta, 0.0, 1.0) if isinstance(theta, np.ndarray) else min(max(theta, 0.0), 1.0)
+    return theta
+
+
+def _next_step_size(h, error_ratio):
+    """根据误差比 (误差 / 容差) 调整自适应步长，error_ratio 为 0 时按最大倍数放大"""
+    with np.errstate(divide='ignore'):
+        factor = 0.9 * np.power(np.maximum(error_ratio, 1e-10), -0.2)
+    return h * np.clip(factor, 0.2, 5.0)
+
+
+def _simulate_batch_rk(vx, vy, distance_m, drag_per_mass, gravity_ms2, time_step_s, floor, hit_h, hit_t, stats,
+                       adaptive, tolerance_m):
+    """simulate_batch 的 RK4 / Dormand-Prince 实现，结果写入 hit_h / hit_t"""
+    lanes = np.arange(vx.size)
+    x = np.zeros(lanes.size)
+    y = np.zeros(lanes.size)
+    t = np.zeros(lanes.size)
+    h = np.full(lanes.size, float(time_step_s))
+    ax, ay = _acceleration(vx, vy, drag_per_mass, gravity_ms2)
+    stages = 6 if adaptive else 4
+
+    with np.errstate(over='ignore', invalid='ignore'):
+        for _ in range(_MAX_RK_STEPS):
+            # 淘汰失速或已经落地的弹道
+            alive = (vx > 0) & (np.maximum(y - floor, vy) >= 0)
+            if not alive.all():
+                lanes, x, y, vx, vy, t, h, ax, ay = (
+                    lanes[alive], x[alive], y[alive], vx[alive], vy[alive], t[alive], h[alive], ax[alive], ay[alive])
+                if np.ndim(drag_per_mass):
+                    drag_per_mass = drag_per_mass[alive]
+            if not lanes.size:
+                break
+            if stats is not None:
+                stats['steps'] += 1
+                stats['derivative_evaluations'] += stages * lanes.size
+
+            if adaptive:
+                (new_x, new_y, new_vx, new_vy, new_ax, new_ay,
+                 ex, ey, evx, evy) = _dopri5_step(x, y, vx, vy, ax, ay, h, drag_per_mass, gravity_ms2)
+                error_ratio = np.sqrt((ex * ex + ey * ey + evx * evx + evy * evy) / 4.0) / tolerance_m
+                accepted = error_ratio <= 1.0
+                next_h = np.minimum(_next_step_size(h, error_ratio), _MAX_ADAPTIVE_STEP_S)
+            else:
+                # RK4 每步自己计算步首加速度，不需要沿用上一步的 ax / ay
+                new_x, new_y, new_vx, new_vy = _rk4_step(x, y, vx, vy, h, drag_per_mass, gravity_ms2)
+                new_ax, new_ay = ax, ay
+                accepted = np.ones(lanes.size, dtype=bool)
+                next_h = h
+
+            crossed = accepted & (new_x >= distance_m)
+            if crossed.any():
+                theta = _locate_crossing(x[crossed], new_x[crossed], vx[crossed], new_vx[crossed], h[crossed],
+                                         distance_m)
+                cross_h = _hermite(y[crossed], new_y[crossed], vy[crossed], new_vy[crossed], h[crossed], theta)
+                cross_vy = vy[crossed] + (new_vy[crossed] - vy[crossed]) * theta
+                # 穿越时已经低于 floor 且在下降，说明落地 (或低于关心的高度) 发生在穿越之前
+                valid = np.maximum(cross_h - floor, cross_vy) >= 0
+                hit_h[lanes[crossed]] = np.where(valid, cross_h, -1.0)
+                hit_t[lanes[crossed]] = np.where(valid, t[crossed] + theta * h[crossed], -1.0)
+
+            advance = accepted & ~crossed
+            x = np.where(advance, new_x, x)
+            y = np.where(advance, new_y, y)
+            vx = np.where(advance, new_vx, vx)
+            vy = np.where(advance, new_vy, vy)
+            ax = np.where(advance, new_ax, ax)
+            ay = np.where(advance, new_ay, ay)
+            t = np.where(advance, t + h, t)
+            h = next_h
+            # 已穿越的弹道把水平速度置零，下一轮会被当作失速淘汰 (结果已经记录)
+            vx = np.where(crossed, 0.0, vx)
+
+
+def decimate_path(path_x, path_y, max_points=None):
+    """把路径均匀抽稀到不超过 max_points 个点 (保留起点和终点)，例如抽到绘图区域的像素宽度；返回 NumPy 数组"""
+    path_x, path_y = np.asarray(path_x, dtype=float), np.asarray(path_y, dtype=float)
+    if max_points is None or path_x.size <= max_points:
+        return path_x, path_y
+    index = np.linspace(0, path_x.size - 1, max(int(max_points), 2)).round().astype(np.intp)
+    return path_x[index], path_y[index]
+
+
+def simulate_trajectory(launch_angle_deg, initial_velocity_ms, distance_m, *, gravity_ms2, air_density,
+                        drag_coefficient, cross_sectional_area_m2, mass_kg, time_step_s, method='rk4',
+                        tolerance_m=1e-4, stats=None):
+    """
+    用 RK4 或 Dormand-Prince 积分单条弹道并记录路径 (用于绘图)，参数含义与 simulate_batch 相同。
+
+    返回 (击中高度, 飞行时间, path_x, path_y)，未能到达目标平面时为 (-1.0, -1.0, [], [])。
+    """
+    if method not in ('rk4', 'dopri5'):
+        raise ValueError(f"Unknown integration method: {method}")
+    drag_per_mass = 0.5 * air_density * drag_coefficient * cross_sectional_area_m2 / mass_kg
+    angle_rad = math.radians(launch_angle_deg)
+    vx, vy = initial_velocity_ms * math.cos(angle_rad), initial_velocity_ms * math.sin(angle_rad)
+    x, y, t, h = 0.0, 0.0, 0.0, float(time_step_s)
+    ax, ay = _acceleration(vx, vy, drag_per_mass, gravity_ms2)
+    path_x, path_y = [0.0], [0.0]
+
+    for _ in range(_MAX_RK_STEPS):
+        if vx <= 0 or (y < 0 and vy < 0):
+            break
+        if stats is not None:
+            stats['steps'] = stats.get('steps', 0) + 1
+            stats['derivative_evaluations'] = (stats.get('derivative_evaluations', 0)
+                                               + DERIVATIVE_EVALUATIONS_PER_STEP[method])
+        if method == 'dopri5':
+            (new_x, new_y, new_vx, new_vy, new_ax, new_ay,
+             ex, ey, evx, evy) = _dopri5_step(x, y, vx, vy, ax, ay, h, drag_per_mass, gravity_ms2)
+            error_ratio = math.sqrt((ex * ex + ey * ey + evx * evx + evy * evy) / 4.0) / tolerance_m
+            next_h = min(float(_next_step_size(h, error_ratio)), _MAX_ADAPTIVE_STEP_S)
+            if error_ratio > 1.0:
+                h = next_h
+                continue
+        else:
+            new_x, new_y, new_vx, new_vy = _rk4_step(x, y, vx, vy, h, drag_per_mass, gravity_ms2)
+            new_ax, new_ay, next_h = ax, ay, h
+
+        if new_x >= distance_m:
+            theta = _locate_crossing(x, new_x, vx, new_vx, h, distance_m)
+            hit_h = _hermite(y, new_y, vy, new_vy, h, theta)
+            if hit_h < 0 and vy + (new_vy - vy) * theta < 0:
+                break
+            path_x.append(distance_m)
+            path_y.append(hit_h)
+            return hit_h, t + theta * h, path_x, path_y
+
+        x, y, vx, vy, ax, ay, t = new_x, new_y, new_vx, new_vy, new_ax, new_ay, t + h
+        path_x.append(x)
+        path_y.append(y)
+        h = next_h
+    return -1.0, -1.0, [], []
+
+
+def launcher_to_projectile(launcher_velocity, launcher_angle, aim_azimuth_deg, vehicle_speed_ms,
+                           vehicle_direction_deg, target_direction_deg):
+    """
+    compensate_for_vehicle 的逆过程: 弹丸速度 = 发射器速度 + 载具速度，取沿目标方向的水平分量，
+    返回 (弹丸俯仰角, 弹丸速度)。发射器的三个参数可以是 NumPy 数组 (例如一批扰动后的发射)。
+    """
+    pitch = np.radians(launcher_angle)
+    azimuth = np.radians(aim_azimuth_deg)
+    vehicle_dir = math.radians(vehicle_direction_deg)
+    target_dir = math.radians(target_direction_deg)
+    launcher_h = launcher_velocity * np.cos(pitch)
+    projectile_x = launcher_h * np.cos(azimuth) + vehicle_speed_ms * math.cos(vehicle_dir)
+    projectile_y = launcher_h * np.sin(azimuth) + vehicle_speed_ms * math.sin(vehicle_dir)
+    projectile_h = projectile_x * math.cos(target_dir) + projectile_y * math.sin(target_dir)
+    projectile_v = launcher_velocity * np.sin(pitch)
+    return np.degrees(np.arctan2(projectile_v, projectile_h)), np.hypot(projectile_h, projectile_v)
+
+
+def compensate_for_vehicle(projectile_vertical_angle, projectile_total_velocity, flight_time, vehicle_speed_ms,
+                           vehicle_direction_deg, target_direction_deg):
+    """
+    把相对地面的弹丸发射方案换算成运动载具上发射器需要的方案。
+
+    弹丸速度矢量 V_projectile = V_vehicle + V_launcher，因此 V_launcher = V_projectile - V_vehicle。
+    返回与 find_launch_solution 相同格式的字典。
+    """
+    vehicle_dir_rad = math.radians(vehicle_direction_deg)
+    target_dir_rad = math.radians(target_direction_deg)
+    pitch_rad = math.radians(projectile_vertical_angle)
+
+    v_projectile_h_magnitude = projectile_total_velocity * math.cos(pitch_rad)
+    v_projectile_v = projectile_total_velocity * math.sin(pitch_rad)
+
+    v_launcher_h_x = v_projectile_h_magnitude * math.cos(target_dir_rad) - vehicle_speed_ms * math.cos(vehicle_dir_rad)
+    v_launcher_h_y = v_projectile_h_magnitude * math.sin(target_dir_rad) - vehicle_speed_ms * math.sin(vehicle_dir_rad)
+    v_launcher_h_magnitude = math.hypot(v_launcher_h_x, v_launcher_h_y)
+
+    v_launcher_v = v_projectile_v
+    return {
+        'launcher_velocity': math.hypot(v_launcher_h_magnitude, v_launcher_v),
+        'launcher_angle': math.degrees(math.atan2(v_launcher_v, v_launcher_h_magnitude)),
+        'aim_azimuth_deg': math.degrees(math.atan2(v_launcher_h_y, v_launcher_h_x)),
+        'time': flight_time,
+        'projectile_total_velocity': projectile_total_velocity,
+        'projectile_vertical_angle': projectile_vertical_angle,
+    }
@@ -0,0 +1,184 @@
+"""
+    批量解算命令行工具 (无 GUI 依赖)
+
+    从标准输入或文件逐行读取 JSON 格式的 calc_params，按输入顺序逐行输出 JSON 格式的发射方案。
+    记录按 --chunk-size 分块交给进程池，同时在途的分块不超过 --max-in-flight 个，处理任意大的日志时内存占用不变。
+
+    用法:
+        python batch_solve.py states.jsonl > solutions.jsonl
+        cat states.jsonl | python batch_solve.py --workers 4 --output solutions.jsonl
+        python batch_solve.py states.jsonl --set DRAG_COEFFICIENT=0.3 --set MASS_KG=0.015
+        python batch_solve.py states.jsonl --no-store
+
+    每条输入必须包含 distance_m，vehicle_speed_ms / vehicle_direction_deg / target_direction_deg 缺省为 0；
+    其他字段原样保留在输出中。输出增加 solved、launcher_angle、aim_azimuth_deg、launcher_velocity、time、
+    motor_rpm (无解时为 null)；无法解析的行输出 {"line": 行号, "error": 说明}。
+
+    默认先查询与界面共享的磁盘方案存储 (solution_store.DEFAULT_STORE_PATH)，新算出的方案也写入其中；
+    --store 指定其他文件，--no-store 总是重新求解。
+"""
+
+import argparse
+import dataclasses
+import itertools
+import json
+import math
+import os
+import sys
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+
+from solution_store import DEFAULT_STORE_PATH, SolutionStore
+from solver import BallisticSolver, SolverConfig, INTEGRATOR_CHOICES
+
+CALC_PARAM_DEFAULTS = {'vehicle_speed_ms': 0.0, 'vehicle_direction_deg': 0.0, 'target_direction_deg': 0.0}
+SOLUTION_FIELDS = ('launcher_angle', 'aim_azimuth_deg', 'launcher_velocity', 'time')
+
+# 每个工作进程各自持有一个解算器和方案存储的连接，由 _init_worker 创建
+_worker_solver = None
+_worker_store = None
+
+
+def _init_worker(config, store_path=None):
+    global _worker_solver, _worker_store
+    _worker_solver = BallisticSolver(config)
+    _worker_store = SolutionStore(store_path) if store_path else None
+
+
+def solve_record(solver, line_number, line, warm_start=None, store=None):
+    """解析并求解一行输入，返回 (输出字典, 方案)。方案用于热启动下一条记录；store 给出时先查询存储"""
+    try:
+        record = json.loads(line)
+        params = dict(CALC_PARAM_DEFAULTS)
+        params.update({name: float(record[name]) for name in ('distance_m', *CALC_PARAM_DEFAULTS) if name in record})
+        if 'distance_m' not in record:
+            raise ValueError("missing distance_m")
+        # float() 接受 "nan" / "inf"，JSON 解析也接受 NaN / Infinity，这些值无法求解
+        not_finite = [name for name, value in params.items() if not math.isfinite(value)]
+        if not_finite:
+            raise ValueError(f"non-finite {', '.join(not_finite)}")
+    except (ValueError, TypeError, KeyError) as e:
+        return {'line': line_number, 'error': str(e)}, None
+
+    # 一条记录求解失败只影响它自己的输出行，不中断整个批次
+    try:
+        if store is not None:
+            solution = store.solve(solver, params, warm_start=warm_start)
+        else:
+            solution = solver.find_launch_solution(params, warm_start=warm_start)
+    except Exception as e:
+        return {'line': line_number, 'error': f"solve failed: {e}"}, None
+    result = dict(record)
+    result['solved'] = solution is not None
+    for name in SOLUTION_FIELDS:
+        result[name] = solution[name] if solution else None
+    result['motor_rpm'] = solver.calculate_motor_rpm(solution['launcher_velocity']) if solution else None
+    return result, solution
+
+
+def solve_chunk(lines, solver=None, store=None):
+    """
+    求解一块 (行号, 文本)，返回对应的输出行。日志中相邻的记录通常很接近，块内依次用上一个方案热启动。
+    在工作进程中调用时 solver 和 store 取自 _init_worker。
+    """
+    if solver is None:
+        solver, store = _worker_solver, _worker_store
+    output, previous_solution = [], None
+    for line_number, line in lines:
+        result, solution = solve_record(solver, line_number, line, previous_solution, store)
+        if solution is not None:
+            previous_solution = solution
+        output.append(json.dumps(result))
+    return output
+
+
+def _chunks(lines, chunk_size):
+    """把输入按 chunk_size 行分块，跳过空行，行号从 1 开始"""
+    numbered = ((number, line) for number, line in enumerate(lines, 1) if line.strip())
+    while True:
+        chunk = list(itertools.islice(numbered, chunk_size))
+        if not chunk:
+            return
+        yield chunk
+
+
+def run(lines, out, config=None, workers=None, chunk_size=64, max_in_flight=None, store_path=None):
+    """
+    按顺序把 lines 的解写入 out；workers 为 1 时在当前进程中求解。store_path 给出时使用该方案存储。
+    返回处理的记录数。
+    """
+    config = config if config is not None else SolverConfig()
+    workers = workers or os.cpu_count() or 1
+    count = 0
+    if workers == 1:
+        solver = BallisticSolver(config)
+        store = SolutionStore(store_path) if store_path else None
+        for chunk in _chunks(lines, chunk_size):
+            out.write("\n".join(solve_chunk(chunk, solver, store)) + "\n")
+            count += len(chunk)
+        return count
+
+    max_in_flight = max_in_flight or 2 * workers
+    with ProcessPoolExecutor(max_workers=workers, initializer=_init_worker, initargs=(config, store_path)) as executor:
+        pending = deque()
+        for chunk in _chunks(lines, chunk_size):
+            # 在途分块达到上限时先按顺序写出最早的一块，读入速度不会超过求解速度
+            if len(pending) >= max_in_flight:
+                out.write("\n".join(pending.popleft().result()) + "\n")
+            pending.append(executor.submit(solve_chunk, chunk))
+            count += len(chunk)
+        while pending:
+            out.write("\n".join(pending.popleft().result()) + "\n")
+    return count
+
+
+def _config_overrides(parser, assignments):
+    """把 NAME=VALUE 形式的 --set 参数转换为 SolverConfig 字段，值按字段默认值的类型解析，无法解析时由 parser 报错退出"""
+    defaults = SolverConfig()
+    overrides = {}
+    for assignment in assignments:
+        name, _, value = assignment.partition("=")
+        if not hasattr(defaults, name):
+            parser.error(f"--set: unknown SolverConfig field: {name}")
+        field_type = type(getattr(defaults, name))
+        try:
+            overrides[name] = field_type(value)
+        except ValueError:
+            parser.error(f"--set {name}: invalid {field_type.__name__} value: {value!r}")
+    # 积分方法在求解时才检查，写错会让每条记录都失败
+    if overrides.get('INTEGRATOR', defaults.INTEGRATOR) not in INTEGRATOR_CHOICES:
+        parser.error(f"--set INTEGRATOR: invalid choice: {overrides['INTEGRATOR']!r} "
+                     f"(choose from {', '.join(INTEGRATOR_CHOICES)})")
+    return overrides
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Solve JSON-lines calc_params records in parallel")
+    parser.add_argument("input", nargs="?", default="-", help="input JSON-lines file (default: stdin)")
+    parser.add_argument("--output", "-o", default="-", help="output JSON-lines file (default: stdout)")
+    parser.add_argument("--workers", type=int, default=None, help="worker processes (default: CPU count)")
+    parser.add_argument("--chunk-size", type=int, default=64, help="records per task (default 64)")
+    parser.add_argument("--max-in-flight", type=int, default=None,
+                        help="max chunks submitted but not yet written (default: 2 x workers)")
+    parser.add_argument("--set", action="append", default=[], metavar="NAME=VALUE",
+                        help="override a SolverConfig constant, may be repeated")
+    parser.add_argument("--store", default=DEFAULT_STORE_PATH, help=f"solution store (default {DEFAULT_STORE_PATH})")
+    parser.add_argument("--no-store", action="store_true", help="always solve, do not read or write the store")
+    args = parser.parse_args()
+
+    config = dataclasses.replace(SolverConfig(), **_config_overrides(parser, args.set))
+    source = sys.stdin if args.input == "-" else open(args.input, encoding="utf-8")
+    out = sys.stdout if args.output == "-" else open(args.output, "w", encoding="utf-8")
+    try:
+        count = run(source, out, config, args.workers, args.chunk_size, args.max_in_flight,
+                    None if args.no_store else args.store)
+    finally:
+        if source is not sys.stdin:
+            source.close()
+        if out is not sys.stdout:
+            out.close()
+    print(f"Solved {count} records", file=sys.stderr)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,301 @@
+"""
+    解算器性能与精度基准 (无 GUI 依赖)
+
+    用法:
+        python benchmark.py                       # 回放固定的场景库，以 JSON 格式输出吞吐量、延迟和误差
+        python benchmark.py --output bench.json   # 同时写入文件
+        python benchmark.py --min-solves-per-sec 50 --max-miss-m 0.005 --baseline old.json
+                                                  # 任一指标不达标或相对基线退步时以返回码 1 退出
+        python benchmark.py --integrators --tolerance 0.001
+                                                  # 附带各积分方法的精度和吞吐量对比，并给出满足误差要求的最快方法
+"""
+
+import argparse
+import dataclasses
+import json
+import math
+import sys
+import time
+
+import numpy as np
+
+from ballistics import simulate_batch, simulate_trajectory, DERIVATIVE_EVALUATIONS_PER_STEP
+from solver import BallisticSolver, SolverConfig, INTEGRATOR_CHOICES
+
+REPORT_VERSION = 1
+
+# 场地对角线约 5 m，场景覆盖从贴近目标到场地另一角的距离
+SCENARIO_DISTANCE_RANGE_M = (0.3, 5.2)
+SCENARIO_VEHICLE_SPEED_RANGE_MS = (0.0, 5.0)
+# 逐个距离单独计时的静止场景: 近距离高抛时解算器的计算量与远距离差别很大，汇总的吞吐量会掩盖某一段的退步
+DISTANCE_PROFILE_M = (0.4, 0.5, 0.6, 0.7, 0.8, 0.9, 1.0, 1.1, 1.5, 2.0, 3.0, 4.0, 5.0)
+DISTANCE_PROFILE_REPEATS = 7
+
+# 参与基准的常量配置 (名称 -> 相对默认配置修改的字段)
+BENCHMARK_CONFIGS = {
+    'default': {},
+    'high_drag': {'DRAG_COEFFICIENT': 0.5},
+    'light': {'MASS_KG': 0.008},
+    'heavy': {'MASS_KG': 0.024, 'DRAG_COEFFICIENT': 0.2},
+}
+
+# 参与对比的积分方法: (method, 固定步长或初始步长, Dormand-Prince 误差上限)
+INTEGRATOR_CANDIDATES = (
+    ('euler', 0.006, None),
+    ('euler', 0.002, None),
+    ('euler', 0.0005, None),
+    ('rk4', 0.05, None),
+    ('rk4', 0.02, None),
+    ('rk4', 0.006, None),
+    ('dopri5', 0.01, 1e-2),
+    ('dopri5', 0.01, 1e-3),
+    ('dopri5', 0.01, 1e-4),
+    ('dopri5', 0.01, 1e-6),
+)
+# 参考解: 极小步长的 RK4，误差远小于任何候选方法
+REFERENCE_TIME_STEP_S = 1e-4
+# 验证求解结果时逐条积分参考解，用稍大的步长 (RK4 在该步长下的误差仍在 1e-10 m 量级)
+SOLUTION_REFERENCE_TIME_STEP_S = 1e-3
+
+
+def _trajectory_corpus(config, count, seed):
+    """在俯仰角范围和典型速度范围内随机取一组 (俯仰角, 初速度, 距离)"""
+    rng = np.random.default_rng(seed)
+    angles = rng.uniform(config.MIN_ANGLE_DEG, min(config.MAX_ANGLE_DEG, 85.0), count)
+    velocities = rng.uniform(5.0, 15.0, count)
+    distances = rng.uniform(1.0, 6.0, count)
+    return angles, velocities, distances
+
+
+def _integrate(solver, angles, velocities, distances, method, time_step_s, tolerance_m, stats=None):
+    """逐个距离批量积分 (simulate_batch 每次只接受一个目标距离)"""
+    kwargs = solver.physics_kwargs()
+    kwargs['time_step_s'] = time_step_s
+    hit_h = np.empty(angles.size)
+    for distance_m in np.unique(distances):
+        lanes = distances == distance_m
+        hit_h[lanes], _ = simulate_batch(angles[lanes], velocities[lanes], distance_m, **kwargs, method=method,
+                                         tolerance_m=tolerance_m if tolerance_m is not None else 1e-4,
+                                         stats=stats)
+    return hit_h
+
+
+def compare_integrators(config=None, count=400, seed=0, candidates=INTEGRATOR_CANDIDATES):
+    """
+    对比各积分方法在同一组弹道上的击中高度误差和计算量。
+
+    返回字典列表，每项包含 method / time_step_s / tolerance_m / max_height_error_m /
+    misclassified (与参考解相比是否到达目标平面的判断不一致的条数) / derivative_evaluations_per_trajectory /
+    microseconds_per_trajectory。
+    """
+    config = config if config is not None else SolverConfig()
+    solver = BallisticSolver(config)
+    angles, velocities, distances = _trajectory_corpus(config, count, seed)
+    # 为了让每个距离上都有足够多的弹道一起批量积分，距离只取 8 个离散值
+    distances = np.round(distances * 1.4) / 1.4
+    reference = _integrate(solver, angles, velocities, distances, 'rk4', REFERENCE_TIME_STEP_S, None)
+    reached = reference >= 0
+
+    results = []
+    for method, time_step_s, tolerance_m in candidates:
+        stats = {}
+        start = time.perf_counter()
+        hit_h = _integrate(solver, angles, velocities, distances, method, time_step_s, tolerance_m, stats)
+        elapsed = time.perf_counter() - start
+        both = reached & (hit_h >= 0)
+        results.append({
+            'method': method,
+            'time_step_s': time_step_s,
+            'tolerance_m': tolerance_m,
+            'max_height_error_m': float(np.abs(hit_h - reference)[both].max()) if both.any() else None,
+            'misclassified': int(np.count_nonzero(reached != (hit_h >= 0))),
+            'derivative_evaluations_per_trajectory': stats['derivative_evaluations'] / count,
+            'microseconds_per_trajectory': elapsed / count * 1e6,
+        })
+    return results
+
+
+def fastest_integrator(results, max_height_error_m):
+    """从 compare_integrators 的结果中选出满足误差要求且耗时最短的方法，没有满足的则返回 None"""
+    eligible = [r for r in results
+                if r['misclassified'] == 0 and r['max_height_error_m'] is not None
+                and r['max_height_error_m'] <= max_height_error_m]
+    return min(eligible, key=lambda r: r['microseconds_per_trajectory'], default=None)
+
+
+def scenario_corpus(count=200, seed=0):
+    """固定随机种子的场景库: 场地内的各种距离、0-5 m/s 的载具速度、所有载具方向和目标方向"""
+    rng = np.random.default_rng(seed)
+    return [{
+        'distance_m': float(rng.uniform(*SCENARIO_DISTANCE_RANGE_M)),
+        'vehicle_speed_ms': float(rng.uniform(*SCENARIO_VEHICLE_SPEED_RANGE_MS)),
+        'vehicle_direction_deg': float(rng.uniform(0.0, 360.0)),
+        'target_direction_deg': float(rng.uniform(-180.0, 180.0)),
+    } for _ in range(count)]
+
+
+def _distribution(values):
+    if not values:
+        return None
+    return {'p50': float(np.percentile(values, 50)), 'p99': float(np.percentile(values, 99)),
+            'max': float(np.max(values))}
+
+
+def benchmark_solver(config, scenarios):
+    """
+    依次求解所有场景，统计吞吐量、计算量和延迟，并用极小步长的参考积分检验精度:
+        solution_miss_m            求出的 (俯仰角, 速度) 在参考积分下的击中高度与目标高度之差，即真实的脱靶量
+        simulation_height_error_m  run_simulation_for_angle_and_velocity 在同一组 (俯仰角, 速度) 下与参考积分之差
+    """
+    solver = BallisticSolver(config)
+    solutions, latencies_ms = [], []
+    start = time.perf_counter()
+    for params in scenarios:
+        solve_start = time.perf_counter()
+        solutions.append(solver.find_launch_solution(params))
+        latencies_ms.append((time.perf_counter() - solve_start) * 1000)
+    elapsed = time.perf_counter() - start
+    simulations, evaluations = solver.simulation_count, solver.derivative_evaluations
+
+    kwargs = solver.physics_kwargs()
+    kwargs['time_step_s'] = SOLUTION_REFERENCE_TIME_STEP_S
+    misses, simulation_errors = [], []
+    for params, solution in zip(scenarios, solutions):
+        if solution is None:
+            continue
+        pitch, velocity = solution['projectile_vertical_angle'], solution['projectile_total_velocity']
+        reference_h, _, _, _ = simulate_trajectory(pitch, velocity, params['distance_m'], **kwargs, method='rk4')
+        simulated_h, _ = solver.run_simulation_for_angle_and_velocity(pitch, velocity, params['distance_m'])
+        misses.append(abs(reference_h - config.HEIGHT_M))
+        simulation_errors.append(abs(simulated_h - reference_h))
+
+    count = len(scenarios)
+    return {
+        'scenarios': count,
+        'unsolved': sum(solution is None for solution in solutions),
+        'solves_per_sec': count / elapsed,
+        'simulations_per_solve': simulations / count,
+        'integration_steps_per_solve': evaluations / DERIVATIVE_EVALUATIONS_PER_STEP[config.INTEGRATOR] / count,
+        'derivative_evaluations_per_solve': evaluations / count,
+        'latency_ms': _distribution(latencies_ms),
+        'solution_miss_m': _distribution(misses),
+        'simulation_height_error_m': _distribution(simulation_errors),
+    }
+
+
+def distance_profile(config, distances=DISTANCE_PROFILE_M, repeats=DISTANCE_PROFILE_REPEATS):
+    """
+    静止载具正对目标时逐个距离冷启动求解，返回 {距离字符串: 毫秒}。
+    每个距离重复 repeats 次取最短耗时，尽量排除调度抖动，便于与基线逐项比较。
+    """
+    solver = BallisticSolver(config)
+    profile = {}
+    for distance_m in distances:
+        params = {'distance_m': distance_m, 'vehicle_speed_ms': 0.0, 'vehicle_direction_deg': 0.0,
+                  'target_direction_deg': 0.0}
+        best = math.inf
+        for _ in range(repeats):
+            start = time.perf_counter()
+            solver.find_launch_solution(params)
+            best = min(best, time.perf_counter() - start)
+        profile[f"{distance_m:g}"] = best * 1000
+    return profile
+
+
+def run_suite(scenario_count=200, seed=0, config_names=None, base_config=None):
+    """对 BENCHMARK_CONFIGS 中的每个配置运行 benchmark_solver 和 distance_profile，返回可直接写成 JSON 的报告"""
+    base_config = base_config if base_config is not None else SolverConfig()
+    scenarios = scenario_corpus(scenario_count, seed)
+    results = {}
+    for name in config_names or BENCHMARK_CONFIGS:
+        config = dataclasses.replace(base_config, **BENCHMARK_CONFIGS[name])
+        results[name] = benchmark_solver(config, scenarios)
+        results[name]['distance_latency_ms'] = distance_profile(config)
+    return {'version': REPORT_VERSION, 'seed': seed, 'scenarios': scenario_count,
+            'integrator': base_config.INTEGRATOR, 'configs': results}
+
+
+def check_report(report, min_solves_per_sec=None, max_p99_latency_ms=None, max_miss_m=None,
+                 baseline=None, max_regression=0.2):
+    """
+    检查报告是否达标，返回不达标项的说明列表 (空列表表示全部通过)。
+
+    baseline 为之前保存的报告时，吞吐量下降或 p99 延迟、最大脱靶量、任一距离的求解耗时上升超过 max_regression (比例)
+    也算不达标。
+    """
+    failures = []
+    for name, result in report['configs'].items():
+        throughput, p99 = result['solves_per_sec'], result['latency_ms']['p99']
+        miss = result['solution_miss_m']['max'] if result['solution_miss_m'] else math.inf
+        if min_solves_per_sec is not None and throughput < min_solves_per_sec:
+            failures.append(f"{name}: {throughput:.1f} solves/s < {min_solves_per_sec}")
+        if max_p99_latency_ms is not None and p99 > max_p99_latency_ms:
+            failures.append(f"{name}: p99 latency {p99:.2f} ms > {max_p99_latency_ms}")
+        if max_miss_m is not None and miss > max_miss_m:
+            failures.append(f"{name}: max miss {miss:.4f} m > {max_miss_m}")
+
+        old = (baseline or {}).get('configs', {}).get(name)
+        if not old:
+            continue
+        if throughput < old['solves_per_sec'] * (1 - max_regression):
+            failures.append(f"{name}: throughput regressed {old['solves_per_sec']:.1f} -> {throughput:.1f} solves/s")
+        if p99 > old['latency_ms']['p99'] * (1 + max_regression):
+            failures.append(f"{name}: p99 latency regressed {old['latency_ms']['p99']:.2f} -> {p99:.2f} ms")
+        old_miss = old['solution_miss_m']['max'] if old['solution_miss_m'] else math.inf
+        if miss > old_miss * (1 + max_regression) and miss > (max_miss_m or 0.0):
+            failures.append(f"{name}: max miss regressed {old_miss:.4f} -> {miss:.4f} m")
+        # 旧版报告没有逐距离耗时，跳过
+        for distance, old_ms in old.get('distance_latency_ms', {}).items():
+            new_ms = result.get('distance_latency_ms', {}).get(distance)
+            if new_ms is not None and new_ms > old_ms * (1 + max_regression):
+                failures.append(f"{name}: latency at {distance} m regressed {old_ms:.2f} -> {new_ms:.2f} ms")
+    return failures
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark solver throughput and accuracy")
+    parser.add_argument("--scenarios", type=int, default=200, help="number of scenarios per config")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--configs", nargs="+", choices=sorted(BENCHMARK_CONFIGS), default=None)
+    parser.add_argument("--integrator", choices=INTEGRATOR_CHOICES, default=None,
+                        help="solver integrator to benchmark (default: euler)")
+    parser.add_argument("--output", help="also write the JSON report to this file")
+    parser.add_argument("--min-solves-per-sec", type=float, default=None)
+    parser.add_argument("--max-p99-ms", type=float, default=None)
+    parser.add_argument("--max-miss-m", type=float, default=None, help="max allowed true miss distance (m)")
+    parser.add_argument("--baseline", help="previous JSON report to compare against")
+    parser.add_argument("--max-regression", type=float, default=0.2,
+                        help="allowed relative regression against the baseline (default 0.2)")
+    parser.add_argument("--integrators", action="store_true", help="also compare integrator accuracy/throughput")
+    parser.add_argument("--count", type=int, default=400, help="trajectories for the integrator comparison")
+    parser.add_argument("--tolerance", type=float, default=None,
+                        help="also report the fastest integrator whose max height error is below this (m)")
+    args = parser.parse_args()
+
+    base_config = SolverConfig(INTEGRATOR=args.integrator) if args.integrator else SolverConfig()
+    report = run_suite(args.scenarios, args.seed, args.configs, base_config)
+    if args.integrators or args.tolerance is not None:
+        report['integrators'] = compare_integrators(count=args.count, seed=args.seed)
+        if args.tolerance is not None:
+            report['fastest_integrator'] = fastest_integrator(report['integrators'], args.tolerance)
+
+    baseline = None
+    if args.baseline:
+        with open(args.baseline, encoding="utf-8") as f:
+            baseline = json.load(f)
+    report['failures'] = check_report(report, args.min_solves_per_sec, args.max_p99_ms, args.max_miss_m,
+                                      baseline, args.max_regression)
+
+    text = json.dumps(report, indent=2)
+    print(text)
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as f:
+            f.write(text + "\n")
+    if report['failures']:
+        for failure in report['failures']:
+            print(f"FAIL: {failure}", file=sys.stderr)
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
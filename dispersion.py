@@ -0,0 +1,167 @@
+"""
+    蒙特卡洛散布分析 (无 GUI 依赖)
+
+    在一个发射方案周围随机扰动摩擦轮出射速度、俯仰角 (回差)、阻力系数和弹丸质量，把全部扰动后的弹道
+    作为一个批次交给 ballistics.simulate_batch 一起积分，统计目标平面处的击中高度:
+    落在目标高度窗口内的概率、高度散布，以及各误差来源对高度的影响 (对标准化扰动做线性回归)。
+
+    只分析竖直平面内的高度误差，方位角误差不在模型中。
+
+    用法:
+        python dispersion.py 3.5
+        python dispersion.py 3.5 --vehicle-speed 1.5 --vehicle-direction 90 --samples 10000
+"""
+
+import argparse
+import math
+from dataclasses import dataclass, fields
+
+import numpy as np
+
+from ballistics import launcher_to_projectile, simulate_batch
+from solver import BallisticSolver, SolveCancelled
+
+# 扰动量的名称，与 analyze_dispersion 返回的 sensitivities 的键一致
+DISPERSION_INPUTS = ('launcher_velocity', 'pitch', 'drag_coefficient', 'mass')
+
+# 可取消的分析每积分这么多条弹道检查一次 cancelled。分块积分的结果与整批相同，只是多一些每步的固定开销
+_CANCEL_CHECK_SAMPLES = 250
+
+
+@dataclass(frozen=True)
+class DispersionModel:
+    """每次发射的随机误差，百分比均为相对标准差 (正态分布)"""
+
+    VELOCITY_SIGMA_PERCENT: float = 2.0  # 摩擦轮转速波动
+    PITCH_BACKLASH_DEG: float = 0.5  # 俯仰机构回差，实际俯仰角在 ±回差/2 内均匀分布
+    DRAG_COEFFICIENT_SIGMA_PERCENT: float = 5.0
+    MASS_SIGMA_PERCENT: float = 3.0
+
+
+def sample_launches(solution, params, model, samples, rng):
+    """
+    生成扰动后的弹丸发射参数: 误差加在发射器上 (转速、俯仰角)，再叠加载具速度换算到目标方向的竖直平面内。
+    返回 (弹丸俯仰角, 弹丸速度, 阻力系数倍数, 质量倍数, 标准化扰动)，标准化扰动的形状为 (samples, 4)。
+    """
+    noise = np.column_stack([
+        rng.standard_normal(samples),
+        rng.uniform(-math.sqrt(3.0), math.sqrt(3.0), samples),  # 方差为 1 的均匀分布
+        rng.standard_normal(samples),
+        rng.standard_normal(samples),
+    ])
+    velocity = solution['launcher_velocity'] * (1.0 + noise[:, 0] * model.VELOCITY_SIGMA_PERCENT / 100.0)
+    pitch = solution['launcher_angle'] + noise[:, 1] * model.PITCH_BACKLASH_DEG / math.sqrt(12.0)
+    drag_scale = 1.0 + noise[:, 2] * model.DRAG_COEFFICIENT_SIGMA_PERCENT / 100.0
+    mass_scale = 1.0 + noise[:, 3] * model.MASS_SIGMA_PERCENT / 100.0
+    angles, velocities = launcher_to_projectile(velocity, pitch, solution['aim_azimuth_deg'],
+                                                params['vehicle_speed_ms'], params['vehicle_direction_deg'],
+                                                params['target_direction_deg'])
+    return angles, velocities, drag_scale, mass_scale, noise
+
+
+def analyze_dispersion(solver, solution, params, model=None, samples=2000, window_m=None, seed=None,
+                       cancelled=None):
+    """
+    以 solver 的常量和积分方法分析 solution (find_launch_solution 或射表查询的结果) 的散布。
+
+    cancelled 与 find_launch_solution 的相同: 给出时分块积分，每块之前调用，返回 True 时抛出 SolveCancelled。
+
+    window_m 为目标高度窗口的半宽，默认 HIT_TOLERANCE_M。返回的字典中:
+        hit_probability   击中高度落在 HEIGHT_M ± window_m 内的比例 (未到达目标平面记为未击中)
+        reached           到达目标平面的比例
+        height_*_m        到达目标平面的弹道的击中高度统计
+        sensitivities     {扰动名: {'height_per_sigma_m', 'variance_share'}}，按影响从大到小排列;
+                          height_per_sigma_m 为该误差变化一个标准差时击中高度的变化 (线性回归系数)，
+                          variance_share 为它在线性模型可解释的高度方差中所占的比例
+    """
+    config = solver.config
+    model = model if model is not None else DispersionModel()
+    window_m = window_m if window_m is not None else config.HIT_TOLERANCE_M
+    rng = np.random.default_rng(seed)
+
+    angles, velocities, drag_scale, mass_scale, noise = sample_launches(solution, params, model, samples, rng)
+    physics = dict(solver.physics_kwargs(), drag_coefficient=config.DRAG_COEFFICIENT * drag_scale,
+                   mass_kg=config.MASS_KG * mass_scale)
+    chunk = samples if cancelled is None else _CANCEL_CHECK_SAMPLES
+    hit_h = np.empty(samples)
+    for start in range(0, samples, chunk):
+        if cancelled is not None and cancelled():
+            raise SolveCancelled()
+        lanes = slice(start, start + chunk)
+        lane_physics = dict(physics, drag_coefficient=physics['drag_coefficient'][lanes],
+                            mass_kg=physics['mass_kg'][lanes])
+        hit_h[lanes] = simulate_batch(angles[lanes], velocities[lanes], params['distance_m'], **lane_physics,
+                                      method=config.INTEGRATOR, tolerance_m=config.INTEGRATION_TOLERANCE_M)[0]
+
+    reached = hit_h >= 0
+    heights = hit_h[reached]
+    report = {
+        'samples': samples,
+        'window_m': window_m,
+        'reached': float(reached.mean()),
+        'hit_probability': float(np.mean(reached & (np.abs(hit_h - config.HEIGHT_M) <= window_m))),
+        'height_mean_m': float(heights.mean()) if heights.size else float('nan'),
+        'height_std_m': float(heights.std()) if heights.size else float('nan'),
+        'height_p05_m': float(np.percentile(heights, 5)) if heights.size else float('nan'),
+        'height_p95_m': float(np.percentile(heights, 95)) if heights.size else float('nan'),
+        'sensitivities': {},
+    }
+
+    # 误差为零的输入不参与回归，其余按标准化扰动回归击中高度
+    sigmas = np.array([model.VELOCITY_SIGMA_PERCENT, model.PITCH_BACKLASH_DEG,
+                       model.DRAG_COEFFICIENT_SIGMA_PERCENT, model.MASS_SIGMA_PERCENT])
+    varied = np.flatnonzero(sigmas > 0)
+    if heights.size <= varied.size + 1:
+        return report
+    design = np.column_stack([np.ones(heights.size), noise[reached][:, varied]])
+    coefficients = np.linalg.lstsq(design, heights, rcond=None)[0][1:]
+    explained = float(np.sum(coefficients ** 2))
+    effects = {DISPERSION_INPUTS[i]: float(b) for i, b in zip(varied.tolist(), coefficients.tolist())}
+    for name in sorted(effects, key=lambda name: -abs(effects[name])):
+        report['sensitivities'][name] = {
+            'height_per_sigma_m': effects[name],
+            'variance_share': effects[name] ** 2 / explained if explained else 0.0,
+        }
+    return report
+
+
+def format_dispersion(report):
+    lines = [f"Hit probability: {report['hit_probability']:.1%} (window ±{report['window_m'] * 100:.1f} cm, "
+             f"{report['samples']} samples)",
+             f"Reached target plane: {report['reached']:.1%}",
+             f"Height: mean {report['height_mean_m']:.3f} m, std {report['height_std_m'] * 100:.2f} cm, "
+             f"5-95% {report['height_p05_m']:.3f} - {report['height_p95_m']:.3f} m",
+             "",
+             f"{'input':<20}{'dh per sigma':>14}{'share':>8}"]
+    for name, effect in report['sensitivities'].items():
+        lines.append(f"{name:<20}{effect['height_per_sigma_m'] * 100:>11.2f} cm{effect['variance_share']:>8.0%}")
+    return "\n".join(lines)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Monte Carlo dispersion analysis of a launch solution")
+    parser.add_argument("distance_m", type=float, help="horizontal distance to the target (m)")
+    parser.add_argument("--vehicle-speed", type=float, default=0.0, help="vehicle speed (m/s)")
+    parser.add_argument("--vehicle-direction", type=float, default=0.0, help="vehicle direction (deg)")
+    parser.add_argument("--target-direction", type=float, default=0.0, help="target direction (deg)")
+    parser.add_argument("--samples", type=int, default=2000, help="perturbed launches (default 2000)")
+    parser.add_argument("--seed", type=int, default=None, help="random seed")
+    defaults = DispersionModel()
+    for field in fields(DispersionModel):
+        parser.add_argument(f"--{field.name.lower().replace('_', '-')}", dest=field.name, type=float,
+                            default=getattr(defaults, field.name))
+    args = parser.parse_args()
+
+    model = DispersionModel(**{field.name: getattr(args, field.name) for field in fields(DispersionModel)})
+    params = {'distance_m': args.distance_m, 'vehicle_speed_ms': args.vehicle_speed,
+              'vehicle_direction_deg': args.vehicle_direction, 'target_direction_deg': args.target_direction}
+    solver = BallisticSolver()
+    solution = solver.find_launch_solution(params)
+    if solution is None:
+        raise SystemExit("No launch solution for this position")
+    print(f"Solution: pitch {solution['launcher_angle']:.2f} deg, velocity {solution['launcher_velocity']:.2f} m/s")
+    print(format_dispersion(analyze_dispersion(solver, solution, params, model, args.samples, seed=args.seed)))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,49 @@
+"""
+    场地背景图预处理与磁盘缓存 (只依赖 Pillow)
+
+    把原图缩放到画布大小并设置统一的透明度，结果以 PNG 保存在缓存目录中。缓存文件名包含原图路径、
+    修改时间、文件大小、目标尺寸和透明度的摘要，原图或画布尺寸改变后自动生成新的缓存。
+"""
+
+import hashlib
+import os
+
+from PIL import Image
+
+# 缓存目录: $XDG_CACHE_HOME/the-archer，未设置时为 ~/.cache/the-archer
+CACHE_DIR = os.path.join(os.environ.get("XDG_CACHE_HOME") or os.path.join(os.path.expanduser("~"), ".cache"),
+                         "the-archer")
+
+
+def _cache_path(source_path, size, alpha, cache_dir):
+    stat = os.stat(source_path)
+    key = f"{os.path.abspath(source_path)}|{stat.st_mtime_ns}|{stat.st_size}|{size}|{alpha}"
+    return os.path.join(cache_dir, f"field_{hashlib.sha1(key.encode('utf-8')).hexdigest()[:16]}.png")
+
+
+def load_field_image(source_path, size, alpha, cache_dir=CACHE_DIR):
+    """
+    返回 (RGBA 图像, 是否命中缓存)。size 为正方形边长 (像素)，alpha 为 0-255 的统一透明度。
+
+    原图不存在时抛出 FileNotFoundError；缓存目录不可写时照常返回处理后的图像。
+    """
+    path = _cache_path(source_path, size, alpha, cache_dir)
+    try:
+        with Image.open(path) as cached:
+            cached.load()
+            return cached, True
+    except (OSError, ValueError):
+        pass
+
+    # 先缩放 RGB 再整体设置 alpha 通道，不逐像素处理；alpha 恒定，与先设 alpha 再缩放结果相同
+    with Image.open(source_path) as original:
+        image = original.convert("RGB").resize((size, size), Image.Resampling.LANCZOS)
+    image.putalpha(alpha)
+    try:
+        os.makedirs(cache_dir, exist_ok=True)
+        temporary_path = f"{path}.{os.getpid()}.tmp"
+        image.save(temporary_path, format="PNG")
+        os.replace(temporary_path, path)
+    except OSError as e:
+        print(f"Warning: could not cache the field image: {e}")
+    return image, False
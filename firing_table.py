@@ -0,0 +1,141 @@
+"""
+    预计算射表 (无 GUI 依赖)
+
+    在一组等间距的目标距离上预先求出静止发射方案 (弹丸俯仰角、弹丸速度、飞行时间)，
+    保存为可以直接内存映射的二进制文件。查询时只做一次线性插值，再套用载具运动补偿，
+    代价在微秒级，适合机器人端每个控制周期调用。
+
+    文件格式 (小端):
+        8 字节魔数 b"ARCHERFT"
+        4 字节无符号整数: JSON 头部长度
+        JSON 头部 (版本、物理常量、距离网格)，用空格补齐到 64 字节对齐
+        float64 数组，形状为 (行数, 3)，三列依次为 俯仰角、速度、飞行时间，无解处为 NaN
+"""
+
+import json
+import math
+import struct
+
+import numpy as np
+
+from ballistics import compensate_for_vehicle
+from solver import SOLUTION_CONSTANTS
+
+FIRING_TABLE_MAGIC = b"ARCHERFT"
+FIRING_TABLE_VERSION = 1
+FIRING_TABLE_COLUMNS = ('projectile_vertical_angle', 'projectile_total_velocity', 'time')
+
+# 影响静止发射方案的全部常量，记录在表头中，任何一个不一致都说明射表已经过期
+FIRING_TABLE_CONSTANTS = SOLUTION_CONSTANTS
+
+_HEADER_ALIGNMENT = 64
+
+
+def solver_constants(config):
+    """读取 SolverConfig 中与射表相关的常量"""
+    return {name: getattr(config, name) for name in FIRING_TABLE_CONSTANTS}
+
+
+class FiringTable:
+    """等间距距离网格上的静止发射方案表"""
+
+    def __init__(self, constants, min_distance_m, distance_step_m, rows):
+        self.constants = dict(constants)
+        self.min_distance_m = float(min_distance_m)
+        self.distance_step_m = float(distance_step_m)
+        # np.asarray 去掉 memmap 子类的包装 (不复制数据)，逐行读取会快很多
+        self.rows = np.asarray(rows)
+        self.max_distance_m = self.min_distance_m + self.distance_step_m * (len(rows) - 1)
+
+    @classmethod
+    def build(cls, solver, min_distance_m, max_distance_m, distance_step_m=0.02):
+        """用求解器在 [min_distance_m, max_distance_m] 上逐点求解静止方案并建表"""
+        count = int(math.floor((max_distance_m - min_distance_m) / distance_step_m + 1e-9)) + 1
+        if count < 2:
+            raise ValueError("Firing table needs at least two distances")
+        rows = np.full((count, len(FIRING_TABLE_COLUMNS)), np.nan)
+        for i in range(count):
+            solution = solver.find_launch_solution({
+                'distance_m': min_distance_m + i * distance_step_m,
+                'vehicle_speed_ms': 0.0,
+                'vehicle_direction_deg': 0.0,
+                'target_direction_deg': 0.0,
+            })
+            if solution:
+                rows[i] = [solution[column] for column in FIRING_TABLE_COLUMNS]
+        return cls(solver_constants(solver.config), min_distance_m, distance_step_m, rows)
+
+    def save(self, path):
+        header = json.dumps({
+            'version': FIRING_TABLE_VERSION,
+            'constants': self.constants,
+            'columns': FIRING_TABLE_COLUMNS,
+            'min_distance_m': self.min_distance_m,
+            'distance_step_m': self.distance_step_m,
+            'row_count': len(self.rows),
+        }).encode("utf-8")
+        prefix_len = len(FIRING_TABLE_MAGIC) + 4
+        header += b" " * (-(prefix_len + len(header)) % _HEADER_ALIGNMENT)
+        with open(path, "wb") as f:
+            f.write(FIRING_TABLE_MAGIC)
+            f.write(struct.pack("<I", len(header)))
+            f.write(header)
+            f.write(np.ascontiguousarray(self.rows, dtype="<f8").tobytes())
+
+    @classmethod
+    def load(cls, path, expected_constants=None):
+        """
+        以内存映射方式打开射表文件。
+
+        传入 expected_constants (通常是 solver_constants(config)) 时会与表头逐项比较，
+        不一致则抛出 ValueError，避免使用过期的射表。
+        """
+        with open(path, "rb") as f:
+            if f.read(len(FIRING_TABLE_MAGIC)) != FIRING_TABLE_MAGIC:
+                raise ValueError(f"{path} is not a firing table file")
+            (header_len,) = struct.unpack("<I", f.read(4))
+            header = json.loads(f.read(header_len).decode("utf-8"))
+        if header.get('version') != FIRING_TABLE_VERSION:
+            raise ValueError(f"Unsupported firing table version: {header.get('version')}")
+
+        if expected_constants is not None:
+            stale = sorted(name for name in FIRING_TABLE_CONSTANTS
+                           if header['constants'].get(name) != expected_constants.get(name))
+            if stale:
+                raise ValueError(f"Firing table is stale, constants changed: {', '.join(stale)}")
+
+        rows = np.memmap(path, dtype="<f8", mode="r", offset=len(FIRING_TABLE_MAGIC) + 4 + header_len,
+                         shape=(header['row_count'], len(header['columns'])))
+        return cls(header['constants'], header['min_distance_m'], header['distance_step_m'], rows)
+
+    def matches(self, constants):
+        return all(self.constants.get(name) == constants.get(name) for name in FIRING_TABLE_CONSTANTS)
+
+    def lookup_stationary(self, distance_m):
+        """
+        插值得到静止方案 (俯仰角, 速度, 飞行时间)，超出范围或无解时返回 None。
+
+        求解器在连续的俯仰角范围内寻优，最优方案随距离连续变化，三列都可以直接线性插值。
+        """
+        pos = (distance_m - self.min_distance_m) / self.distance_step_m
+        if pos < 0 or pos > len(self.rows) - 1:
+            return None
+        i = min(int(pos), len(self.rows) - 2)
+        frac = pos - i
+        pitch_0, velocity_0, time_0 = self.rows[i]
+        pitch_1, velocity_1, time_1 = self.rows[i + 1]
+        if pitch_0 != pitch_0 or pitch_1 != pitch_1:  # NaN: 该距离无解
+            return None
+        return (pitch_0 + (pitch_1 - pitch_0) * frac,
+                velocity_0 + (velocity_1 - velocity_0) * frac,
+                time_0 + (time_1 - time_0) * frac)
+
+    def lookup(self, params):
+        """按 calc_params 查询，返回与 find_launch_solution 相同格式的字典，无解时返回 None"""
+        stationary = self.lookup_stationary(params['distance_m'])
+        if stationary is None:
+            return None
+        pitch, velocity, flight_time = stationary
+        return compensate_for_vehicle(float(pitch), float(velocity), float(flight_time),
+                                      params['vehicle_speed_ms'], params['vehicle_direction_deg'],
+                                      params['target_direction_deg'])
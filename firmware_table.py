@@ -0,0 +1,534 @@
+"""
+    导出可以直接编译进机器人程序的静止发射表 (无 GUI 依赖)
+
+    先以 sample_step_m 的间距用完整求解器求出 距离 → (发射俯仰角, 电机转速) 曲线，
+    再在采样点中选出最少的节点，使节点间线性插值在全部采样点上满足用户给定的俯仰角和转速误差上限:
+    曲线弯曲处 (俯仰角触到下限、目标仰角限制切换的地方) 节点密，平直处节点稀。
+
+    表中的数值都是定点整数: 距离为毫米 (uint16)，俯仰角为 0.01° (int16)，转速为整数 RPM (uint16)。
+    另有一个分桶索引: 桶宽为不超过最小节点间距的 2 的幂毫米，每个桶记录桶起点所在的区间，
+    查询时 (距离 - 起点) >> 位移 得到桶号，最多再前进一个区间，为常数时间；插值只用 32 位整数运算。
+    FirmwareTable.lookup 按与生成的 Java / C 代码完全相同的整数运算求值，验证报告因此与机器人端逐位一致。
+
+    表只适用于静止发射；行进间射击仍需按载具速度补偿 (见 ballistics.compensate_for_vehicle 或 surrogate)。
+
+    用法:
+        python firmware_table.py ShooterTable.java --pitch-tolerance 0.25 --rpm-tolerance 25
+        python firmware_table.py shooter_table.h --max-distance 4.6
+        python firmware_table.py shooter_table.bin --report report.txt
+"""
+
+import argparse
+import hashlib
+import math
+import os
+import re
+import struct
+import time
+from dataclasses import dataclass, fields
+
+import numpy as np
+
+from solver import BallisticSolver, SolverConfig
+
+FIRMWARE_TABLE_MAGIC = b"ARCHERKT"
+FIRMWARE_TABLE_VERSION = 1
+
+# 定点缩放: 存储值 = round(实际值 * 缩放)
+DISTANCE_SCALE = 1000  # 毫米
+PITCH_SCALE = 100  # 0.01°
+RPM_SCALE = 1
+
+# 选节点时只用误差上限的这个比例，其余留给采样点之间的曲率和求解器自身的噪声 (俯仰角寻优精度)
+_KNOT_ERROR_SHARE = 0.8
+
+FIRMWARE_FORMATS = {'.java': 'java', '.h': 'c', '.bin': 'binary'}
+
+
+def config_digest(config):
+    """全部常量 (包括只影响转速的发射器硬件常量) 的摘要，写入表中供机器人端核对"""
+    values = tuple(getattr(config, field.name) for field in fields(SolverConfig))
+    return hashlib.sha1(repr(values).encode("utf-8")).hexdigest()[:16]
+
+
+def _div_trunc(numerator, denominator):
+    """与 Java / C 相同的向零取整的整数除法 (denominator > 0)"""
+    return numerator // denominator if numerator >= 0 else -(-numerator // denominator)
+
+
+def stationary_solution(solver, distance_m):
+    """静止发射方案的 (俯仰角, 电机转速)，无解时返回 None。不使用热启动，避免俯仰角粘在上一个点附近"""
+    solution = solver.find_launch_solution({'distance_m': distance_m, 'vehicle_speed_ms': 0.0,
+                                            'vehicle_direction_deg': 0.0, 'target_direction_deg': 0.0})
+    if solution is None:
+        return None
+    return solution['launcher_angle'], solver.calculate_motor_rpm(solution['launcher_velocity'])
+
+
+def sample_curve(solver, min_distance_m, max_distance_m, sample_step_m):
+    """
+    以 sample_step_m 为间距求解 [min_distance_m, max_distance_m]，返回 (距离, 俯仰角, 转速) 三个数组。
+    去掉两端无解的部分；中间有无解的距离时抛出 ValueError (一张表只能覆盖一个连续区间)。
+    """
+    count = int(math.floor((max_distance_m - min_distance_m) / sample_step_m + 1e-9)) + 1
+    distances = min_distance_m + sample_step_m * np.arange(count)
+    values = np.full((count, 2), np.nan)
+    for i, d in enumerate(distances.tolist()):
+        solution = stationary_solution(solver, d) if d > 0 else None
+        if solution is not None:
+            values[i] = solution
+    feasible = np.flatnonzero(~np.isnan(values[:, 0]))
+    if feasible.size < 2:
+        raise ValueError("Fewer than two distances in range have a launch solution")
+    first, last = feasible[0], feasible[-1]
+    if feasible.size != last - first + 1:
+        raise ValueError("Launch solutions are not continuous over the distance range")
+    return distances[first:last + 1], values[first:last + 1, 0], values[first:last + 1, 1]
+
+
+def _interpolate_fixed(d, knot_d, knot_v):
+    """与机器人端相同的整数线性插值，各参数为同长度 (或可广播) 的 int64 数组"""
+    numerator = (knot_v[1] - knot_v[0]) * (d - knot_d[0])
+    denominator = knot_d[1] - knot_d[0]
+    return knot_v[0] + np.where(numerator >= 0, numerator // denominator, -(-numerator // denominator))
+
+
+def place_knots(distance_mm, pitch_fixed, rpm_fixed, true_pitch, true_rpm, pitch_bound, rpm_bound):
+    """
+    在采样点中选出最少的节点，使节点间的整数插值在每个采样点上都满足误差上限 (定点单位)。
+
+    reach[i] 为从节点 i 出发、连续满足误差上限的最远采样点 (二分查找，假定区间越长误差越大)，
+    之后在 "i 可以直接连到 i+1 ... reach[i]" 构成的图上按最短路选节点。返回节点在采样数组中的下标。
+    """
+    n = len(distance_mm)
+
+    def feasible(i, j):
+        if j <= i + 1:
+            return True
+        d = distance_mm[i + 1:j]
+        pitch = _interpolate_fixed(d, distance_mm[[i, j]], pitch_fixed[[i, j]])
+        rpm = _interpolate_fixed(d, distance_mm[[i, j]], rpm_fixed[[i, j]])
+        return (np.all(np.abs(pitch - true_pitch[i + 1:j]) <= pitch_bound)
+                and np.all(np.abs(rpm - true_rpm[i + 1:j]) <= rpm_bound))
+
+    reach = np.empty(n, dtype=int)
+    for i in range(n - 1):
+        low, step = i + 1, 1
+        while low + step < n and feasible(i, low + step):
+            low, step = low + step, step * 2
+        high = min(low + step, n)  # feasible(i, high) 为假或越界
+        while high - low > 1:
+            middle = (low + high) // 2
+            if feasible(i, middle):
+                low = middle
+            else:
+                high = middle
+        reach[i] = low
+    reach[n - 1] = n - 1
+
+    # 最短路: 采样点按顺序排列，边只向后，按下标顺序松弛即可
+    best = np.full(n, n + 1, dtype=int)
+    previous = np.full(n, -1, dtype=int)
+    best[0] = 0
+    for i in range(n - 1):
+        targets = np.arange(i + 1, reach[i] + 1)
+        better = targets[best[targets] > best[i] + 1]
+        best[better] = best[i] + 1
+        previous[better] = i
+    knots = [n - 1]
+    while knots[-1] != 0:
+        knots.append(int(previous[knots[-1]]))
+    return knots[::-1]
+
+
+def _interpolate_table(distance_mm, knot_mm, knot_values):
+    """在每个距离上按节点表做整数插值"""
+    k = np.clip(np.searchsorted(knot_mm, distance_mm, side='right') - 1, 0, len(knot_mm) - 2)
+    return _interpolate_fixed(distance_mm, (knot_mm[k], knot_mm[k + 1]), (knot_values[k], knot_values[k + 1]))
+
+
+def _refit_knots(distance_mm, knot_mm, true_values):
+    """固定节点位置，按连续分段线性函数对采样值做最小二乘，返回取整后的节点值 (int64)"""
+    k = np.clip(np.searchsorted(knot_mm, distance_mm, side='right') - 1, 0, len(knot_mm) - 2)
+    weight = (distance_mm - knot_mm[k]) / (knot_mm[k + 1] - knot_mm[k])
+    basis = np.zeros((len(distance_mm), len(knot_mm)))
+    rows = np.arange(len(distance_mm))
+    basis[rows, k] = 1.0 - weight
+    basis[rows, k + 1] = weight
+    return np.round(np.linalg.lstsq(basis, true_values, rcond=None)[0]).astype(np.int64)
+
+
+@dataclass
+class FirmwareTable:
+    """定点节点表和分桶索引，字段均为整数数组"""
+    distance_mm: np.ndarray  # uint16，严格递增
+    pitch_cdeg: np.ndarray  # int16，0.01°
+    rpm: np.ndarray  # uint16
+    bucket: np.ndarray  # uint8 或 uint16，bucket[b] 为距离 distance_mm[0] + (b << bucket_shift) 所在的区间
+    bucket_shift: int
+    digest: str
+    pitch_tolerance_deg: float
+    rpm_tolerance: float
+
+    def __len__(self):
+        return len(self.distance_mm)
+
+    @property
+    def byte_size(self):
+        """机器人端数组占用的字节数"""
+        return self.distance_mm.nbytes + self.pitch_cdeg.nbytes + self.rpm.nbytes + self.bucket.nbytes
+
+    def segment(self, distance_mm):
+        """常数时间定位: 返回区间下标 k (distance_mm[k] <= 距离 <= distance_mm[k + 1])，超出范围时夹到两端"""
+        first, last = int(self.distance_mm[0]), int(self.distance_mm[-1])
+        distance_mm = min(max(distance_mm, first), last)
+        k = int(self.bucket[(distance_mm - first) >> self.bucket_shift])
+        if k + 2 < len(self.distance_mm) and distance_mm >= int(self.distance_mm[k + 1]):
+            k += 1
+        return k
+
+    def lookup_fixed(self, distance_mm):
+        """按机器人端的整数运算求值，返回 (俯仰角 0.01°, 转速 RPM)；超出范围时取端点的值"""
+        distance_mm = min(max(distance_mm, int(self.distance_mm[0])), int(self.distance_mm[-1]))
+        k = self.segment(distance_mm)
+        d0, d1 = int(self.distance_mm[k]), int(self.distance_mm[k + 1])
+        p0, p1 = int(self.pitch_cdeg[k]), int(self.pitch_cdeg[k + 1])
+        r0, r1 = int(self.rpm[k]), int(self.rpm[k + 1])
+        return (p0 + _div_trunc((p1 - p0) * (distance_mm - d0), d1 - d0),
+                r0 + _div_trunc((r1 - r0) * (distance_mm - d0), d1 - d0))
+
+    def lookup(self, distance_m):
+        """按米查询，返回 (俯仰角 °, 转速 RPM)，超出表的范围时返回 None"""
+        distance_mm = int(round(distance_m * DISTANCE_SCALE))
+        if distance_mm < self.distance_mm[0] or distance_mm > self.distance_mm[-1]:
+            return None
+        pitch, rpm = self.lookup_fixed(distance_mm)
+        return pitch / PITCH_SCALE, rpm / RPM_SCALE
+
+    def to_bytes(self):
+        """
+        二进制格式 (小端):
+            8 字节魔数 b"ARCHERKT"
+            uint16 版本, uint16 节点数 N, uint16 桶数 M, uint8 桶位移, uint8 桶元素字节数 (1 或 2)
+            8 字节常量摘要
+            uint16 距离[N] (mm), int16 俯仰角[N] (0.01°), uint16 转速[N], uint8/uint16 桶[M]
+        """
+        header = struct.pack("<HHHBB8s", FIRMWARE_TABLE_VERSION, len(self), len(self.bucket), self.bucket_shift,
+                             self.bucket.itemsize, bytes.fromhex(self.digest))
+        return (FIRMWARE_TABLE_MAGIC + header + self.distance_mm.astype("<u2").tobytes()
+                + self.pitch_cdeg.astype("<i2").tobytes() + self.rpm.astype("<u2").tobytes()
+                + self.bucket.astype("<u%d" % self.bucket.itemsize).tobytes())
+
+    @classmethod
+    def from_bytes(cls, data):
+        if data[:len(FIRMWARE_TABLE_MAGIC)] != FIRMWARE_TABLE_MAGIC:
+            raise ValueError("Not a firmware table")
+        offset = len(FIRMWARE_TABLE_MAGIC)
+        version, n, m, shift, item_size, digest = struct.unpack_from("<HHHBB8s", data, offset)
+        if version != FIRMWARE_TABLE_VERSION:
+            raise ValueError(f"Unsupported firmware table version: {version}")
+        offset += struct.calcsize("<HHHBB8s")
+        arrays = []
+        for dtype, count in (("<u2", n), ("<i2", n), ("<u2", n), ("<u%d" % item_size, m)):
+            arrays.append(np.frombuffer(data, dtype=dtype, count=count, offset=offset).astype(dtype[1:]))
+            offset += count * np.dtype(dtype).itemsize
+        return cls(*arrays, shift, digest.hex(), math.nan, math.nan)
+
+    def _comment_lines(self):
+        return [f"Stationary launch table: {len(self)} knots, {self.distance_mm[0]}-{self.distance_mm[-1]} mm, "
+                f"{self.byte_size} bytes.",
+                f"Error bounds: pitch {self.pitch_tolerance_deg} deg, {self.rpm_tolerance} RPM. "
+                f"Constants digest {self.digest}.",
+                "Generated by firmware_table.py, do not edit. Distances in mm, pitch in 0.01 deg."]
+
+    def to_java(self, class_name="ShooterTable", package=None):
+        unsigned_bucket = "& 0xFF" if self.bucket.itemsize == 1 else "& 0xFFFF"
+        bucket_type = "byte" if self.bucket.itemsize == 1 else "short"
+        lines = [f"package {package};", ""] if package else []
+        lines += ["/**"] + [f" * {line}" for line in self._comment_lines()] + [" */",
+                  f"public final class {class_name} {{",
+                  f"    public static final String CONSTANTS_DIGEST = \"{self.digest}\";",
+                  f"    public static final int MIN_DISTANCE_MM = {self.distance_mm[0]};",
+                  f"    public static final int MAX_DISTANCE_MM = {self.distance_mm[-1]};",
+                  f"    private static final int BUCKET_SHIFT = {self.bucket_shift};",
+                  f"    private static final short[] DISTANCE_MM = {_java_array(self.distance_mm, 'short')};",
+                  f"    private static final short[] PITCH_CDEG = {_java_array(self.pitch_cdeg, 'short')};",
+                  f"    private static final short[] RPM = {_java_array(self.rpm, 'short')};",
+                  f"    private static final {bucket_type}[] BUCKET = {_java_array(self.bucket, bucket_type)};",
+                  "",
+                  f"    private {class_name}() {{}}",
+                  "",
+                  "    /** Interval index for a distance already clamped to [MIN_DISTANCE_MM, MAX_DISTANCE_MM]. */",
+                  "    private static int segment(int distanceMm) {",
+                  f"        int k = BUCKET[(distanceMm - MIN_DISTANCE_MM) >> BUCKET_SHIFT] {unsigned_bucket};",
+                  "        if (k + 2 < DISTANCE_MM.length && distanceMm >= (DISTANCE_MM[k + 1] & 0xFFFF)) {",
+                  "            k++;",
+                  "        }",
+                  "        return k;",
+                  "    }",
+                  "",
+                  "    private static int clamp(int distanceMm) {",
+                  "        return Math.max(MIN_DISTANCE_MM, Math.min(MAX_DISTANCE_MM, distanceMm));",
+                  "    }",
+                  "",
+                  "    private static int interpolate(int d, int k, int v0, int v1) {",
+                  "        int d0 = DISTANCE_MM[k] & 0xFFFF;",
+                  "        return v0 + (v1 - v0) * (d - d0) / ((DISTANCE_MM[k + 1] & 0xFFFF) - d0);",
+                  "    }",
+                  "",
+                  "    /** Launcher pitch in 0.01 degree; distances outside the table use the nearest end. */",
+                  "    public static int pitchCentidegrees(int distanceMm) {",
+                  "        int d = clamp(distanceMm);",
+                  "        int k = segment(d);",
+                  "        return interpolate(d, k, PITCH_CDEG[k], PITCH_CDEG[k + 1]);",
+                  "    }",
+                  "",
+                  "    /** Motor RPM; distances outside the table use the nearest end. */",
+                  "    public static int rpm(int distanceMm) {",
+                  "        int d = clamp(distanceMm);",
+                  "        int k = segment(d);",
+                  "        return interpolate(d, k, RPM[k] & 0xFFFF, RPM[k + 1] & 0xFFFF);",
+                  "    }",
+                  "",
+                  "    public static boolean inRange(int distanceMm) {",
+                  "        return distanceMm >= MIN_DISTANCE_MM && distanceMm <= MAX_DISTANCE_MM;",
+                  "    }",
+                  "}"]
+        return "\n".join(lines) + "\n"
+
+    def to_c(self, prefix="shooter_table"):
+        bucket_type = "uint8_t" if self.bucket.itemsize == 1 else "uint16_t"
+        guard = prefix.upper() + "_H"
+        upper = prefix.upper()
+        lines = ["/*"] + [f" * {line}" for line in self._comment_lines()] + [" */",
+                 f"#ifndef {guard}",
+                 f"#define {guard}",
+                 "",
+                 "#include <stdint.h>",
+                 "",
+                 f"#define {upper}_CONSTANTS_DIGEST \"{self.digest}\"",
+                 f"#define {upper}_MIN_DISTANCE_MM {self.distance_mm[0]}",
+                 f"#define {upper}_MAX_DISTANCE_MM {self.distance_mm[-1]}",
+                 f"#define {upper}_KNOTS {len(self)}",
+                 f"#define {upper}_BUCKET_SHIFT {self.bucket_shift}",
+                 "",
+                 f"static const uint16_t {prefix}_distance_mm[{len(self)}] = {_c_array(self.distance_mm)};",
+                 f"static const int16_t {prefix}_pitch_cdeg[{len(self)}] = {_c_array(self.pitch_cdeg)};",
+                 f"static const uint16_t {prefix}_rpm[{len(self)}] = {_c_array(self.rpm)};",
+                 f"static const {bucket_type} {prefix}_bucket[{len(self.bucket)}] = {_c_array(self.bucket)};",
+                 "",
+                 "/* Clamps distance_mm to the table and returns the interval index. */",
+                 f"static inline int {prefix}_segment(int32_t *distance_mm) {{",
+                 "    int32_t d = *distance_mm;",
+                 "    int k;",
+                 f"    if (d < {upper}_MIN_DISTANCE_MM) d = {upper}_MIN_DISTANCE_MM;",
+                 f"    if (d > {upper}_MAX_DISTANCE_MM) d = {upper}_MAX_DISTANCE_MM;",
+                 "    *distance_mm = d;",
+                 f"    k = {prefix}_bucket[(d - {upper}_MIN_DISTANCE_MM) >> {upper}_BUCKET_SHIFT];",
+                 f"    if (k + 2 < {upper}_KNOTS && d >= {prefix}_distance_mm[k + 1]) k++;",
+                 "    return k;",
+                 "}",
+                 "",
+                 f"static inline int32_t {prefix}_interpolate(int32_t d, int k, int32_t v0, int32_t v1) {{",
+                 f"    int32_t d0 = {prefix}_distance_mm[k];",
+                 f"    return v0 + (v1 - v0) * (d - d0) / ({prefix}_distance_mm[k + 1] - d0);",
+                 "}",
+                 "",
+                 "/* Launcher pitch in 0.01 degree; distances outside the table use the nearest end. */",
+                 f"static inline int32_t {prefix}_pitch_cdeg_at(int32_t distance_mm) {{",
+                 f"    int k = {prefix}_segment(&distance_mm);",
+                 f"    return {prefix}_interpolate(distance_mm, k, {prefix}_pitch_cdeg[k],",
+                 f"                                {prefix}_pitch_cdeg[k + 1]);",
+                 "}",
+                 "",
+                 "/* Motor RPM; distances outside the table use the nearest end. */",
+                 f"static inline int32_t {prefix}_rpm_at(int32_t distance_mm) {{",
+                 f"    int k = {prefix}_segment(&distance_mm);",
+                 f"    return {prefix}_interpolate(distance_mm, k, {prefix}_rpm[k], {prefix}_rpm[k + 1]);",
+                 "}",
+                 "",
+                 f"#endif /* {guard} */"]
+        return "\n".join(lines) + "\n"
+
+    def save(self, path, name=None, package=None):
+        """按扩展名 (.java / .h / .bin) 写出，name 为 Java 类名或 C 标识符前缀，默认取文件名"""
+        kind = FIRMWARE_FORMATS.get(os.path.splitext(path)[1].lower())
+        if kind is None:
+            raise ValueError(f"Unknown firmware table format for {path}, use one of {', '.join(FIRMWARE_FORMATS)}")
+        # 默认名取文件名，替换掉不能出现在标识符中的字符
+        name = name or re.sub(r"\W", "_", os.path.splitext(os.path.basename(path))[0])
+        if kind == 'binary':
+            with open(path, "wb") as f:
+                f.write(self.to_bytes())
+            return
+        with open(path, "w", encoding="utf-8") as f:
+            f.write(self.to_java(name, package) if kind == 'java' else self.to_c(name))
+
+
+def _wrap_values(values, per_line=12):
+    items = [str(int(v)) for v in values]
+    return [", ".join(items[i:i + per_line]) for i in range(0, len(items), per_line)]
+
+
+def _java_array(values, java_type):
+    # Java 没有无符号类型: 超过有符号上限的值以强制转换写出，读取时 & 0xFF / 0xFFFF
+    limit = 127 if java_type == 'byte' else 32767
+    items = [str(v) if v <= limit else f"({java_type}) {v}" for v in np.asarray(values).tolist()]
+    rows = [", ".join(items[i:i + 12]) for i in range(0, len(items), 12)]
+    return "{\n        " + ",\n        ".join(rows) + "\n    }"
+
+
+def _c_array(values):
+    return "{\n    " + ",\n    ".join(_wrap_values(values)) + "\n}"
+
+
+def build_firmware_table(solver, min_distance_m, max_distance_m, pitch_tolerance_deg=0.25, rpm_tolerance=25.0,
+                         sample_step_m=0.005):
+    """采样静止方案曲线并选出满足误差上限的最少节点，返回 (FirmwareTable, (采样距离, 俯仰角, 转速))"""
+    distances, pitch, rpm = sample_curve(solver, max(min_distance_m, sample_step_m), max_distance_m, sample_step_m)
+    distance_mm = np.round(distances * DISTANCE_SCALE).astype(np.int64)
+    pitch_fixed = np.round(pitch * PITCH_SCALE).astype(np.int64)
+    rpm_fixed = np.round(rpm * RPM_SCALE).astype(np.int64)
+    if distance_mm[-1] > 0xFFFF or rpm_fixed.max() > 0xFFFF or np.abs(pitch_fixed).max() > 0x7FFF:
+        raise ValueError("Table values do not fit the 16-bit fixed-point format")
+
+    # 误差上限换算为定点单位，扣除插值结果向零取整的 1 个单位
+    pitch_bound = pitch_tolerance_deg * PITCH_SCALE * _KNOT_ERROR_SHARE - 1
+    rpm_bound = rpm_tolerance * RPM_SCALE * _KNOT_ERROR_SHARE - 1
+    knots = place_knots(distance_mm, pitch_fixed, rpm_fixed, pitch * PITCH_SCALE, rpm * RPM_SCALE,
+                        pitch_bound, rpm_bound)
+    knot_mm = distance_mm[knots]
+    knot_pitch, knot_rpm = pitch_fixed[knots], rpm_fixed[knots]
+
+    # 求解器给出的最优俯仰角有约 0.1° 的噪声 (最优点附近发射器速度几乎不随俯仰角变化)，节点直接取采样值会把
+    # 噪声带进表里。节点位置确定后按分段线性最小二乘重新拟合节点值，取平均后的值在采样点上仍满足上限时采用
+    refit = [_refit_knots(distance_mm, knot_mm, true) for true in (pitch * PITCH_SCALE, rpm * RPM_SCALE)]
+    if all(np.abs(_interpolate_table(distance_mm, knot_mm, values) - true).max() <= bound
+           for values, true, bound in zip(refit, (pitch * PITCH_SCALE, rpm * RPM_SCALE),
+                                          (pitch_bound, rpm_bound))):
+        knot_pitch, knot_rpm = refit
+
+    # 机器人端用 32 位整数计算 (v1 - v0) * (d - d0)
+    spans = np.diff(knot_mm)
+    if max(np.abs(np.diff(knot_pitch) * spans).max(), np.abs(np.diff(knot_rpm) * spans).max()) >= 2 ** 31:
+        raise ValueError("Table intervals are too long for 32-bit interpolation, lower the tolerances")
+
+    # 桶宽取不超过最小节点间距的 2 的幂，保证每个桶里最多有一个节点
+    bucket_shift = int(math.floor(math.log2(int(spans.min()))))
+    offsets = np.arange(0, int(knot_mm[-1] - knot_mm[0]) + 1, 1 << bucket_shift)
+    bucket = np.searchsorted(knot_mm - knot_mm[0], offsets, side='right') - 1
+    bucket = np.minimum(bucket, len(knots) - 2)
+    table = FirmwareTable(
+        distance_mm=knot_mm.astype(np.uint16), pitch_cdeg=knot_pitch.astype(np.int16),
+        rpm=knot_rpm.astype(np.uint16),
+        bucket=bucket.astype(np.uint8 if len(knots) <= 0xFF else np.uint16), bucket_shift=bucket_shift,
+        digest=config_digest(solver.config), pitch_tolerance_deg=pitch_tolerance_deg, rpm_tolerance=rpm_tolerance)
+    return table, (distances, pitch, rpm)
+
+
+def uniform_knot_count(table, distances, pitch, rpm):
+    """同样的误差上限下均匀网格需要的节点数 (在相同的采样点上检查)，用于和自适应节点比较"""
+    pitch_bound = table.pitch_tolerance_deg * PITCH_SCALE * _KNOT_ERROR_SHARE - 1
+    rpm_bound = table.rpm_tolerance * RPM_SCALE * _KNOT_ERROR_SHARE - 1
+    distance_mm = np.round(distances * DISTANCE_SCALE)
+    for count in range(2, len(distances) + 1):
+        knot_mm = np.round(np.linspace(distance_mm[0], distance_mm[-1], count))
+        knot_pitch = np.round(np.interp(knot_mm, distance_mm, pitch) * PITCH_SCALE)
+        knot_rpm = np.round(np.interp(knot_mm, distance_mm, rpm) * RPM_SCALE)
+        if (np.abs(np.interp(distance_mm, knot_mm, knot_pitch) - pitch * PITCH_SCALE).max() <= pitch_bound
+                and np.abs(np.interp(distance_mm, knot_mm, knot_rpm) - rpm * RPM_SCALE).max() <= rpm_bound):
+            return count
+    return len(distances)
+
+
+def solver_jitter(samples):
+    """
+    相邻采样点的抖动: 每个采样值与两侧采样值平均值之差的 99% 分位数 (排除曲线拐点处的少数点)，
+    返回 (俯仰角 °, 转速)。它反映求解器自身的可重复性，比它更小的误差上限无法用完整求解验证。
+    """
+    _, pitch, rpm = samples
+    return tuple(float(np.percentile(np.abs(v[1:-1] - 0.5 * (v[:-2] + v[2:])), 99)) if len(v) > 2 else 0.0
+                 for v in (pitch, rpm))
+
+
+def verify(table, solver, points=1000, seed=None):
+    """
+    在表的距离范围内均匀随机取 points 个距离 (不与采样网格重合)，用完整求解器求解，
+    与按机器人端整数运算查表的结果比较。返回的字典中 'pitch_exceed' / 'rpm_exceed' 为超出误差上限的点数。
+    """
+    rng = np.random.default_rng(seed)
+    distances = np.sort(rng.uniform(table.distance_mm[0], table.distance_mm[-1], points)) / DISTANCE_SCALE
+    pitch_errors, rpm_errors = [], []
+    unsolved = 0
+    for d in distances.tolist():
+        expected = stationary_solution(solver, d)
+        if expected is None:
+            unsolved += 1
+            continue
+        pitch, rpm = table.lookup(d)
+        pitch_errors.append(abs(pitch - expected[0]))
+        rpm_errors.append(abs(rpm - expected[1]))
+    pitch_errors, rpm_errors = np.array(pitch_errors), np.array(rpm_errors)
+    return {
+        'points': points,
+        'unsolved': unsolved,
+        'pitch_max_error_deg': float(pitch_errors.max()) if pitch_errors.size else 0.0,
+        'pitch_p99_error_deg': float(np.percentile(pitch_errors, 99)) if pitch_errors.size else 0.0,
+        'rpm_max_error': float(rpm_errors.max()) if rpm_errors.size else 0.0,
+        'rpm_p99_error': float(np.percentile(rpm_errors, 99)) if rpm_errors.size else 0.0,
+        'pitch_exceed': int(np.sum(pitch_errors > table.pitch_tolerance_deg)),
+        'rpm_exceed': int(np.sum(rpm_errors > table.rpm_tolerance)),
+    }
+
+
+def format_report(table, report, samples=None):
+    """samples 为 build_firmware_table 返回的采样曲线，给出时同时报告均匀网格需要的节点数"""
+    lines = [f"Knots: {len(table)} ({table.byte_size} bytes with a {len(table.bucket)}-entry index), "
+             f"{table.distance_mm[0] / DISTANCE_SCALE:.3f} - {table.distance_mm[-1] / DISTANCE_SCALE:.3f} m"]
+    if samples is not None:
+        jitter_pitch, jitter_rpm = solver_jitter(samples)
+        lines += [f"Placed from {len(samples[0])} full solves; a uniform grid needs "
+                  f"{uniform_knot_count(table, *samples)} knots for the same bounds",
+                  f"Solver jitter between neighbouring samples (p99): pitch {jitter_pitch:.3f} deg, "
+                  f"RPM {jitter_rpm:.1f} (bounds below this cannot be verified)"]
+    lines += [f"Verification against {report['points']} full solves at random distances"
+              + (f" ({report['unsolved']} without a solution)" if report['unsolved'] else "") + ":",
+              f"  pitch  max {report['pitch_max_error_deg']:.3f} deg, p99 {report['pitch_p99_error_deg']:.3f} deg, "
+              f"bound {table.pitch_tolerance_deg} deg, {report['pitch_exceed']} over",
+              f"  RPM    max {report['rpm_max_error']:.1f}, p99 {report['rpm_p99_error']:.1f}, "
+              f"bound {table.rpm_tolerance}, {report['rpm_exceed']} over"]
+    return "\n".join(lines)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Export a compact fixed-point distance -> pitch/RPM table")
+    parser.add_argument("output", help="output file: .java (class), .h (C header) or .bin (binary blob)")
+    parser.add_argument("--name", default=None, help="Java class name or C identifier prefix (default: file name)")
+    parser.add_argument("--package", default=None, help="Java package")
+    parser.add_argument("--min-distance", type=float, default=0.0, help="meters (default 0)")
+    parser.add_argument("--max-distance", type=float, default=4.7, help="meters (default 4.7)")
+    parser.add_argument("--pitch-tolerance", type=float, default=0.25, help="max pitch error, deg (default 0.25)")
+    parser.add_argument("--rpm-tolerance", type=float, default=25.0, help="max motor RPM error (default 25)")
+    parser.add_argument("--sample-step", type=float, default=0.005, help="solver sampling step, m (default 0.005)")
+    parser.add_argument("--verify-points", type=int, default=1000, help="full solves for verification")
+    parser.add_argument("--seed", type=int, default=None, help="random seed for the verification distances")
+    parser.add_argument("--report", default=None, help="also write the verification report to this file")
+    args = parser.parse_args()
+
+    if os.path.splitext(args.output)[1].lower() not in FIRMWARE_FORMATS:
+        parser.error(f"output must end with one of {', '.join(FIRMWARE_FORMATS)}")
+    solver = BallisticSolver(SolverConfig())
+    start = time.perf_counter()
+    table, samples = build_firmware_table(solver, args.min_distance, args.max_distance, args.pitch_tolerance,
+                                          args.rpm_tolerance, args.sample_step)
+    table.save(args.output, args.name, args.package)
+    print(f"Built in {time.perf_counter() - start:.1f} s")
+    report = format_report(table, verify(table, solver, args.verify_points, args.seed), samples)
+    print(report)
+    if args.report:
+        with open(args.report, "w", encoding="utf-8") as f:
+            f.write(report + "\n")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,122 @@
+"""
+    整场可行性 / 所需速度热力图 (无 GUI 依赖)
+
+    把标准化场地 [0, 1] x [0, 1] 划分为 cells x cells 的网格，再按 tile_cells x tile_cells 分块，
+    每一块作为一个任务交给 ProcessPoolExecutor，完成的分块依次放入队列，界面可以边算边画。
+"""
+
+import math
+import multiprocessing
+import queue
+from concurrent.futures import ProcessPoolExecutor
+from dataclasses import dataclass
+
+import numpy as np
+
+from solver import BallisticSolver
+
+
+@dataclass
+class HeatmapTile:
+    """一个分块的计算结果。launcher_velocity 的形状为 (行, 列)，行从 y0 到 y1，无解处为 NaN"""
+    target: str
+    x0: float
+    y0: float
+    x1: float
+    y1: float
+    launcher_velocity: np.ndarray
+
+
+def compute_tile(config, target, target_xy, meters_per_unit, vehicle_speed_ms, vehicle_direction_deg,
+                 x_edges, y_edges):
+    """
+    求解一个分块内每个格子中心的发射方案 (在工作进程中运行)。
+
+    格子按蛇形顺序遍历，每个格子都用相邻格子的方案热启动。
+    """
+    solver = BallisticSolver(config)
+    rows, cols = len(y_edges) - 1, len(x_edges) - 1
+    launcher_velocity = np.full((rows, cols), np.nan)
+    previous_solution = None
+    for row in range(rows):
+        y = 0.5 * (y_edges[row] + y_edges[row + 1])
+        col_order = range(cols) if row % 2 == 0 else range(cols - 1, -1, -1)
+        for col in col_order:
+            x = 0.5 * (x_edges[col] + x_edges[col + 1])
+            dx, dy = target_xy[0] - x, target_xy[1] - y
+            solution = solver.find_launch_solution({
+                'distance_m': math.hypot(dx, dy) * meters_per_unit,
+                'vehicle_speed_ms': vehicle_speed_ms,
+                'vehicle_direction_deg': vehicle_direction_deg,
+                'target_direction_deg': math.degrees(math.atan2(dy, dx)),
+            }, warm_start=previous_solution)
+            if solution is not None:
+                launcher_velocity[row, col] = solution['launcher_velocity']
+                previous_solution = solution
+    return HeatmapTile(target, x_edges[0], y_edges[0], x_edges[-1], y_edges[-1], launcher_velocity)
+
+
+class HeatmapJob:
+    """
+    在进程池上计算一个或多个目标的整场热力图。
+
+    targets 为 {名称: 标准化坐标}。start() 之后，完成的 HeatmapTile 会被放入 tiles 队列
+    (由进程池的内部线程放入，调用方在自己的线程中取出)。
+    """
+
+    def __init__(self, config, targets, meters_per_unit, vehicle_speed_ms=0.0, vehicle_direction_deg=0.0,
+                 cells=48, tile_cells=8, max_workers=None):
+        self.config = config
+        self.targets = dict(targets)
+        self.meters_per_unit = meters_per_unit
+        self.vehicle_speed_ms = vehicle_speed_ms
+        self.vehicle_direction_deg = vehicle_direction_deg
+        self.cells = cells
+        self.tile_cells = tile_cells
+        self.max_workers = max_workers
+        self.tiles = queue.Queue()
+        self.total = 0
+        self.completed = 0
+        self.failed = 0
+        self.cancelled = False
+        self._executor = None
+
+    def start(self):
+        edges = np.linspace(0.0, 1.0, self.cells + 1).tolist()
+        bounds = [edges[i:i + self.tile_cells + 1] for i in range(0, self.cells, self.tile_cells)]
+        # 用 spawn 启动工作进程: 界面进程中有 Tk 和其他线程，fork 并不安全
+        self._executor = ProcessPoolExecutor(max_workers=self.max_workers,
+                                             mp_context=multiprocessing.get_context("spawn"))
+        futures = []
+        for target, target_xy in self.targets.items():
+            for y_edges in bounds:
+                for x_edges in bounds:
+                    futures.append(self._executor.submit(
+                        compute_tile, self.config, target, tuple(target_xy), self.meters_per_unit,
+                        self.vehicle_speed_ms, self.vehicle_direction_deg, x_edges, y_edges))
+        self.total = len(futures)
+        for future in futures:
+            future.add_done_callback(self._on_done)
+        # 任务提交完毕后即可关闭进程池，已提交的任务仍会执行完
+        self._executor.shutdown(wait=False)
+
+    def _on_done(self, future):
+        if self.cancelled or future.cancelled():
+            return
+        if future.exception() is not None:
+            self.failed += 1
+            print(f"Error in heatmap worker: {future.exception()}")
+            return
+        # 先放入队列再计数，调用方看到 done 时所有分块都已经可以取出
+        self.tiles.put(future.result())
+        self.completed += 1
+
+    @property
+    def done(self):
+        return self._executor is not None and self.completed + self.failed >= self.total
+
+    def cancel(self):
+        """取消尚未开始的分块，正在计算的分块会完成，但结果不再放入队列"""
+        self.cancelled = True
+        if self._executor is not None:
+            self._executor.shutdown(wait=False, cancel_futures=True)
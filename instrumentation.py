@@ -0,0 +1,146 @@
+"""
+    热路径计时与计数 (无 GUI 依赖)
+
+    每个指标保留最近 window 个样本，随时可以取出 p50/p95/p99；也可以把每条记录追加到 JSON-lines 日志中。
+    未启用时 timer() 返回一个共享的空上下文，调用方只需在计算额外数据前检查 enabled，开销可以忽略。
+"""
+
+import functools
+import json
+import threading
+import time
+from collections import deque
+
+import numpy as np
+
+from ballistics import DERIVATIVE_EVALUATIONS_PER_STEP
+
+
+class _NullTimer:
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        return False
+
+
+_NULL_TIMER = _NullTimer()
+
+
+class _Timer:
+    def __init__(self, instrumentation, event):
+        self.instrumentation = instrumentation
+        self.event = event
+
+    def __enter__(self):
+        self.start = time.perf_counter()
+        return self
+
+    def __exit__(self, *exc_info):
+        self.instrumentation.record(self.event, {f'{self.event}_ms': (time.perf_counter() - self.start) * 1000})
+        return False
+
+
+def timed(event):
+    """方法装饰器: 以 self.instrumentation 记录方法耗时 (event_ms)"""
+    def decorator(method):
+        @functools.wraps(method)
+        def wrapper(self, *args, **kwargs):
+            with self.instrumentation.timer(event):
+                return method(self, *args, **kwargs)
+        return wrapper
+    return decorator
+
+
+def solver_counters(solver):
+    """BallisticSolver 的累计计数快照，两次快照相减即为期间的计算量"""
+    return (solver.simulation_count, solver.derivative_evaluations, solver.bracket_sweeps, solver.root_iterations)
+
+
+def solve_counters(solver, before):
+    """把 solver_counters 快照之间的差值整理为一条记录"""
+    simulations, evaluations, sweeps, iterations = (now - then for now, then in zip(solver_counters(solver), before))
+    return {
+        'simulations': simulations,
+        'integration_steps': evaluations / DERIVATIVE_EVALUATIONS_PER_STEP[solver.config.INTEGRATOR],
+        'bracket_sweeps': sweeps,
+        'root_iterations': iterations,
+    }
+
+
+class Instrumentation:
+    """线程安全的滚动指标集合，默认不启用"""
+
+    def __init__(self, window=500):
+        self.window = window
+        self.enabled = False
+        self._metrics = {}  # 指标名 -> 最近的样本
+        self._log = None
+        self._lock = threading.Lock()
+
+    @property
+    def logging(self):
+        return self._log is not None
+
+    def enable(self):
+        self.enabled = True
+
+    def disable(self):
+        """停止采集 (同时关闭日志)，已有样本保留"""
+        self.enabled = False
+        self.stop_log()
+
+    def start_log(self, path):
+        """把之后的每条记录以 JSON-lines 追加到 path，并启用采集"""
+        log = open(path, "a", encoding="utf-8")
+        with self._lock:
+            if self._log is not None:
+                self._log.close()
+            self._log = log
+        self.enabled = True
+
+    def stop_log(self):
+        with self._lock:
+            if self._log is not None:
+                self._log.close()
+                self._log = None
+
+    def reset(self):
+        with self._lock:
+            self._metrics.clear()
+
+    def timer(self, event):
+        """with instrumentation.timer('update_plot'): ... 记录 update_plot_ms"""
+        return _Timer(self, event) if self.enabled else _NULL_TIMER
+
+    def record(self, event, values):
+        """记录一个事件: values 中的每个数值加入同名指标，日志中写入 {'t', 'event', **values}"""
+        if not self.enabled:
+            return
+        with self._lock:
+            for name, value in values.items():
+                if isinstance(value, (int, float)) and not isinstance(value, bool):
+                    metric = self._metrics.get(name)
+                    if metric is None:
+                        metric = self._metrics[name] = deque(maxlen=self.window)
+                    metric.append(value)
+            if self._log is not None:
+                self._log.write(json.dumps({'t': time.time(), 'event': event, **values}) + "\n")
+                self._log.flush()
+
+    def summary(self):
+        """{指标名: {'count', 'p50', 'p95', 'p99'}}，按指标名排序"""
+        with self._lock:
+            samples = {name: np.array(metric) for name, metric in self._metrics.items()}
+        summary = {}
+        for name in sorted(samples):
+            p50, p95, p99 = np.percentile(samples[name], (50, 95, 99))
+            summary[name] = {'count': samples[name].size, 'p50': float(p50), 'p95': float(p95), 'p99': float(p99)}
+        return summary
+
+    def format_summary(self):
+        lines = [f"{'metric':<22}{'n':>6}{'p50':>10}{'p95':>10}{'p99':>10}"]
+        for name, stats in self.summary().items():
+            lines.append(f"{name:<22}{stats['count']:>6}"
+                         f"{stats['p50']:>10.3g}{stats['p95']:>10.3g}{stats['p99']:>10.3g}")
+        return "\n".join(lines)
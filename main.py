@@ -2,21 +2,38 @@
     注释由 Gemini 2.5 Pro 提供
 """
 
+import time
+
+# 启动计时的起点: 尽量早，包含下面各模块的导入时间
+_PROCESS_START = time.perf_counter()
+
 import tkinter as tk
 from tkinter import font as tkFont
 from tkinter import messagebox  # <--- 新增/修改
+from tkinter import filedialog
 import numpy as np
 import math
 import threading
 import queue
+import dataclasses
+
+from field_image import load_field_image
+from firing_table import FiringTable, solver_constants
+from firmware_table import build_firmware_table, format_report, verify
+from heatmap import HeatmapJob
+from shot_schedule import load_path, solve_schedule, format_windows
+from instrumentation import Instrumentation, solver_counters, solve_counters, timed
+from dispersion import analyze_dispersion, format_dispersion
+from solution_cache import SolutionCache
+from solution_store import SolutionStore
+from solver import (BallisticSolver, SolverConfig, SolveCancelled, INTEGRATOR_CHOICES, QUALITY_NAMES,
+                    QUALITY_REFINED)
 
 from PIL import Image, ImageTk
 
-import matplotlib
+# Matplotlib 导入较慢，第一次显示轨迹图时才导入 (见 FieldViewerApp.ensure_plot)
 
-matplotlib.use("TkAgg")
-from matplotlib.figure import Figure
-from matplotlib.backends.backend_tkagg import FigureCanvasTkAgg
+_IMPORTS_DONE = time.perf_counter()
 
 # --- 常量定义 ---
 
@@ -28,6 +45,8 @@ FIELD_SIZE = 1.0  # 标准化场地尺寸，用于内部计算
 NORMALIZED_PANEL_LENGTH = REAL_PANEL_LENGTH / REAL_FIELD_SIZE  # 标准化斜板长度
 ANGLE_WITH_SIDE_WALL_DEG = 54.046000  # 斜板与侧墙的夹角 (度)
 INCHES_TO_METERS = 0.0254  # 英寸到米的转换系数
+FIELD_IMAGE_PATH = "ttt.jpg"  # 场地背景图
+FIELD_IMAGE_ALPHA = int(255 * (1.0 - 0.7))  # 背景图的透明度
 
 
 class PreferencesWindow(tk.Toplevel):  # <--- 新增/修改 (整个类)
@@ -38,11 +57,12 @@ class PreferencesWindow(tk.Toplevel):  # <--- 新增/修改 (整个类)
         self.app = app_instance
         self.transient(master)  # 使窗口显示在主窗口之上
         self.title("Preferences")
-        self.geometry("450x650")
+        self.geometry("450x770")
         self.resizable(False, False)
 
         # 用于存储与输入框关联的Tkinter变量
         self.vars = {}
+        config = self.app.solver_config
 
         main_frame = tk.Frame(self, padx=10, pady=10)
         main_frame.pack(fill=tk.BOTH, expand=True)
@@ -50,34 +70,39 @@ class PreferencesWindow(tk.Toplevel):  # <--- 新增/修改 (整个类)
         # --- 物理常量 ---
         physics_frame = tk.LabelFrame(main_frame, text="Physics Constants", padx=10, pady=10)
         physics_frame.pack(fill=tk.X, pady=5)
-        self.create_entry(physics_frame, "Gravity (m/s^2)", "GRAVITY_MS2", self.app.GRAVITY_MS2)
-        self.create_entry(physics_frame, "Air Density (kg/m^3)", "AIR_DENSITY", self.app.AIR_DENSITY)
-        self.create_entry(physics_frame, "Target Height (m)", "HEIGHT_M", self.app.HEIGHT_M)
-        self.create_entry(physics_frame, "Projectile Mass (kg)", "MASS_KG", self.app.MASS_KG)
-        self.create_entry(physics_frame, "Drag Coefficient", "DRAG_COEFFICIENT", self.app.DRAG_COEFFICIENT)
+        self.create_entry(physics_frame, "Gravity (m/s^2)", "GRAVITY_MS2", config.GRAVITY_MS2)
+        self.create_entry(physics_frame, "Air Density (kg/m^3)", "AIR_DENSITY", config.AIR_DENSITY)
+        self.create_entry(physics_frame, "Target Height (m)", "HEIGHT_M", config.HEIGHT_M)
+        self.create_entry(physics_frame, "Projectile Mass (kg)", "MASS_KG", config.MASS_KG)
+        self.create_entry(physics_frame, "Drag Coefficient", "DRAG_COEFFICIENT", config.DRAG_COEFFICIENT)
         self.create_entry(physics_frame, "Cross Section (m^2)", "CROSS_SECTIONAL_AREA_M2",
-                          self.app.CROSS_SECTIONAL_AREA_M2)
+                          config.CROSS_SECTIONAL_AREA_M2)
 
         # --- 计算参数 ---
         calc_frame = tk.LabelFrame(main_frame, text="Calculation Parameters", padx=10, pady=10)
         calc_frame.pack(fill=tk.X, pady=5)
-        self.create_entry(calc_frame, "Min Search Angle (deg)", "MIN_ANGLE_DEG", self.app.MIN_ANGLE_DEG)
-        self.create_entry(calc_frame, "Max Search Angle (deg)", "MAX_ANGLE_DEG", self.app.MAX_ANGLE_DEG)
-        self.create_entry(calc_frame, "Angle Search Step (deg)", "ANGLE_SEARCH_STEP", self.app.ANGLE_SEARCH_STEP)
-        self.create_entry(calc_frame, "Velocity Search Step (m/s)", "VELOCITY_SEARCH_STEP",
-                          self.app.VELOCITY_SEARCH_STEP)
-        self.create_entry(calc_frame, "Max Velocity Tries", "MAX_VELOCITY_TRIES", self.app.MAX_VELOCITY_TRIES)
-        self.create_entry(calc_frame, "Bisection Iterations", "BISECTION_ITERATIONS", self.app.BISECTION_ITERATIONS)
-        self.create_entry(calc_frame, "Hit Tolerance (m)", "HIT_TOLERANCE_M", self.app.HIT_TOLERANCE_M)
-        self.create_entry(calc_frame, "Simulation Timestep (s)", "TIME_STEP_S", self.app.TIME_STEP_S)
+        self.create_entry(calc_frame, "Min Search Angle (deg)", "MIN_ANGLE_DEG", config.MIN_ANGLE_DEG)
+        self.create_entry(calc_frame, "Max Search Angle (deg)", "MAX_ANGLE_DEG", config.MAX_ANGLE_DEG)
+        self.create_entry(calc_frame, "Coarse Pitch Samples", "COARSE_PITCH_SAMPLES", config.COARSE_PITCH_SAMPLES)
+        self.create_entry(calc_frame, "Pitch Tolerance (deg)", "PITCH_TOLERANCE_DEG", config.PITCH_TOLERANCE_DEG)
+        self.create_entry(calc_frame, "Bracket Growth Factor", "BRACKET_GROWTH_FACTOR", config.BRACKET_GROWTH_FACTOR)
+        self.create_entry(calc_frame, "Max Velocity (m/s)", "MAX_VELOCITY_MS", config.MAX_VELOCITY_MS)
+        self.create_entry(calc_frame, "Root Height Tolerance (m)", "ROOT_HEIGHT_TOLERANCE_M",
+                          config.ROOT_HEIGHT_TOLERANCE_M)
+        self.create_entry(calc_frame, "Max Root Iterations", "MAX_ROOT_ITERATIONS", config.MAX_ROOT_ITERATIONS)
+        self.create_entry(calc_frame, "Hit Tolerance (m)", "HIT_TOLERANCE_M", config.HIT_TOLERANCE_M)
+        self.create_entry(calc_frame, "Simulation Timestep (s)", "TIME_STEP_S", config.TIME_STEP_S)
+        self.create_choice(calc_frame, "Integrator", "INTEGRATOR", config.INTEGRATOR, INTEGRATOR_CHOICES)
+        self.create_entry(calc_frame, "Integration Tolerance (m)", "INTEGRATION_TOLERANCE_M",
+                          config.INTEGRATION_TOLERANCE_M)
 
         # --- 发射器硬件 ---
         hardware_frame = tk.LabelFrame(main_frame, text="Launcher Hardware Constants", padx=10, pady=10)
         hardware_frame.pack(fill=tk.X, pady=5)
         self.create_entry(hardware_frame, "Motor RPM Loss Factor (%)", "MOTOR_RPM_LOSS_FACTOR_PERCENT",
-                          self.app.MOTOR_RPM_LOSS_FACTOR_PERCENT)
+                          config.MOTOR_RPM_LOSS_FACTOR_PERCENT)
         self.create_entry(hardware_frame, "Friction Wheel Diameter (m)", "FRICTION_WHEEL_DIAMETER_M",
-                          self.app.FRICTION_WHEEL_DIAMETER_M)
+                          config.FRICTION_WHEEL_DIAMETER_M)
 
         # --- 按钮 ---
         button_frame = tk.Frame(main_frame)
@@ -96,18 +121,30 @@ class PreferencesWindow(tk.Toplevel):  # <--- 新增/修改 (整个类)
         self.vars[attr_name] = var
         tk.Entry(frame, textvariable=var).pack(side=tk.RIGHT, fill=tk.X, expand=True)
 
+    def create_choice(self, parent, label_text, attr_name, current_value, choices):
+        """辅助函数，用于创建标签和下拉选择框对"""
+        frame = tk.Frame(parent)
+        frame.pack(fill=tk.X, pady=2)
+        tk.Label(frame, text=label_text, width=25, anchor='w').pack(side=tk.LEFT)
+        var = tk.StringVar(value=current_value)
+        self.vars[attr_name] = var
+        tk.OptionMenu(frame, var, *choices).pack(side=tk.RIGHT, fill=tk.X, expand=True)
+
     def save_and_close(self):
         """保存更改并关闭窗口"""
         try:
+            changes = {}
             for attr_name, var in self.vars.items():
-                # 根据属性名称获取原始类型（整数或浮点数）
-                original_value = getattr(self.app, attr_name)
-                if isinstance(original_value, int):
-                    new_value = int(var.get())
+                # 根据属性名称获取原始类型（字符串、整数或浮点数）
+                original_value = getattr(self.app.solver_config, attr_name)
+                if isinstance(original_value, str):
+                    changes[attr_name] = var.get()
+                elif isinstance(original_value, int):
+                    changes[attr_name] = int(var.get())
                 else:
-                    new_value = float(var.get())
-                # 更新主应用实例中的属性
-                setattr(self.app, attr_name, new_value)
+                    changes[attr_name] = float(var.get())
+            # 配置是不可变的，用修改后的值生成新配置并交给主应用
+            self.app.apply_solver_config(dataclasses.replace(self.app.solver_config, **changes))
             self.destroy()
         except ValueError:
             messagebox.showerror("Invalid Input", "Please ensure all values are valid numbers.", parent=self)
@@ -115,24 +152,91 @@ class PreferencesWindow(tk.Toplevel):  # <--- 新增/修改 (整个类)
             messagebox.showerror("Error", f"An unexpected error occurred: {e}", parent=self)
 
 
+class PerformanceWindow(tk.Toplevel):
+    """实时显示各项计时和计数的滚动分位数，窗口打开期间启用采集"""
+
+    REFRESH_MS = 500
+
+    def __init__(self, master, app_instance):
+        super().__init__(master)
+        self.app = app_instance
+        self.title("Performance Monitor")
+        self.resizable(False, False)
+        self.app.instrumentation.enable()
+
+        self.summary_label = tk.Label(self, font=("Consolas", 10), justify=tk.LEFT, anchor='nw', padx=10, pady=10)
+        self.summary_label.pack(fill=tk.BOTH, expand=True)
+        button_frame = tk.Frame(self, padx=10, pady=5)
+        button_frame.pack(fill=tk.X)
+        tk.Button(button_frame, text="Close", command=self.close).pack(side=tk.RIGHT, padx=5)
+        tk.Button(button_frame, text="Reset", command=self.app.instrumentation.reset).pack(side=tk.RIGHT)
+        self.protocol("WM_DELETE_WINDOW", self.close)
+        self.refresh()
+
+    def refresh(self):
+        startup = ", ".join(f"{name} {value:.0f}" for name, value in self.app.startup_timings.items()
+                            if name.endswith("_ms"))
+        self.summary_label.config(text=f"startup (ms): {startup}\n\n{self.app.instrumentation.format_summary()}")
+        self.refresh_after_id = self.after(self.REFRESH_MS, self.refresh)
+
+    def close(self):
+        # 取消已排定的下一次刷新，窗口销毁后不再回调
+        self.after_cancel(self.refresh_after_id)
+        # 仍在写日志时继续采集
+        if not self.app.instrumentation.logging:
+            self.app.instrumentation.disable()
+        self.app.performance_window = None
+        self.destroy()
+
+
 class FieldViewerApp:
+    FIRMWARE_VERIFY_POINTS = 300  # 导出固件查表后用于验证的完整求解次数
+
     def __init__(self, root):
         self.root = root
         self.root.title("The Archer | Powered by 27570")
         self.root.geometry("1280x720")
         self.root.resizable(False, False)
+        self.startup_timings = {'imports_ms': (_IMPORTS_DONE - _PROCESS_START) * 1000}
 
         # --- 将可配置常量移至实例属性 --- # <--- 新增/修改
+        # 内存缓存之后接磁盘方案存储，重新启动程序或批量任务算过的位置可以直接命中
+        self.solution_cache = SolutionCache(store=SolutionStore())
         self.load_configurable_constants()
 
         # --- UI 界面常量 (固定) ---
         self.CANVAS_SIZE_PX = 680
         self.RIGHT_PANEL_WIDTH = 570
         self.PADDING_PX = 20
+        self.PLOT_MAX_FPS = 30  # 轨迹图的最高重绘频率
+        self.PLOT_LIMIT_STEP_M = 0.5  # 轨迹图坐标范围的取整步长
+        self.PLOT_PATH_POINTS = self.RIGHT_PANEL_WIDTH  # 轨迹路径抽稀到绘图区域的像素宽度
+        self.DISPERSION_SAMPLES = 1000  # 实时散布分析每次积分的扰动弹道数
+        self.DISPERSION_IDLE_S = 0.05  # 最终方案送出后这么久没有新请求才开始散布分析 (拖动时不分析)
 
         # 设置用于线程通信的队列
         self.calc_queue = queue.Queue(maxsize=1)
-        self.result_queue = queue.Queue()
+        # 工作线程只保留最新的结果，并在结果放入时通过 <<SolutionReady>> 虚拟事件唤醒界面线程
+        self.latest_result = None
+        self.result_event_pending = False
+        self.result_lock = threading.Lock()
+        # 只有线程化的 Tcl 才能在工作线程中发出事件，否则退回定时轮询
+        self.result_events = self.root.tk.eval("info exists tcl_platform(threaded)") == "1"
+        if self.result_events:
+            self.root.bind("<<SolutionReady>>", self.process_results)
+        else:
+            self.root.after(30, self.poll_results)
+        self.pending_input_at = None  # 尚未发出求解请求的最早一次输入的时刻 (仅在采集性能数据时记录)
+        # 请求序号: 每出现一组新的计算参数就加一，工作线程发现序号变化时放弃正在进行的求解
+        self.request_generation = 0
+        self.last_request_params = None
+        # 渐进求解: 完整求解结束前先显示粗略方案和俯仰角区间中的最好采样点 (控制面板中的复选框可以关闭)
+        self.progressive_results = True
+        # 实时散布分析: 最终方案显示后再计算命中概率 (Tools 菜单中开关)
+        self.dispersion_enabled = True
+        # 性能计时与计数，默认关闭 (Tools → Performance Monitor / Instrumentation Log 启用)
+        self.instrumentation = Instrumentation()
+        self.performance_window = None
 
         self.worker_thread = threading.Thread(target=self.calculation_worker, daemon=True)
         self.worker_thread.start()
@@ -140,6 +244,17 @@ class FieldViewerApp:
         self.last_solution = None
         self.last_calc_params = {}
         self.last_path = ([], [])
+        self.last_dispersion = None
+        self.firing_table = None
+
+        # 热力图: 计算任务、已收到的分块及其图像 (PhotoImage 必须保留引用，否则会被回收)
+        self.heatmap_job = None
+        self.heatmap_tiles = []
+        self.heatmap_images = []
+        self.heatmap_range = None
+        self.heatmap_legend_item = self.heatmap_legend_text = None
+        # 正在后台线程中运行的耗时菜单操作 (名称)，同一操作结束前不重复启动
+        self.background_tasks = set()
 
         # --- 创建菜单栏 --- # <--- 新增/修改
         self.menu_bar = tk.Menu(root)
@@ -147,6 +262,28 @@ class FieldViewerApp:
         self.edit_menu = tk.Menu(self.menu_bar, tearoff=0)
         self.menu_bar.add_cascade(label="Edit", menu=self.edit_menu)
         self.edit_menu.add_command(label="Preferences...", command=self.open_preferences)
+        self.tools_menu = tk.Menu(self.menu_bar, tearoff=0)
+        self.menu_bar.add_cascade(label="Tools", menu=self.tools_menu)
+        self.tools_menu.add_command(label="Build Firing Table...", command=self.build_firing_table)
+        self.tools_menu.add_command(label="Load Firing Table...", command=self.load_firing_table)
+        self.tools_menu.add_command(label="Unload Firing Table", command=self.unload_firing_table)
+        self.tools_menu.add_command(label="Export Firmware Table...", command=self.export_firmware_table)
+        self.tools_menu.add_separator()
+        self.tools_menu.add_command(label="Compute Field Heatmap", command=self.start_heatmap)
+        self.tools_menu.add_command(label="Clear Field Heatmap", command=self.clear_heatmap)
+        self.tools_menu.add_separator()
+        self.tools_menu.add_command(label="Plan Shots Along Path...", command=self.plan_shot_path)
+        self.tools_menu.add_command(label="Clear Shot Path", command=self.clear_shot_path)
+        self.tools_menu.add_separator()
+        self.dispersion_var = tk.BooleanVar(value=self.dispersion_enabled)
+        self.tools_menu.add_checkbutton(label="Live Dispersion Analysis", variable=self.dispersion_var,
+                                        command=self.on_toggle_dispersion)
+        self.tools_menu.add_command(label="Dispersion Report...", command=self.show_dispersion_report)
+        self.tools_menu.add_separator()
+        self.tools_menu.add_command(label="Solution Cache Statistics...", command=self.show_cache_stats)
+        self.tools_menu.add_command(label="Performance Monitor...", command=self.open_performance_monitor)
+        self.tools_menu.add_command(label="Start Instrumentation Log...", command=self.start_instrumentation_log)
+        self.tools_menu.add_command(label="Stop Instrumentation Log", command=self.stop_instrumentation_log)
         # --- 菜单栏创建结束 ---
 
         # --- UI 布局 ---
@@ -163,14 +300,15 @@ class FieldViewerApp:
         self.controls_frame = tk.Frame(right_panel)
         self.controls_frame.pack(side=tk.TOP, fill=tk.X, padx=10, pady=5)
 
-        plot_frame = tk.Frame(right_panel)
-        plot_frame.pack(side=tk.BOTTOM, fill=tk.BOTH, expand=True)
-
-        self.fig = Figure(dpi=100)
-        self.ax = self.fig.add_subplot(111)
-        self.plot_canvas = FigureCanvasTkAgg(self.fig, master=plot_frame)
-        self.plot_canvas.get_tk_widget().pack(side=tk.TOP, fill=tk.BOTH, expand=True)
+        self.plot_frame = tk.Frame(right_panel)
+        self.plot_frame.pack(side=tk.BOTTOM, fill=tk.BOTH, expand=True)
+        # 轨迹图在第一次需要显示时才创建，此前显示占位文字
+        self.fig = self.ax = self.plot_canvas = None
+        self.plot_placeholder = tk.Label(self.plot_frame, text="Trajectory plot loads with the first solution",
+                                         fg="gray")
+        self.plot_placeholder.pack(side=tk.TOP, fill=tk.BOTH, expand=True)
 
+        self.label_texts = {}  # 标签 -> 当前显示的文字，见 set_label_text
         self.title_font = tkFont.Font(family="Arial", size=12, weight="bold")
         self.label_font = tkFont.Font(family="Consolas", size=10)
         self.bold_label_font = tkFont.Font(family="Consolas", size=11, weight="bold")
@@ -179,63 +317,389 @@ class FieldViewerApp:
         self.setup_controls()
 
         self.field_bg_image = None
+        image_start = time.perf_counter()
         try:
             draw_size = self.CANVAS_SIZE_PX - 2 * self.PADDING_PX
-            original_image = Image.open("ttt.jpg")
-            image_with_alpha = original_image.convert("RGBA")
-            pixel_data = image_with_alpha.getdata()
-            new_pixel_data = []
-            alpha_value = int(255 * (1.0 - 0.7))
-            for item in pixel_data:
-                new_pixel_data.append((item[0], item[1], item[2], alpha_value))
-            image_with_alpha.putdata(new_pixel_data)
-            resized_image = image_with_alpha.resize((draw_size, draw_size), Image.Resampling.LANCZOS)
-            self.field_bg_image = ImageTk.PhotoImage(resized_image)
+            field_image, cache_hit = load_field_image(FIELD_IMAGE_PATH, draw_size, FIELD_IMAGE_ALPHA)
+            self.field_bg_image = ImageTk.PhotoImage(field_image)
+            self.startup_timings['field_image_cached'] = cache_hit
         except FileNotFoundError:
             print("Warning: 'ttt.jpg' not found. Using a white background.")
         except Exception as e:
             print(f"Error loading background image: {e}")
+        self.startup_timings['field_image_ms'] = (time.perf_counter() - image_start) * 1000
 
         self.drag_pos_x, self.drag_pos_y = 0.5, 0.5
         self.calculate_geometry()
         self.draw_static_field()
+        # 交互元素只创建一次，之后移动已有的画布元素；鼠标事件合并到空闲时处理
+        self.interactive_items = {}
+        self.interactive_visible = {'motion': False, 'heading': False}
+        self.interactive_target_color = None
+        self.interactive_redraw_id = None
+        self.create_interactive_items()
         self.draw_interactive_elements()
 
-        self.root.after(30, self.process_results)
         self.canvas.bind("<Button-1>", self.on_mouse_action)
         self.canvas.bind("<B1-Motion>", self.on_mouse_action)
+        self.startup_timings['init_ms'] = (time.perf_counter() - _PROCESS_START) * 1000
+        self.root.after_idle(self.on_first_frame)
+
+    def on_first_frame(self):
+        """事件循环第一次空闲时窗口已经画出并可以响应输入，记录启动耗时"""
+        self.root.update_idletasks()
+        timings = self.startup_timings
+        timings['first_frame_ms'] = (time.perf_counter() - _PROCESS_START) * 1000
+        print(f"Startup: first interactive frame after {timings['first_frame_ms']:.0f} ms "
+              f"(imports {timings['imports_ms']:.0f} ms, field image {timings['field_image_ms']:.0f} ms"
+              f"{', cached' if timings.get('field_image_cached') else ''})")
+        self.instrumentation.record('startup', dict(timings))
+        # 主循环启动前完成的求解无法发出事件，在这里补上
+        self.process_results()
+
+    def ensure_plot(self):
+        """第一次显示轨迹图时导入 Matplotlib 并创建图表"""
+        if self.plot_canvas is not None:
+            return
+        plot_start = time.perf_counter()
+        import matplotlib
+        matplotlib.use("TkAgg")
+        from matplotlib.figure import Figure
+        from matplotlib.backends.backend_tkagg import FigureCanvasTkAgg
+
+        self.plot_placeholder.destroy()
+        self.fig = Figure(dpi=100)
+        self.ax = self.fig.add_subplot(111)
+        self.plot_canvas = FigureCanvasTkAgg(self.fig, master=self.plot_frame)
+        self.plot_canvas.get_tk_widget().pack(side=tk.TOP, fill=tk.BOTH, expand=True)
+        self.create_plot_artists()
+        self.startup_timings['plot_init_ms'] = (time.perf_counter() - plot_start) * 1000
 
     def load_configurable_constants(self):  # <--- 新增/修改 (整个方法)
-        """将所有可配置的常量加载为实例属性"""
-        # --- 物理常量 ---
-        self.GRAVITY_MS2 = 9.81
-        self.AIR_DENSITY = 1.225
-        self.HEIGHT_M = 1.065
-        self.MASS_KG = 0.012
-        self.DRAG_COEFFICIENT = 0.25
-        self.CROSS_SECTIONAL_AREA_M2 = 0.00928
-
-        # --- 计算参数 ---
-        self.MIN_ANGLE_DEG = 55.0
-        self.MAX_ANGLE_DEG = 90.0
-        self.ANGLE_SEARCH_STEP = 1.0
-        self.VELOCITY_SEARCH_STEP = 0.1
-        self.MAX_VELOCITY_TRIES = 500
-        self.BISECTION_ITERATIONS = 8
-        self.HIT_TOLERANCE_M = 0.055
-        self.TIME_STEP_S = 0.006
-
-        # --- 发射器硬件常量 ---
-        self.MOTOR_RPM_LOSS_FACTOR_PERCENT = 55
-        self.FRICTION_WHEEL_DIAMETER_M = 0.072
+        """加载默认的可配置常量，并创建对应的解算器"""
+        self.apply_solver_config(SolverConfig())
+
+    def apply_solver_config(self, config):
+        """切换到新的常量配置。解算器是不可变的，工作线程下一次取任务时就会使用新的实例"""
+        self.solver_config = config
+        self.solver = BallisticSolver(config)
+        # 只删除受影响的缓存条目: 只改了发射器硬件常量时缓存的方案仍然有效
+        self.solution_cache.invalidate(config)
+        # 热力图是用旧常量算出的
+        if getattr(self, 'heatmap_job', None):
+            self.clear_heatmap()
 
     def open_preferences(self):  # <--- 新增/修改
         """打开首选项配置窗口"""
         prefs_window = PreferencesWindow(self.root, self)
         # 等待首选项窗口关闭后，重新触发一次计算，以应用新的常量
         self.root.wait_window(prefs_window)
+        if self.firing_table and not self.firing_table.matches(solver_constants(self.solver_config)):
+            self.firing_table = None
+            messagebox.showinfo("Firing Table", "Constants changed, the loaded firing table was unloaded.",
+                                parent=self.root)
+        self.resolve_current_position()
+
+    def resolve_current_position(self):
+        """常量或射表改变后，即使位置没变也重新求解当前位置"""
+        self.last_request_params = None
         self.draw_interactive_elements()
 
+    def field_distance_range_m(self):
+        """场地内任意位置到两个目标点的距离范围 (米)，用于确定射表的覆盖范围"""
+        corners = [np.array(c) for c in ((0.0, 0.0), (1.0, 0.0), (0.0, 1.0), (1.0, 1.0))]
+        max_norm = max(np.linalg.norm(c - tag) for c in corners for tag in (self.tag_left, self.tag_right))
+        return 0.0, max_norm * REAL_FIELD_SIZE * INCHES_TO_METERS
+
+    def build_firing_table(self):
+        """在整个场地的距离范围内建立射表并保存"""
+        path = filedialog.asksaveasfilename(parent=self.root, title="Save Firing Table",
+                                            defaultextension=".ftbl",
+                                            filetypes=[("Firing Table", "*.ftbl"), ("All Files", "*.*")])
+        if not path:
+            return
+        min_distance_m, max_distance_m = self.field_distance_range_m()
+        # 与导出固件查表一样在后台线程中建表，用独立的解算器实例，不与求解线程共用计数
+        solver = BallisticSolver(self.solver_config)
+
+        def build():
+            FiringTable.build(solver, min_distance_m, max_distance_m).save(path)
+
+        def done(_, error):
+            if error is None:
+                # 按当前的常量载入: 建表期间常量被修改时载入失败，不会用上过期的射表
+                try:
+                    self.firing_table = FiringTable.load(path, solver_constants(self.solver_config))
+                except (OSError, ValueError) as e:
+                    error = e
+            if error is not None:
+                messagebox.showerror("Firing Table", f"Failed to build firing table: {error}", parent=self.root)
+            self.resolve_current_position()
+        self.run_in_background("Firing Table", build, done)
+
+    def load_firing_table(self):
+        path = filedialog.askopenfilename(parent=self.root, title="Load Firing Table",
+                                          filetypes=[("Firing Table", "*.ftbl"), ("All Files", "*.*")])
+        if not path:
+            return
+        try:
+            self.firing_table = FiringTable.load(path, solver_constants(self.solver_config))
+        except (OSError, ValueError) as e:
+            messagebox.showerror("Firing Table", f"Cannot use firing table: {e}", parent=self.root)
+        self.resolve_current_position()
+
+    def unload_firing_table(self):
+        self.firing_table = None
+        self.resolve_current_position()
+
+    def export_firmware_table(self):
+        """把整个场地距离范围内的静止方案导出为机器人程序可以直接编译的定点查表，并显示验证报告"""
+        path = filedialog.asksaveasfilename(parent=self.root, title="Export Firmware Table",
+                                            defaultextension=".java",
+                                            filetypes=[("Java Class", "*.java"), ("C Header", "*.h"),
+                                                       ("Binary Table", "*.bin")])
+        if not path:
+            return
+        _, max_distance_m = self.field_distance_range_m()
+        # 建表和验证要十几秒，放到后台线程；用独立的解算器实例，不与求解线程共用计数
+        solver = BallisticSolver(self.solver_config)
+
+        def export():
+            table, samples = build_firmware_table(solver, 0.0, max_distance_m)
+            table.save(path)
+            return format_report(table, verify(table, solver, self.FIRMWARE_VERIFY_POINTS), samples)
+
+        def done(report, error):
+            if error is not None:
+                messagebox.showerror("Firmware Table", f"Failed to export firmware table: {error}", parent=self.root)
+            else:
+                messagebox.showinfo("Firmware Table", f"Saved {path}\n\n{report}", parent=self.root)
+        self.run_in_background("Firmware Table", export, done)
+
+    def run_in_background(self, name, work, on_done):
+        """
+        在后台线程中运行耗时的菜单操作 work() (不得访问 Tk)，界面保持响应。
+        结束后在界面线程中调用 on_done(结果, 异常)，与热力图一样用 after 轮询，不依赖线程化的 Tcl。
+        同名操作尚未结束时不重复启动。
+        """
+        if name in self.background_tasks:
+            messagebox.showinfo(name, f"{name} is still running in the background.", parent=self.root)
+            return
+        outcome = queue.Queue(maxsize=1)
+
+        def target():
+            try:
+                outcome.put((work(), None))
+            except Exception as e:
+                outcome.put((None, e))
+        self.background_tasks.add(name)
+        threading.Thread(target=target, daemon=True).start()
+        self.root.after(50, self.poll_background_task, name, outcome, on_done)
+
+    def poll_background_task(self, name, outcome, on_done):
+        try:
+            result, error = outcome.get_nowait()
+        except queue.Empty:
+            self.root.after(50, self.poll_background_task, name, outcome, on_done)
+            return
+        self.background_tasks.discard(name)
+        on_done(result, error)
+
+    def start_heatmap(self):
+        """在进程池上计算两个目标的整场热力图，分块算完一块画一块"""
+        self.clear_heatmap()
+        self.heatmap_job = HeatmapJob(self.solver_config, {'Red': self.tag_right, 'Blue': self.tag_left},
+                                      REAL_FIELD_SIZE * INCHES_TO_METERS, self.vehicle_speed_ms.get(),
+                                      self.vehicle_direction_deg.get())
+        self.heatmap_job.start()
+        self.root.after(50, self.poll_heatmap)
+
+    def poll_heatmap(self):
+        job = self.heatmap_job
+        if job is None or job.cancelled:
+            return
+        new_tiles = []
+        while True:
+            try:
+                new_tiles.append(job.tiles.get_nowait())
+            except queue.Empty:
+                break
+        if new_tiles:
+            self.heatmap_tiles += new_tiles
+            # 颜色范围随已收到的分块扩大，范围变化时重新着色所有分块
+            values = np.concatenate([tile.launcher_velocity.ravel() for tile in new_tiles])
+            values = values[~np.isnan(values)]
+            old_range = self.heatmap_range
+            if values.size:
+                low, high = float(values.min()), float(values.max())
+                self.heatmap_range = (low, high) if old_range is None else \
+                    (min(old_range[0], low), max(old_range[1], high))
+            redraw = self.heatmap_tiles if self.heatmap_range != old_range else new_tiles
+            if redraw is self.heatmap_tiles:
+                self.canvas.delete("heatmap_tile")
+                self.heatmap_images = []
+            for tile in redraw:
+                self.draw_heatmap_tile(tile)
+            self.update_heatmap_visibility()
+        if not job.done:
+            self.root.after(50, self.poll_heatmap)
+
+    def draw_heatmap_tile(self, tile):
+        """把一个分块画成半透明的图像覆盖在场地上: 颜色表示发射器速度，灰色表示无法击中"""
+        low, high = self.heatmap_range if self.heatmap_range else (0.0, 1.0)
+        values = np.flipud(tile.launcher_velocity)  # 画布的 y 轴向下
+        normalized = (values - low) / max(high - low, 1e-9)
+        import matplotlib  # 只在热力图出现后才需要
+
+        rgba = (matplotlib.colormaps['viridis'](np.nan_to_num(normalized)) * 255).astype(np.uint8)
+        rgba[..., 3] = 110
+        rgba[np.isnan(values)] = (90, 90, 90, 120)
+
+        left, top = self.field_to_canvas(tile.x0, tile.y1)
+        right, bottom = self.field_to_canvas(tile.x1, tile.y0)
+        image = Image.fromarray(rgba, "RGBA").resize((max(1, round(right - left)), max(1, round(bottom - top))),
+                                                      Image.Resampling.NEAREST)
+        photo = ImageTk.PhotoImage(image)
+        self.heatmap_images.append(photo)
+        item = self.canvas.create_image(round(left), round(top), image=photo, anchor=tk.NW,
+                                        tags=("heatmap", "heatmap_tile", f"heatmap_{tile.target}"))
+        # 放在背景图之上、场地线条和交互元素之下
+        if self.canvas.find_withtag("field_bg"):
+            self.canvas.tag_raise(item, "field_bg")
+        else:
+            self.canvas.tag_lower(item)
+
+    def update_heatmap_visibility(self):
+        """只显示当前联盟目标的热力图，并更新图例"""
+        job = self.heatmap_job
+        if job is None:
+            return
+        alliance = self.alliance_var.get()
+        for target in ('Red', 'Blue'):
+            self.canvas.itemconfigure(f"heatmap_{target}", state=tk.NORMAL if target == alliance else tk.HIDDEN)
+        legend = f"Heatmap {job.completed}/{job.total} tiles"
+        if self.heatmap_range:
+            low, high = self.heatmap_range
+            legend += (f" | {low:.2f} (purple) - {high:.2f} (yellow) m/s, "
+                       f"~{self.solver.calculate_motor_rpm(low):.0f}-{self.solver.calculate_motor_rpm(high):.0f} RPM"
+                       f" | gray = no shot")
+        if self.heatmap_legend_item is None:
+            self.heatmap_legend_item = self.canvas.create_text(self.PADDING_PX, 4, text=legend, anchor="nw",
+                                                               font=("Arial", 9), tags=("heatmap", "heatmap_legend"))
+            self.heatmap_legend_text = legend
+        elif legend != self.heatmap_legend_text:
+            self.heatmap_legend_text = legend
+            self.canvas.itemconfigure(self.heatmap_legend_item, text=legend)
+
+    def clear_heatmap(self):
+        if self.heatmap_job is not None:
+            self.heatmap_job.cancel()
+        self.heatmap_job = None
+        self.heatmap_tiles, self.heatmap_images, self.heatmap_range = [], [], None
+        self.heatmap_legend_item = self.heatmap_legend_text = None
+        self.canvas.delete("heatmap")
+
+    def plan_shot_path(self):
+        """读取带时间戳的路径 CSV，沿路径对当前联盟的目标求出射击方案，画在场地上并可保存为 CSV"""
+        path = filedialog.askopenfilename(parent=self.root, title="Open Robot Path",
+                                          filetypes=[("Robot Path", "*.csv"), ("All Files", "*.*")])
+        if not path:
+            return
+        meters_per_unit = REAL_FIELD_SIZE * INCHES_TO_METERS
+        target_tag_pos = self.tag_right if self.alliance_var.get() == "Red" else self.tag_left
+        config, store_path = self.solver_config, self.solution_cache.store.path
+
+        # 长路径要解几百个采样点，与固件查表导出一样放到后台线程，界面保持响应
+        def plan():
+            t, x, y, vx, vy = load_path(path)
+            start = time.perf_counter()
+            schedule = solve_schedule(config, t, x, y, vx, vy, tuple(target_tag_pos * meters_per_unit),
+                                      store_path=store_path)
+            return schedule, time.perf_counter() - start
+
+        def done(result, error):
+            if error is not None:
+                messagebox.showerror("Shot Schedule", f"Cannot plan shots along this path: {error}",
+                                     parent=self.root)
+                return
+            self.show_shot_schedule(*result, meters_per_unit)
+        self.run_in_background("Shot Schedule", plan, done)
+
+    def show_shot_schedule(self, schedule, elapsed, meters_per_unit):
+        """后台求解结束后在界面线程中调用: 画出路径、显示射击窗口并询问是否保存"""
+        self.draw_shot_path(schedule, meters_per_unit)
+        messagebox.showinfo("Shot Schedule",
+                            f"Solved {len(schedule)} samples in {elapsed:.2f} s, "
+                            f"{int(schedule.feasible.sum())} feasible.\n\nFiring windows:\n"
+                            f"{format_windows(schedule, limit=10)}", parent=self.root)
+        save_path = filedialog.asksaveasfilename(parent=self.root, title="Save Shot Schedule",
+                                                 defaultextension=".csv",
+                                                 filetypes=[("Shot Schedule", "*.csv"), ("All Files", "*.*")])
+        if save_path:
+            try:
+                schedule.save_csv(save_path)
+            except OSError as e:
+                messagebox.showerror("Shot Schedule", f"Failed to save the schedule: {e}", parent=self.root)
+
+    def draw_shot_path(self, schedule, meters_per_unit):
+        """把路径画在场地上: 可以射击的区段为绿色，其余为灰色"""
+        self.clear_shot_path()
+        px, py = self.field_to_canvas(schedule.x_m / meters_per_unit, schedule.y_m / meters_per_unit)
+        # 按可行性切成连续的区段，相邻区段共用边界点，线条不断开
+        breaks = np.flatnonzero(np.diff(schedule.feasible.astype(np.int8))) + 1
+        for start, end in zip([0, *breaks.tolist()], [*breaks.tolist(), len(schedule)]):
+            stop = min(end + 1, len(schedule))
+            points = np.column_stack((px[start:stop], py[start:stop])).ravel().tolist()
+            if len(points) < 4:
+                points *= 2
+            self.canvas.create_line(*points, fill="#00a000" if schedule.feasible[start] else "gray", width=3,
+                                    tags="shot_path")
+        self.canvas.tag_lower("shot_path", "interactive")
+
+    def clear_shot_path(self):
+        self.canvas.delete("shot_path")
+
+    def show_cache_stats(self):
+        stats = self.solution_cache.stats()
+        messagebox.showinfo("Solution Cache",
+                            f"Entries: {stats['entries']} / {stats['max_entries']}\n"
+                            f"Hits: {stats['hits']}\n"
+                            f"Misses: {stats['misses']}\n"
+                            f"Hit rate: {stats['hit_rate']:.1%}\n"
+                            f"Evictions: {stats['evictions']}\n"
+                            f"Invalidated: {stats['invalidations']}\n\n"
+                            f"{self.format_store_stats()}", parent=self.root)
+
+    def format_store_stats(self):
+        store = self.solution_cache.store
+        if store is None:
+            return "Persistent store: disabled"
+        stats = store.stats()
+        entries = "unavailable" if stats['entries'] is None else f"{stats['entries']} / {stats['max_entries']}"
+        return (f"Persistent store: {stats['path']}\n"
+                f"Entries: {entries}\n"
+                f"Hits: {stats['hits']}\n"
+                f"Misses: {stats['misses']}\n"
+                f"Writes: {stats['writes']}\n"
+                f"Evictions: {stats['evictions']}")
+
+    def open_performance_monitor(self):
+        if self.performance_window is None:
+            self.performance_window = PerformanceWindow(self.root, self)
+        else:
+            self.performance_window.lift()
+
+    def start_instrumentation_log(self):
+        path = filedialog.asksaveasfilename(title="Instrumentation Log", defaultextension=".jsonl",
+                                            filetypes=[("JSON Lines", "*.jsonl"), ("All files", "*.*")])
+        if path:
+            self.instrumentation.start_log(path)
+
+    def stop_instrumentation_log(self):
+        self.instrumentation.stop_log()
+        if self.performance_window is None:
+            self.instrumentation.disable()
+
     def setup_controls(self):
         self.controls_frame.columnconfigure(0, weight=0)
         self.controls_frame.columnconfigure(1, weight=1)
@@ -320,6 +784,11 @@ class FieldViewerApp:
         tk.Checkbutton(self.controls_frame, text="Enable Real-time Trajectory Plot", variable=self.draw_plot_var,
                        command=self.on_toggle_plot).grid(row=row_idx, column=0, columnspan=2, sticky='w')
         row_idx += 1
+        self.progressive_var = tk.BooleanVar(value=self.progressive_results)
+        tk.Checkbutton(self.controls_frame, text="Show Coarse Solutions While Refining",
+                       variable=self.progressive_var, command=self.on_toggle_progressive).grid(
+            row=row_idx, column=0, columnspan=2, sticky='w')
+        row_idx += 1
         tk.Label(self.controls_frame, text="Launch Pitch:", font=self.bold_label_font).grid(row=row_idx, column=0,
                                                                                             sticky='w', padx=5)
         self.launch_angle_label = tk.Label(self.controls_frame, text="--", font=self.label_font)
@@ -343,6 +812,21 @@ class FieldViewerApp:
         self.motor_rpm_label = tk.Label(self.controls_frame, text="--", font=self.label_font, fg="#008000")
         self.motor_rpm_label.grid(row=row_idx, column=1, sticky='w', padx=5)
         row_idx += 1
+        tk.Label(self.controls_frame, text="Solution Quality:", font=self.bold_label_font, fg="gray").grid(
+            row=row_idx, column=0, sticky='w', padx=5)
+        self.quality_label = tk.Label(self.controls_frame, text="--", font=self.label_font, fg="gray")
+        self.quality_label.grid(row=row_idx, column=1, sticky='w', padx=5)
+        row_idx += 1
+        tk.Label(self.controls_frame, text="Hit Probability:", font=self.bold_label_font).grid(
+            row=row_idx, column=0, sticky='w', padx=5)
+        self.hit_probability_label = tk.Label(self.controls_frame, text="--", font=self.label_font)
+        self.hit_probability_label.grid(row=row_idx, column=1, sticky='w', padx=5)
+        row_idx += 1
+        tk.Label(self.controls_frame, text="Main Error Source:", font=self.bold_label_font).grid(
+            row=row_idx, column=0, sticky='w', padx=5)
+        self.error_source_label = tk.Label(self.controls_frame, text="--", font=self.label_font)
+        self.error_source_label.grid(row=row_idx, column=1, sticky='w', padx=5)
+        row_idx += 1
 
         tk.Label(self.controls_frame, text="").grid(row=row_idx, column=0)
         row_idx += 1
@@ -354,86 +838,234 @@ class FieldViewerApp:
     def on_toggle_plot(self):
         self.update_plot(self.last_solution, self.last_calc_params.get('distance_m', 0), self.last_path)
 
+    def on_toggle_progressive(self):
+        # 工作线程只读取这个布尔值，不访问 Tk 变量
+        self.progressive_results = self.progressive_var.get()
+
     def on_motion_change(self, _=None):
         self.draw_interactive_elements()
 
-    def calculate_motor_rpm(self, velocity_ms):
-        if velocity_ms <= 0:
-            return 0
-        theoretical_rpm = (velocity_ms * 60) / (math.pi * self.FRICTION_WHEEL_DIAMETER_M)
-        estimated_rpm = theoretical_rpm * (1 + self.MOTOR_RPM_LOSS_FACTOR_PERCENT / 100.0)
-        return estimated_rpm
-
     def calculation_worker(self):
+        # 拖动机器人时相邻两次请求几乎相同，用上一次的方案热启动搜索
+        previous_solution = None
+        instrumentation = self.instrumentation
+        # 散布分析的优先级低于求解: 最终方案送出后先等待新请求，等不到时才分析，分析中途有新请求也会放弃
+        pending_dispersion = None
         while True:
             try:
-                calc_params = self.calc_queue.get()
-                solution = self.find_launch_solution(calc_params)
-                self.result_queue.put((calc_params, solution))
+                try:
+                    request = self.calc_queue.get(timeout=self.DISPERSION_IDLE_S if pending_dispersion else None)
+                except queue.Empty:
+                    request = None
+                dispersion_args, pending_dispersion = pending_dispersion, None
+                if request is None:
+                    self.analyze_solution_dispersion(*dispersion_args)
+                    continue
+                calc_params, generation, input_at, queued_at = request
+                solver, firing_table = self.solver, self.firing_table
+                timing = instrumentation.enabled and queued_at is not None
+                if timing:
+                    start, counters = time.perf_counter(), solver_counters(solver)
+                source = 'firing_table'
+                solution = firing_table.lookup(calc_params) if firing_table else None
+                if solution is None:
+                    source = 'solver'
+                    solution = self.solution_cache.solve(
+                        solver, calc_params, warm_start=previous_solution,
+                        cancelled=lambda: self.request_generation != generation,
+                        progress=self.publish_progress(solver, calc_params, generation, input_at))
+                if solution is not None:
+                    previous_solution = solution
+                if timing:
+                    record = {'queue_wait_ms': (start - queued_at) * 1000,
+                              'solve_ms': (time.perf_counter() - start) * 1000}
+                    if source == 'solver':
+                        record.update(solve_counters(solver, counters))
+                        source = 'solver' if record['simulations'] else 'cache'
+                        if solution is not None and source == 'solver':
+                            record['angles_tried'] = solution['inner_solves']
+                    record['source'] = source
+                    instrumentation.record('solve', record)
+                # 路径也在工作线程中生成，界面线程不再为绘图重新积分
+                with instrumentation.timer('resimulate'):
+                    path = solver.solution_path(solution, calc_params['distance_m'], self.PLOT_PATH_POINTS)
+                self.deliver_result(calc_params, solution, path, input_at)
+                if solution is not None and self.dispersion_enabled:
+                    pending_dispersion = (solver, calc_params, solution, path, generation)
+            except SolveCancelled:
+                # 已有更新的请求在排队，直接去取它
+                if timing:
+                    instrumentation.record('cancelled', {'cancelled_after_ms': (time.perf_counter() - start) * 1000})
             except Exception as e:
                 print(f"Error in calculation worker: {e}")
 
-    def process_results(self):
-        latest_result = None
-        while not self.result_queue.empty():
-            try:
-                latest_result = self.result_queue.get_nowait()
-            except queue.Empty:
-                break
-
-        if latest_result:
-            calc_params, solution = latest_result
-            self.update_solution_display(solution, calc_params)
-
-        self.root.after(30, self.process_results)
-
-    def update_solution_display(self, solution, calc_params):
+    def analyze_solution_dispersion(self, solver, calc_params, solution, path, generation):
+        """
+        在工作线程中调用: 散布分析不影响方案的显示延迟，方案先显示，分析结果随后作为同一结果的补充送达。
+        分块积分，每块之前检查请求序号，有更新的请求时放弃。
+        """
+        cancelled = lambda: self.request_generation != generation
+        if cancelled():
+            return
+        try:
+            with self.instrumentation.timer('dispersion'):
+                # 固定随机种子，机器人不动时命中概率不会因为抽样而跳动
+                dispersion = analyze_dispersion(solver, solution, calc_params, samples=self.DISPERSION_SAMPLES,
+                                                seed=0, cancelled=cancelled)
+        except SolveCancelled:
+            return
+        if not cancelled():
+            self.deliver_result(calc_params, solution, path, None, dispersion)
+
+    def publish_progress(self, solver, calc_params, generation, input_at):
+        """
+        渐进求解时传给 find_launch_solution 的 progress 回调: 在工作线程中把中间结果连同路径交给界面，
+        已有更新的请求时直接丢弃。关闭渐进求解时返回 None，求解器不会计算粗略方案。
+        """
+        if not self.progressive_results:
+            return None
+
+        def progress(preview):
+            if self.request_generation != generation:
+                return
+            path = solver.solution_path(preview, calc_params['distance_m'], self.PLOT_PATH_POINTS)
+            self.deliver_result(calc_params, preview, path, input_at)
+        return progress
+
+    def deliver_result(self, calc_params, solution, path, input_at, dispersion=None):
+        """
+        在工作线程中调用: 用新结果替换尚未显示的旧结果。已有事件等待处理时不再重复发出，
+        界面线程来不及处理时多个结果只会触发一次显示。
+        """
+        with self.result_lock:
+            self.latest_result = (calc_params, solution, path, input_at, dispersion)
+            if self.result_event_pending or not self.result_events:
+                return
+            self.result_event_pending = True
+        try:
+            # Tkinter 会把其他线程的调用转交给主线程执行，when="tail" 让事件排在队列末尾
+            self.root.event_generate("<<SolutionReady>>", when="tail")
+        except (RuntimeError, tk.TclError):
+            # 主循环尚未启动或已经退出: 结果留在槽位中，由下一次事件或 on_first_frame 取走
+            with self.result_lock:
+                self.result_event_pending = False
+
+    def poll_results(self):
+        self.process_results()
+        self.root.after(30, self.poll_results)
+
+    def process_results(self, _event=None):
+        with self.result_lock:
+            latest_result, self.latest_result = self.latest_result, None
+            self.result_event_pending = False
+        if latest_result is None:
+            return
+        calc_params, solution, path, input_at, dispersion = latest_result
+        self.update_solution_display(solution, calc_params, path, dispersion)
+        if input_at is not None:
+            # 中间结果单独统计，input_to_display_ms 始终是到最终方案显示的延迟
+            refined = solution is None or solution.get('quality', QUALITY_REFINED) == QUALITY_REFINED
+            metric = 'input_to_display_ms' if refined else 'input_to_preview_ms'
+            self.instrumentation.record('display', {metric: (time.perf_counter() - input_at) * 1000})
+
+    def update_solution_display(self, solution, calc_params, path, dispersion=None):
         self.last_solution = solution
         self.last_calc_params = calc_params
         distance_m = calc_params.get('distance_m', 0)
+        self.update_dispersion_display(solution, dispersion)
 
-        path = ([], [])
         if solution:
-            self.launch_angle_label.config(text=f"{solution['launcher_angle']:.2f} deg")
-            self.aim_azimuth_label.config(text=f"{solution['aim_azimuth_deg']:.2f} deg")
-            self.launch_velocity_label.config(text=f"{solution['launcher_velocity']:.2f} m/s")
-
-            estimated_rpm = self.calculate_motor_rpm(solution['launcher_velocity'])
-            self.motor_rpm_label.config(text=f"~{estimated_rpm:.0f} RPM")
-
-            _, _, path_x, path_y = self.run_simulation_for_angle_and_velocity(
-                solution['projectile_vertical_angle'], solution['projectile_total_velocity'], distance_m,
-                return_path=True
-            )
-            path = (path_x, path_y)
+            self.set_label_text(self.launch_angle_label, f"{solution['launcher_angle']:.2f} deg")
+            self.set_label_text(self.aim_azimuth_label, f"{solution['aim_azimuth_deg']:.2f} deg")
+            self.set_label_text(self.launch_velocity_label, f"{solution['launcher_velocity']:.2f} m/s")
+
+            estimated_rpm = self.solver.calculate_motor_rpm(solution['launcher_velocity'])
+            self.set_label_text(self.motor_rpm_label, f"~{estimated_rpm:.0f} RPM")
+            quality = solution.get('quality', QUALITY_REFINED)
+            self.set_label_text(self.quality_label, QUALITY_NAMES[quality] if quality == QUALITY_REFINED
+                                else f"{QUALITY_NAMES[quality]} (refining...)")
         else:
-            self.launch_angle_label.config(text="N/A")
-            self.aim_azimuth_label.config(text="N/A")
-            self.launch_velocity_label.config(text="N/A")
-            self.motor_rpm_label.config(text="N/A")
+            self.set_label_text(self.launch_angle_label, "N/A")
+            self.set_label_text(self.aim_azimuth_label, "N/A")
+            self.set_label_text(self.launch_velocity_label, "N/A")
+            self.set_label_text(self.motor_rpm_label, "N/A")
+            self.set_label_text(self.quality_label, "--")
 
         self.last_path = path
         self.draw_interactive_elements()
         self.update_plot(solution, distance_m, path)
 
+    def update_dispersion_display(self, solution, dispersion):
+        """散布分析在最终方案之后送达；中间结果不改变显示，最终方案到达时先清空旧的分析结果"""
+        if dispersion is not None:
+            self.last_dispersion = dispersion
+            self.set_label_text(self.hit_probability_label, f"{dispersion['hit_probability']:.0%} "
+                                f"(height std {dispersion['height_std_m'] * 100:.1f} cm)")
+            main_source = next(iter(dispersion['sensitivities'].items()), None)
+            self.set_label_text(self.error_source_label, f"{main_source[0]} ({main_source[1]['variance_share']:.0%})"
+                                if main_source else "--")
+        elif solution is None or solution.get('quality', QUALITY_REFINED) == QUALITY_REFINED:
+            self.last_dispersion = None
+            self.set_label_text(self.hit_probability_label, "..." if solution and self.dispersion_enabled else "--")
+            self.set_label_text(self.error_source_label, "--")
+
+    def on_toggle_dispersion(self):
+        self.dispersion_enabled = self.dispersion_var.get()
+        self.resolve_current_position()
+
+    def show_dispersion_report(self):
+        if self.last_dispersion is None:
+            messagebox.showinfo("Dispersion Analysis", "No dispersion analysis for the current position.\n"
+                                "Enable Tools → Live Dispersion Analysis and select a position with a solution.",
+                                parent=self.root)
+            return
+        messagebox.showinfo("Dispersion Analysis", format_dispersion(self.last_dispersion), parent=self.root)
+
     def on_mouse_action(self, event):
         fx, fy = self.canvas_to_field(event.x, event.y)
         self.drag_pos_x = max(0.0, min(1.0, fx))
         self.drag_pos_y = max(0.0, min(1.0, fy))
+        if self.pending_input_at is None and self.instrumentation.enabled:
+            self.pending_input_at = time.perf_counter()
+        # 拖动时鼠标事件比屏幕刷新快得多，事件队列空闲时只按最新位置更新一次
+        if self.interactive_redraw_id is None:
+            self.interactive_redraw_id = self.root.after_idle(self.on_interactive_idle)
+
+    def on_interactive_idle(self):
+        self.interactive_redraw_id = None
         self.draw_interactive_elements()
 
+    def set_label_text(self, label, text):
+        """只在文字变化时更新标签，避免每帧都触发重新布局"""
+        if self.label_texts.get(label) != text:
+            self.label_texts[label] = text
+            label.config(text=text)
+
+    def create_interactive_items(self):
+        """创建一次交互元素，之后只用 coords / itemconfigure 移动和修改"""
+        create_line, hidden = self.canvas.create_line, tk.HIDDEN
+        self.interactive_items = {
+            'crosshair_x': create_line(0, 0, 0, 0, fill="purple", dash=(5, 5), width=2, tags="interactive"),
+            'crosshair_y': create_line(0, 0, 0, 0, fill="purple", dash=(5, 5), width=2, tags="interactive"),
+            'robot': self.canvas.create_oval(0, 0, 0, 0, fill="black", outline="gray", width=2, tags="interactive"),
+            'target': create_line(0, 0, 0, 0, width=3, arrow=tk.LAST, tags="interactive"),
+            'motion': create_line(0, 0, 0, 0, arrow=tk.LAST, fill="orange", width=4, state=hidden,
+                                  tags="interactive"),
+            'heading': create_line(0, 0, 0, 0, arrow=tk.LAST, fill="#555555", width=5, dash=(6, 3), state=hidden,
+                                   tags="interactive"),
+        }
+
+    @timed('draw_interactive')
     def draw_interactive_elements(self):
-        self.canvas.delete("interactive")
+        items, coords = self.interactive_items, self.canvas.coords
         point_px = self.field_to_canvas(self.drag_pos_x, self.drag_pos_y)
         current_point_norm = np.array([self.drag_pos_x, self.drag_pos_y])
 
-        self.canvas.create_line(self.field_to_canvas(self.drag_pos_x, 1.0), self.field_to_canvas(self.drag_pos_x, 0.0),
-                                fill="purple", dash=(5, 5), width=2, tags="interactive")
-        self.canvas.create_line(self.field_to_canvas(0.0, self.drag_pos_y), self.field_to_canvas(1.0, self.drag_pos_y),
-                                fill="purple", dash=(5, 5), width=2, tags="interactive")
-
-        self.canvas.create_oval(point_px[0] - 8, point_px[1] - 8, point_px[0] + 8, point_px[1] + 8,
-                                fill="black", outline="gray", width=2, tags="interactive")
+        coords(items['crosshair_x'], *self.field_to_canvas(self.drag_pos_x, 1.0),
+               *self.field_to_canvas(self.drag_pos_x, 0.0))
+        coords(items['crosshair_y'], *self.field_to_canvas(0.0, self.drag_pos_y),
+               *self.field_to_canvas(1.0, self.drag_pos_y))
+        coords(items['robot'], point_px[0] - 8, point_px[1] - 8, point_px[0] + 8, point_px[1] + 8)
 
         alliance = self.alliance_var.get()
         target_tag_pos, line_color = (self.tag_right, "red") if alliance == "Red" else (self.tag_left, "blue")
@@ -442,18 +1074,21 @@ class FieldViewerApp:
         dist_in = dist_norm * REAL_FIELD_SIZE
 
         if alliance == "Red":
-            self.dist_red_label.config(text=f"{dist_in:.2f} in")
-            self.dist_blue_label.config(text="--")
+            self.set_label_text(self.dist_red_label, f"{dist_in:.2f} in")
+            self.set_label_text(self.dist_blue_label, "--")
         else:
-            self.dist_blue_label.config(text=f"{dist_in:.2f} in")
-            self.dist_red_label.config(text="--")
+            self.set_label_text(self.dist_blue_label, f"{dist_in:.2f} in")
+            self.set_label_text(self.dist_red_label, "--")
 
-        self.canvas.create_line(point_px, self.field_to_canvas(*target_tag_pos), fill=line_color, width=3,
-                                arrow=tk.LAST, tags="interactive")
+        coords(items['target'], *point_px, *self.field_to_canvas(*target_tag_pos))
+        if self.interactive_target_color != line_color:
+            self.interactive_target_color = line_color
+            self.canvas.itemconfigure(items['target'], fill=line_color)
+        self.update_heatmap_visibility()
 
         angle_to_target_deg = math.degrees(math.atan2(vector_to_target[1], vector_to_target[0]))
-        self.angle_label.config(text=f"{angle_to_target_deg:+.2f} deg")
-        self.coord_label.config(text=f"X={self.drag_pos_x:.3f}, Y={self.drag_pos_y:.3f}")
+        self.set_label_text(self.angle_label, f"{angle_to_target_deg:+.2f} deg")
+        self.set_label_text(self.coord_label, f"X={self.drag_pos_x:.3f}, Y={self.drag_pos_y:.3f}")
 
         vehicle_speed = self.vehicle_speed_ms.get()
         if vehicle_speed > 0.1:
@@ -461,31 +1096,44 @@ class FieldViewerApp:
             arrow_len_norm = vehicle_speed * 0.08
             end_norm_x = self.drag_pos_x + arrow_len_norm * math.cos(move_dir_rad)
             end_norm_y = self.drag_pos_y + arrow_len_norm * math.sin(move_dir_rad)
-            self.canvas.create_line(point_px, self.field_to_canvas(end_norm_x, end_norm_y),
-                                    arrow=tk.LAST, fill="orange", width=4, tags="interactive")
+            coords(items['motion'], *point_px, *self.field_to_canvas(end_norm_x, end_norm_y))
+        self.set_item_visible('motion', vehicle_speed > 0.1)
 
         if self.last_solution:
             aim_azimuth_rad = math.radians(self.last_solution['aim_azimuth_deg'])
             heading_end_x = self.drag_pos_x + 1.5 * math.cos(aim_azimuth_rad)
             heading_end_y = self.drag_pos_y + 1.5 * math.sin(aim_azimuth_rad)
-            self.canvas.create_line(point_px, self.field_to_canvas(heading_end_x, heading_end_y),
-                                    arrow=tk.LAST, fill="#555555", width=5, dash=(6, 3), tags="interactive")
-
+            coords(items['heading'], *point_px, *self.field_to_canvas(heading_end_x, heading_end_y))
+        self.set_item_visible('heading', bool(self.last_solution))
+
+        calc_params = {
+            'distance_m': dist_in * INCHES_TO_METERS,
+            'vehicle_speed_ms': self.vehicle_speed_ms.get(),
+            'vehicle_direction_deg': self.vehicle_direction_deg.get(),
+            'target_direction_deg': angle_to_target_deg
+        }
+        # 参数不变 (例如结果返回后的重绘) 时不再重复求解，也不打断正在进行的同一求解
+        if calc_params == self.last_request_params:
+            return
         try:
             if not self.calc_queue.empty():
                 self.calc_queue.get_nowait()
-            calc_params = {
-                'distance_m': dist_in * INCHES_TO_METERS,
-                'vehicle_speed_ms': self.vehicle_speed_ms.get(),
-                'vehicle_direction_deg': self.vehicle_direction_deg.get(),
-                'target_direction_deg': angle_to_target_deg
-            }
-            self.calc_queue.put_nowait(calc_params)
+            self.request_generation += 1
+            self.last_request_params = calc_params
+            queued_at = time.perf_counter() if self.instrumentation.enabled else None
+            input_at = self.pending_input_at if self.pending_input_at is not None else queued_at
+            self.pending_input_at = None
+            self.calc_queue.put_nowait((calc_params, self.request_generation, input_at, queued_at))
         except queue.Full:
             pass
         except queue.Empty:
             pass
 
+    def set_item_visible(self, name, visible):
+        if self.interactive_visible.get(name) != visible:
+            self.interactive_visible[name] = visible
+            self.canvas.itemconfigure(self.interactive_items[name], state=tk.NORMAL if visible else tk.HIDDEN)
+
     def field_to_canvas(self, x_norm, y_norm):
         draw_size = self.CANVAS_SIZE_PX - 2 * self.PADDING_PX
         return (self.PADDING_PX + x_norm * draw_size, (self.CANVAS_SIZE_PX - self.PADDING_PX) - y_norm * draw_size)
@@ -505,7 +1153,7 @@ class FieldViewerApp:
     def draw_static_field(self):
         if self.field_bg_image:
             self.canvas.create_image(self.CANVAS_SIZE_PX / 2, self.CANVAS_SIZE_PX / 2,
-                                     image=self.field_bg_image, anchor=tk.CENTER)
+                                     image=self.field_bg_image, anchor=tk.CENTER, tags="field_bg")
 
         bl_px, tr_px = self.field_to_canvas(0, 0), self.field_to_canvas(1, 1)
         self.canvas.create_rectangle(bl_px[0], bl_px[1], tr_px[0], tr_px[1], outline="black", width=3)
@@ -528,162 +1176,95 @@ class FieldViewerApp:
         self.canvas.create_polygon(points, fill=color, outline=color)
 
     def update_plot(self, solution, distance_m, path):
-        self.ax.clear()
+        """
+        请求重绘轨迹图。两次重绘的间隔不少于 1 / PLOT_MAX_FPS 秒，期间到达的请求只保留最新一个，
+        由定时器在间隔结束时画出，输入停止后最后一个结果总会显示。
+        """
+        if self.plot_canvas is None:
+            if not self.draw_plot_var.get():
+                self.plot_placeholder.config(text="Plotting Disabled")
+                return
+            self.ensure_plot()
+        self.pending_plot = (solution, distance_m, path)
+        if self.plot_after_id is not None:
+            return
+        wait_s = self.last_plot_time + 1.0 / self.PLOT_MAX_FPS - time.perf_counter()
+        if wait_s > 0:
+            self.plot_after_id = self.root.after(math.ceil(wait_s * 1000), self.draw_pending_plot)
+        else:
+            self.draw_pending_plot()
+
+    @timed('update_plot')
+    def draw_pending_plot(self):
+        self.plot_after_id = None
+        self.last_plot_time = time.perf_counter()
+        solution, distance_m, path = self.pending_plot
 
         if not self.draw_plot_var.get():
-            self.ax.set_title("Trajectory Plotting Disabled")
-            self.ax.text(0.5, 0.5, 'Plotting Disabled', ha='center', va='center', fontsize=12, color='gray',
-                         transform=self.ax.transAxes)
-            self.ax.set_xticks([])
-            self.ax.set_yticks([])
-        elif solution and path and path[0]:
+            mode = 'disabled'
+        elif solution and len(path[0]):
+            mode = 'solution'
+        else:
+            mode = 'none'
+        limits = (1.0, 1.0)
+        if mode == 'solution':
             path_x, path_y = path
-            label_text = (
+            self.path_line.set_data(path_x, path_y)
+            self.target_marker.set_data([distance_m], [self.solver_config.HEIGHT_M])
+            self.plot_legend.get_texts()[0].set_text(
                 f"Pitch: {solution['launcher_angle']:.1f}°, " f"Velocity: {solution['launcher_velocity']:.2f} m/s")
-            self.ax.plot(path_x, path_y, 'g-', label=label_text)
-            self.ax.plot(distance_m, self.HEIGHT_M, 'ro', markersize=8, label="Target")
-            self.ax.grid(True)
-            self.ax.legend()
-            self.ax.set_xlim(left=0)
-            self.ax.set_ylim(bottom=0)
-            self.ax.set_aspect('equal', adjustable='box')
+            # 坐标范围按 PLOT_LIMIT_STEP_M 向上取整，拖动时范围很少变化，大多数帧只需要重画动态元素
+            step = self.PLOT_LIMIT_STEP_M
+            limits = (math.ceil(max(np.max(path_x), distance_m) * 1.05 / step) * step,
+                      math.ceil(max(np.max(path_y), self.solver_config.HEIGHT_M) * 1.05 / step) * step)
+
+        if mode != self.plot_mode or limits != self.plot_limits or self.plot_background is None:
+            self.plot_mode, self.plot_limits = mode, limits
+            self.redraw_plot_background()
         else:
-            self.ax.set_title("No Valid Solution Found")
-            self.ax.grid(True)
-            self.ax.set_xlim(left=0)
-            self.ax.set_ylim(bottom=0)
-
+            self.blit_plot()
+
+    def create_plot_artists(self):
+        """创建轨迹图中一直复用的元素；轨迹、目标点和图例标记为 animated，不进入缓存的背景"""
+        self.path_line, = self.ax.plot([], [], 'g-', label=" ", animated=True)
+        self.target_marker, = self.ax.plot([], [], 'ro', markersize=8, label="Target", animated=True)
+        self.plot_legend = self.ax.legend(loc='lower center')
+        self.plot_legend.set_animated(True)
+        self.disabled_text = self.ax.text(0.5, 0.5, 'Plotting Disabled', ha='center', va='center', fontsize=12,
+                                          color='gray', transform=self.ax.transAxes)
+        self.plot_mode, self.plot_limits, self.plot_background = None, None, None
+        self.pending_plot, self.plot_after_id, self.last_plot_time = None, None, 0.0
+        self.plot_canvas.mpl_connect('draw_event', self.on_plot_draw)
+
+    def redraw_plot_background(self):
+        """模式或坐标范围改变时完整重画一次，draw_event 中会重新缓存背景"""
+        mode, (x_max, y_max) = self.plot_mode, self.plot_limits
+        titles = {'disabled': "Trajectory Plotting Disabled", 'none': "No Valid Solution Found", 'solution': ""}
+        self.ax.set_title(titles[mode])
+        self.ax.grid(mode != 'disabled')
+        self.ax.xaxis.set_visible(mode != 'disabled')
+        self.ax.yaxis.set_visible(mode != 'disabled')
+        self.disabled_text.set_visible(mode == 'disabled')
+        self.ax.set_xlim(0, x_max)
+        self.ax.set_ylim(0, y_max)
+        self.ax.set_aspect('equal' if mode == 'solution' else 'auto', adjustable='box')
         self.fig.tight_layout(pad=0.8)
         self.plot_canvas.draw()
 
-    def run_simulation_for_angle_and_velocity(self, launch_angle_deg, initial_velocity_ms, distance_m,
-                                              return_path=False):
-        angle_rad = math.radians(launch_angle_deg)
-        vx, vy = initial_velocity_ms * math.cos(angle_rad), initial_velocity_ms * math.sin(angle_rad)
-        x, y, current_time, prev_time = 0.0, 0.0, 0.0, 0.0
-        path_x, path_y = ([0.0], [0.0]) if return_path else (None, None)
+    def on_plot_draw(self, _event):
+        # 任何完整重画 (包括窗口尺寸变化) 之后都重新缓存背景，再画上动态元素
+        self.plot_background = self.plot_canvas.copy_from_bbox(self.fig.bbox)
+        self.draw_plot_artists()
 
-        drag_factor = 0.5 * self.AIR_DENSITY * self.DRAG_COEFFICIENT * self.CROSS_SECTIONAL_AREA_M2
-        gravity_force_y = -self.MASS_KG * self.GRAVITY_MS2
+    def blit_plot(self):
+        self.plot_canvas.restore_region(self.plot_background)
+        self.draw_plot_artists()
+        self.plot_canvas.blit(self.fig.bbox)
 
-        while True:
-            if (vx <= 0 and x < distance_m) or (y < 0 and vy < 0):
-                return (-1.0, -1.0, [], []) if return_path else (-1.0, -1.0)
-
-            prev_x, prev_y, prev_time = x, y, current_time
-
-            v_sq = vx ** 2 + vy ** 2
-            if v_sq == 0:
-                return (-1.0, -1.0, [], []) if return_path else (-1.0, -1.0)
-
-            v = math.sqrt(v_sq)
-            drag = drag_factor * v_sq
-            ax, ay = -drag * (vx / v) / self.MASS_KG, (gravity_force_y - drag * (vy / v)) / self.MASS_KG
-
-            vx += ax * self.TIME_STEP_S
-            vy += ay * self.TIME_STEP_S
-            x += vx * self.TIME_STEP_S
-            y += vy * self.TIME_STEP_S
-            current_time += self.TIME_STEP_S
-
-            if return_path: path_x.append(x); path_y.append(y)
-
-            if x >= distance_m:
-                if (x - prev_x) == 0:
-                    hit_h, hit_t = y, current_time
-                else:
-                    frac = (distance_m - prev_x) / (x - prev_x)
-                    hit_h = prev_y + (y - prev_y) * frac
-                    hit_t = prev_time + self.TIME_STEP_S * frac
-
-                if return_path:
-                    path_x[-1], path_y[-1] = distance_m, hit_h
-                    return hit_h, hit_t, path_x, path_y
-
-                return hit_h, hit_t
-
-    def estimate_initial_velocity(self, angle_deg, target_x, target_y):
-        angle_rad = math.radians(angle_deg)
-        cos_a, tan_a = math.cos(angle_rad), math.tan(angle_rad)
-        denominator = 2 * (cos_a ** 2) * (target_x * tan_a - target_y)
-        return math.sqrt((self.GRAVITY_MS2 * target_x ** 2) / denominator) if denominator > 0 else None
-
-    def find_launch_solution(self, params):
-        distance_m = params['distance_m']
-        if distance_m <= 0: return None
-
-        v_vehicle_ms = params['vehicle_speed_ms']
-        vehicle_dir_rad = math.radians(params['vehicle_direction_deg'])
-        target_dir_rad = math.radians(params['target_direction_deg'])
-
-        v_vehicle_vec = np.array([v_vehicle_ms * math.cos(vehicle_dir_rad),
-                                  v_vehicle_ms * math.sin(vehicle_dir_rad)])
-
-        min_v_sol, last_min_launcher_v = None, float('inf')
-
-        start, step, end_cond = (self.MIN_ANGLE_DEG, self.ANGLE_SEARCH_STEP, lambda a: a <= self.MAX_ANGLE_DEG)
-
-        projectile_vertical_angle = start
-        while end_cond(projectile_vertical_angle):
-            pred_v = self.estimate_initial_velocity(projectile_vertical_angle, distance_m, self.HEIGHT_M)
-            if pred_v is None:
-                projectile_vertical_angle += step
-                continue
-
-            low_v, high_v, found = pred_v, 0.0, False
-            for i in range(self.MAX_VELOCITY_TRIES):
-                test_v = low_v + i * self.VELOCITY_SEARCH_STEP
-                hit_h, _ = self.run_simulation_for_angle_and_velocity(projectile_vertical_angle, test_v, distance_m)
-                if hit_h > self.HEIGHT_M:
-                    high_v, low_v, found = test_v, max(pred_v, test_v - self.VELOCITY_SEARCH_STEP), True
-                    break
-            if not found:
-                projectile_vertical_angle += step
-                continue
-
-            for _ in range(self.BISECTION_ITERATIONS):
-                mid_v = (low_v + high_v) / 2.0
-                if mid_v <= 0: break
-                mid_h, _ = self.run_simulation_for_angle_and_velocity(projectile_vertical_angle, mid_v, distance_m)
-                if mid_h > self.HEIGHT_M:
-                    high_v = mid_v
-                else:
-                    low_v = mid_v
-
-            projectile_total_velocity = high_v
-            final_h, final_t = self.run_simulation_for_angle_and_velocity(projectile_vertical_angle,
-                                                                          projectile_total_velocity, distance_m)
-
-            if abs(final_h - self.HEIGHT_M) <= self.HIT_TOLERANCE_M:
-                v_projectile_h_magnitude = projectile_total_velocity * math.cos(
-                    math.radians(projectile_vertical_angle))
-                v_projectile_v = projectile_total_velocity * math.sin(math.radians(projectile_vertical_angle))
-
-                v_projectile_h_vec = np.array([v_projectile_h_magnitude * math.cos(target_dir_rad),
-                                               v_projectile_h_magnitude * math.sin(target_dir_rad)])
-
-                v_launcher_h_vec = v_projectile_h_vec - v_vehicle_vec
-                v_launcher_h_magnitude = np.linalg.norm(v_launcher_h_vec)
-                aim_azimuth_rad = math.atan2(v_launcher_h_vec[1], v_launcher_h_vec[0])
-
-                v_launcher_v = v_projectile_v
-                launcher_velocity = math.sqrt(v_launcher_h_magnitude ** 2 + v_launcher_v ** 2)
-                launcher_angle_deg = math.degrees(math.atan2(v_launcher_v, v_launcher_h_magnitude))
-
-                if launcher_velocity < last_min_launcher_v:
-                    last_min_launcher_v = launcher_velocity
-                    min_v_sol = {
-                        'launcher_velocity': launcher_velocity,
-                        'launcher_angle': launcher_angle_deg,
-                        'aim_azimuth_deg': math.degrees(aim_azimuth_rad),
-                        'time': final_t,
-                        'projectile_total_velocity': projectile_total_velocity,
-                        'projectile_vertical_angle': projectile_vertical_angle,
-                    }
-                else:
-                    break
-            projectile_vertical_angle += step
-        return min_v_sol
+    def draw_plot_artists(self):
+        if self.plot_mode == 'solution':
+            for artist in (self.path_line, self.target_marker, self.plot_legend):
+                self.ax.draw_artist(artist)
 
 
 if __name__ == "__main__":
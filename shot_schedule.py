@@ -0,0 +1,204 @@
+"""
+    沿机器人路径预先规划射击方案 (无 GUI 依赖)
+
+    输入一串带时间戳的机器人位置 (和速度)，为每个采样点生成与界面相同的 calc_params，
+    一次性求出整条路径上的发射俯仰角、方位角、发射器速度和电机转速，并给出可以射击的时间窗口。
+    路径按连续的分段交给进程池并行求解，段内每个点都用前一个点的方案热启动；
+    默认先查询与界面共享的磁盘方案存储 (见 solution_store)。
+
+    路径文件为带表头的 CSV，列为 t (秒)、x、y (米，与界面的场地坐标同向，原点为场地坐标 (0, 0) 的角)，
+    可选 vx、vy (米/秒)；没有速度列时由相邻位置差分得出。
+
+    用法:
+        python shot_schedule.py path.csv --target 3.3,2.8 --output schedule.csv
+        python shot_schedule.py path.csv --target 3.3,2.8 --max-rpm 6000 --workers 4
+"""
+
+import argparse
+import csv
+import math
+import multiprocessing
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor
+from dataclasses import dataclass
+
+import numpy as np
+
+from solution_store import DEFAULT_STORE_PATH, SolutionStore
+from solver import BallisticSolver, SolverConfig
+
+SCHEDULE_COLUMNS = ('t', 'x_m', 'y_m', 'distance_m', 'feasible', 'launcher_angle', 'aim_azimuth_deg',
+                    'launcher_velocity', 'motor_rpm', 'flight_time')
+
+
+@dataclass
+class ShotSchedule:
+    """路径上每个采样点的射击方案，各字段为等长数组，无解处为 NaN (feasible 为 False)"""
+    t: np.ndarray
+    x_m: np.ndarray
+    y_m: np.ndarray
+    distance_m: np.ndarray
+    feasible: np.ndarray
+    launcher_angle: np.ndarray
+    aim_azimuth_deg: np.ndarray
+    launcher_velocity: np.ndarray
+    motor_rpm: np.ndarray
+    flight_time: np.ndarray
+
+    def __len__(self):
+        return self.t.size
+
+    def windows(self):
+        """可以射击的时间窗口: [(开始时刻, 结束时刻), ...]，由连续可行的采样点组成"""
+        return feasibility_windows(self.t, self.feasible)
+
+    def save_csv(self, path):
+        with open(path, "w", newline="", encoding="utf-8") as f:
+            writer = csv.writer(f)
+            writer.writerow(SCHEDULE_COLUMNS)
+            columns = [getattr(self, name).tolist() for name in SCHEDULE_COLUMNS]
+            for row in zip(*columns):
+                writer.writerow(["" if value != value else value for value in row])  # NaN 写为空
+
+
+def feasibility_windows(t, feasible):
+    """把布尔数组中连续为 True 的区段换算成 [(开始时刻, 结束时刻), ...]"""
+    edges = np.diff(np.concatenate(([0], np.asarray(feasible, dtype=np.int8), [0])))
+    starts, ends = np.flatnonzero(edges == 1), np.flatnonzero(edges == -1) - 1
+    return [(float(t[start]), float(t[end])) for start, end in zip(starts.tolist(), ends.tolist())]
+
+
+def load_path(path):
+    """读取路径 CSV，返回 (t, x, y, vx, vy) 五个数组。时间必须严格递增"""
+    with open(path, newline="", encoding="utf-8") as f:
+        rows = list(csv.DictReader(f))
+    if not rows:
+        raise ValueError(f"{path}: no samples")
+    missing = {'t', 'x', 'y'} - set(rows[0])
+    if missing:
+        raise ValueError(f"{path}: missing column(s) {', '.join(sorted(missing))}")
+    names = ('t', 'x', 'y', 'vx', 'vy') if 'vx' in rows[0] and 'vy' in rows[0] else ('t', 'x', 'y')
+    columns = {name: np.array([float(row[name]) for row in rows]) for name in names}
+    # float() 接受 "nan" / "inf": 无穷远的距离无法求解，NaN 时刻与任何值比较都为假，会绕过下面的递增检查
+    bad_rows = np.flatnonzero(~np.isfinite(np.stack([columns[name] for name in names])).all(axis=0))
+    if bad_rows.size:
+        i = int(bad_rows[0])
+        not_finite = [name for name in names if not math.isfinite(columns[name][i])]
+        raise ValueError(f"{path}: line {i + 2}: non-finite {', '.join(not_finite)}")
+    t, x, y = columns['t'], columns['x'], columns['y']
+    if np.any(np.diff(t) <= 0):
+        raise ValueError(f"{path}: timestamps must be strictly increasing")
+    if 'vx' in columns:
+        vx, vy = columns['vx'], columns['vy']
+    elif t.size > 1:
+        vx, vy = np.gradient(x, t), np.gradient(y, t)
+    else:
+        vx, vy = np.zeros(1), np.zeros(1)
+    return t, x, y, vx, vy
+
+
+def path_calc_params(x, y, vx, vy, target_xy):
+    """为每个采样点生成 calc_params，字段与界面 draw_interactive_elements 中的相同 (长度单位为米)"""
+    dx, dy = target_xy[0] - np.asarray(x, dtype=float), target_xy[1] - np.asarray(y, dtype=float)
+    distance = np.hypot(dx, dy)
+    target_direction = np.degrees(np.arctan2(dy, dx))
+    speed = np.hypot(vx, vy)
+    vehicle_direction = np.degrees(np.arctan2(vy, vx))
+    return [{'distance_m': d, 'vehicle_speed_ms': s, 'vehicle_direction_deg': v, 'target_direction_deg': a}
+            for d, s, v, a in zip(distance.tolist(), speed.tolist(), vehicle_direction.tolist(),
+                                  target_direction.tolist())]
+
+
+def solve_segment(config, params_list, store_path=None):
+    """
+    依次求解路径上连续的一段 (在工作进程中运行)，每个点用前一个点的方案热启动；store_path 给出时先查询存储。
+    返回形状为 (点数, 4) 的数组: 俯仰角、方位角、发射器速度、飞行时间，无解处为 NaN。
+    """
+    solver = BallisticSolver(config)
+    store = SolutionStore(store_path) if store_path else None
+    results = np.full((len(params_list), 4), np.nan)
+    previous_solution = None
+    for i, params in enumerate(params_list):
+        if store is not None:
+            solution = store.solve(solver, params, warm_start=previous_solution)
+        else:
+            solution = solver.find_launch_solution(params, warm_start=previous_solution)
+        if solution is not None:
+            results[i] = (solution['launcher_angle'], solution['aim_azimuth_deg'], solution['launcher_velocity'],
+                          solution['time'])
+            previous_solution = solution
+    return results
+
+
+def solve_schedule(config, t, x, y, vx, vy, target_xy, workers=None, segment_size=128, max_rpm=None,
+                   store_path=None):
+    """
+    求解整条路径的射击方案，返回 ShotSchedule。
+
+    路径被切成 segment_size 个点一段交给进程池 (workers 为 1 或只有一段时在当前进程中求解)；
+    每段开头没有热启动，段内热启动，因此结果与分段方式有亚毫米每秒级的差异。
+    max_rpm 给出时，所需电机转速超过它的采样点也视为不可行。store_path 为方案存储的路径 (None 时不使用)。
+    """
+    config = config if config is not None else SolverConfig()
+    params_list = path_calc_params(x, y, vx, vy, target_xy)
+    segments = [params_list[i:i + segment_size] for i in range(0, len(params_list), segment_size)]
+    workers = min(workers or os.cpu_count() or 1, len(segments))
+    if workers <= 1:
+        results = [solve_segment(config, segment, store_path) for segment in segments]
+    else:
+        # 与热力图相同，用 spawn 启动工作进程: 调用方可能是有 Tk 和其他线程的界面进程
+        with ProcessPoolExecutor(max_workers=workers, mp_context=multiprocessing.get_context("spawn")) as executor:
+            results = list(executor.map(solve_segment, [config] * len(segments), segments,
+                                        [store_path] * len(segments)))
+    results = np.concatenate(results) if results else np.empty((0, 4))
+
+    solver = BallisticSolver(config)
+    launcher_velocity = results[:, 2]
+    motor_rpm = np.array([solver.calculate_motor_rpm(v) if v == v else math.nan
+                          for v in launcher_velocity.tolist()])
+    feasible = ~np.isnan(launcher_velocity)
+    if max_rpm is not None:
+        feasible &= motor_rpm <= max_rpm
+    return ShotSchedule(
+        t=np.asarray(t, dtype=float), x_m=np.asarray(x, dtype=float), y_m=np.asarray(y, dtype=float),
+        distance_m=np.array([params['distance_m'] for params in params_list]), feasible=feasible,
+        launcher_angle=results[:, 0], aim_azimuth_deg=results[:, 1], launcher_velocity=launcher_velocity,
+        motor_rpm=motor_rpm, flight_time=results[:, 3])
+
+
+def format_windows(schedule, limit=None):
+    windows = schedule.windows()
+    lines = [f"{start:8.3f} s - {end:8.3f} s  ({end - start:.3f} s)" for start, end in windows[:limit]]
+    if limit is not None and len(windows) > limit:
+        lines.append(f"... {len(windows) - limit} more")
+    return "\n".join(lines) if lines else "(no feasible samples)"
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Plan launch solutions along a timestamped robot path")
+    parser.add_argument("path", help="CSV with columns t, x, y and optionally vx, vy (seconds, meters)")
+    parser.add_argument("--target", required=True, help="target position X,Y in field meters")
+    parser.add_argument("--output", "-o", default=None, help="write the schedule as CSV")
+    parser.add_argument("--workers", type=int, default=None, help="worker processes (default: CPU count)")
+    parser.add_argument("--segment-size", type=int, default=128, help="samples per task (default 128)")
+    parser.add_argument("--max-rpm", type=float, default=None, help="treat samples above this motor RPM as infeasible")
+    parser.add_argument("--store", default=DEFAULT_STORE_PATH, help=f"solution store (default {DEFAULT_STORE_PATH})")
+    parser.add_argument("--no-store", action="store_true", help="always solve, do not read or write the store")
+    args = parser.parse_args()
+
+    target_xy = tuple(float(value) for value in args.target.split(","))
+    t, x, y, vx, vy = load_path(args.path)
+    start = time.perf_counter()
+    schedule = solve_schedule(SolverConfig(), t, x, y, vx, vy, target_xy, args.workers, args.segment_size,
+                              args.max_rpm, None if args.no_store else args.store)
+    elapsed = time.perf_counter() - start
+    if args.output:
+        schedule.save_csv(args.output)
+    print(f"Solved {len(schedule)} samples in {elapsed:.2f} s, "
+          f"{np.count_nonzero(schedule.feasible)} feasible. Firing windows:")
+    print(format_windows(schedule))
+
+
+if __name__ == "__main__":
+    main()
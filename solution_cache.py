@@ -0,0 +1,124 @@
+"""
+    发射方案缓存 (无 GUI 依赖)
+
+    以量化后的 calc_params 和常量指纹为键缓存 find_launch_solution 的结果，容量有限，按 LRU 淘汰。
+    量化精度内的两次请求视为相同 (返回先算出的那个方案)，常量指纹不同的条目永远不会命中。
+    可以在后面接一个 solution_store.SolutionStore，内存中未命中时先查磁盘，再调用解算器。
+"""
+
+import math
+import threading
+from collections import OrderedDict
+
+from solver import solution_fingerprint
+
+# 各输入量的默认量化精度
+DEFAULT_RESOLUTIONS = {
+    'distance_m': 0.001,
+    'vehicle_speed_ms': 0.01,
+    'vehicle_direction_deg': 0.1,
+    'target_direction_deg': 0.1,
+}
+# 方向角按 360° 取模后再量化，179.99° 和 -180° 是同一个方向
+_ANGLE_KEYS = ('vehicle_direction_deg', 'target_direction_deg')
+
+
+def quantize_params(params, resolutions):
+    """
+    按 resolutions 量化 calc_params，返回整数元组 (顺序与 resolutions 相同)。
+    NaN 或无穷大没有对应的键，抛出 ValueError；缓存和存储遇到时不缓存，直接交给解算器。
+    """
+    quantized = []
+    for name, resolution in resolutions.items():
+        if not math.isfinite(params[name]):
+            raise ValueError(f"cannot quantize non-finite {name}: {params[name]}")
+        value = params[name] % 360.0 if name in _ANGLE_KEYS else params[name]
+        quantized.append(round(value / resolution))
+    return tuple(quantized)
+
+
+class SolutionCache:
+    """find_launch_solution 的 LRU 缓存，可以在多个线程间共享"""
+
+    def __init__(self, max_entries=4096, resolutions=None, store=None):
+        self.max_entries = max_entries
+        self.resolutions = dict(DEFAULT_RESOLUTIONS, **(resolutions or {}))
+        self.store = store  # 可选的磁盘存储，内存未命中时查询，新算出的方案同时写入
+        self._entries = OrderedDict()  # 键 -> 方案 (无解为 None)
+        self._lock = threading.Lock()
+        self.hits = self.misses = self.evictions = self.invalidations = 0
+
+    def key(self, params, fingerprint):
+        return fingerprint, quantize_params(params, self.resolutions)
+
+    def get(self, solver, params):
+        """只查询不求解: 返回 (是否命中, 方案)。未命中不计入 misses，之后通常还会调用 solve"""
+        try:
+            key = self.key(params, solution_fingerprint(solver.config))
+        except ValueError:
+            return False, None
+        with self._lock:
+            if key not in self._entries:
+                return False, None
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return True, self._entries[key]
+
+    def solve(self, solver, params, warm_start=None, cancelled=None, progress=None):
+        """
+        命中时直接返回缓存的方案，否则 (经由 store，若有) 调用 solver.find_launch_solution 并缓存结果。
+        求解被 cancelled 取消时 SolveCancelled 直接传给调用方，不写入缓存。
+        progress 只在未命中时收到中间结果，缓存中只保存最终方案。
+        输入无法量化 (NaN 或无穷大) 时不查询也不写入缓存和存储，直接求解。
+        """
+        try:
+            key = self.key(params, solution_fingerprint(solver.config))
+        except ValueError:
+            return solver.find_launch_solution(params, warm_start=warm_start, cancelled=cancelled,
+                                               progress=progress)
+        with self._lock:
+            if key in self._entries:
+                self._entries.move_to_end(key)
+                self.hits += 1
+                return self._entries[key]
+            self.misses += 1
+
+        # 求解时不持有锁，其他线程仍可以查询
+        if self.store is not None:
+            solution = self.store.solve(solver, params, warm_start=warm_start, cancelled=cancelled, progress=progress)
+        else:
+            solution = solver.find_launch_solution(params, warm_start=warm_start, cancelled=cancelled,
+                                                   progress=progress)
+        with self._lock:
+            self._entries[key] = solution
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+                self.evictions += 1
+        return solution
+
+    def invalidate(self, config=None):
+        """
+        删除失效的条目: 传入 config 时只删除常量指纹与之不同的条目 (例如首选项保存后)，否则全部清空。
+        返回删除的条目数。
+        """
+        fingerprint = solution_fingerprint(config) if config is not None else None
+        with self._lock:
+            stale = [key for key in self._entries if key[0] != fingerprint]
+            for key in stale:
+                del self._entries[key]
+            self.invalidations += len(stale)
+        return len(stale)
+
+    def stats(self):
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                'entries': len(self._entries),
+                'max_entries': self.max_entries,
+                'hits': self.hits,
+                'misses': self.misses,
+                'hit_rate': self.hits / lookups if lookups else 0.0,
+                'evictions': self.evictions,
+                'invalidations': self.invalidations,
+            }
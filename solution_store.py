@@ -0,0 +1,168 @@
+"""
+    跨会话、跨进程共享的发射方案磁盘存储 (SQLite，无 GUI 依赖)
+
+    键为常量指纹的摘要加上与 SolutionCache 相同的量化输入，值为方案的 JSON (无解为 null)。
+    数据库使用 WAL 模式，多个进程 (界面、批量解算、解算服务) 可以同时读写同一个文件。
+    每写入 _EVICTION_CHECK_INTERVAL 条检查一次条目数，超过 max_entries 时按最近使用时间淘汰最旧的条目。
+
+    数据库不可用 (只读目录、被长时间锁住等) 时只打印一次警告，之后当作未命中处理，不影响求解。
+"""
+
+import hashlib
+import json
+import os
+import sqlite3
+import threading
+import time
+
+from solution_cache import DEFAULT_RESOLUTIONS, quantize_params
+from solver import solution_fingerprint
+
+# 与场地背景图缓存相同的目录: $XDG_CACHE_HOME/the-archer，未设置时为 ~/.cache/the-archer
+DEFAULT_STORE_PATH = os.path.join(os.environ.get("XDG_CACHE_HOME") or os.path.join(os.path.expanduser("~"), ".cache"),
+                                  "the-archer", "solutions.sqlite")
+
+# 每写入这么多条检查一次是否需要淘汰；淘汰时多删除 max_entries 的这个比例，避免每次写入都触发淘汰
+_EVICTION_CHECK_INTERVAL = 256
+_EVICTION_SLACK = 0.1
+# 其他进程持有写锁时最多等待的秒数
+_BUSY_TIMEOUT_S = 5.0
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS solutions (
+    key TEXT PRIMARY KEY,
+    solution TEXT,
+    last_used REAL NOT NULL
+) WITHOUT ROWID;
+CREATE INDEX IF NOT EXISTS solutions_last_used ON solutions (last_used);
+"""
+
+
+def config_digest(config):
+    """影响发射方案的全部常量的摘要，常量任何一个改变都会得到不同的键"""
+    return hashlib.sha1(repr(solution_fingerprint(config)).encode("utf-8")).hexdigest()[:16]
+
+
+class SolutionStore:
+    """SQLite 方案存储。每个线程使用各自的连接，对象本身可以在线程间共享"""
+
+    def __init__(self, path=DEFAULT_STORE_PATH, max_entries=200000, resolutions=None):
+        self.path = path
+        self.max_entries = max_entries
+        self.resolutions = dict(DEFAULT_RESOLUTIONS, **(resolutions or {}))
+        self._local = threading.local()
+        self._lock = threading.Lock()
+        self._writes_since_check = _EVICTION_CHECK_INTERVAL  # 第一次写入时就检查一次
+        self._failed = False
+        self.hits = self.misses = self.writes = self.evictions = 0
+
+    def _connection(self):
+        connection = getattr(self._local, 'connection', None)
+        if connection is None:
+            directory = os.path.dirname(self.path)
+            if directory:
+                os.makedirs(directory, exist_ok=True)
+            # 自动提交模式，每条语句都是独立的事务；WAL 下读不阻塞写，写只在提交的瞬间互斥
+            connection = sqlite3.connect(self.path, timeout=_BUSY_TIMEOUT_S, isolation_level=None)
+            connection.execute("PRAGMA journal_mode=WAL")
+            connection.execute("PRAGMA synchronous=NORMAL")
+            connection.executescript(_SCHEMA)
+            self._local.connection = connection
+        return connection
+
+    def _warn(self, error):
+        if not self._failed:
+            self._failed = True
+            print(f"Warning: solution store {self.path} unavailable: {error}")
+
+    def key(self, config, params):
+        return f"{config_digest(config)}:{','.join(map(str, quantize_params(params, self.resolutions)))}"
+
+    def get(self, config, params):
+        """返回 (是否命中, 方案)，命中时更新条目的最近使用时间。输入无法量化 (NaN 或无穷大) 时视为未命中"""
+        try:
+            key = self.key(config, params)
+        except ValueError:
+            return False, None
+        try:
+            connection = self._connection()
+            row = connection.execute("SELECT solution FROM solutions WHERE key = ?", (key,)).fetchone()
+            if row is not None:
+                connection.execute("UPDATE solutions SET last_used = ? WHERE key = ?", (time.time(), key))
+        except (sqlite3.Error, OSError) as e:
+            self._warn(e)
+            return False, None
+        with self._lock:
+            if row is None:
+                self.misses += 1
+                return False, None
+            self.hits += 1
+        return True, json.loads(row[0])
+
+    def put(self, config, params, solution):
+        """写入方案；输入无法量化时不写入"""
+        try:
+            key = self.key(config, params)
+        except ValueError:
+            return
+        try:
+            connection = self._connection()
+            connection.execute("INSERT OR REPLACE INTO solutions (key, solution, last_used) VALUES (?, ?, ?)",
+                               (key, json.dumps(solution), time.time()))
+            with self._lock:
+                self.writes += 1
+                self._writes_since_check += 1
+                check = self._writes_since_check >= _EVICTION_CHECK_INTERVAL
+                if check:
+                    self._writes_since_check = 0
+            if check:
+                self._evict(connection)
+        except (sqlite3.Error, OSError) as e:
+            self._warn(e)
+
+    def _evict(self, connection):
+        """条目数超过 max_entries 时删除最久未使用的条目，删到比上限少 _EVICTION_SLACK"""
+        count = connection.execute("SELECT COUNT(*) FROM solutions").fetchone()[0]
+        if count <= self.max_entries:
+            return
+        excess = count - int(self.max_entries * (1.0 - _EVICTION_SLACK))
+        deleted = connection.execute(
+            "DELETE FROM solutions WHERE key IN (SELECT key FROM solutions ORDER BY last_used LIMIT ?)",
+            (excess,)).rowcount
+        with self._lock:
+            self.evictions += deleted
+
+    def solve(self, solver, params, warm_start=None, cancelled=None, progress=None):
+        """先查存储，未命中时调用 solver.find_launch_solution 并写入结果 (被取消的求解不写入)"""
+        hit, solution = self.get(solver.config, params)
+        if hit:
+            return solution
+        solution = solver.find_launch_solution(params, warm_start=warm_start, cancelled=cancelled, progress=progress)
+        self.put(solver.config, params, solution)
+        return solution
+
+    def stats(self):
+        try:
+            entries = self._connection().execute("SELECT COUNT(*) FROM solutions").fetchone()[0]
+        except (sqlite3.Error, OSError) as e:
+            self._warn(e)
+            entries = None
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                'path': self.path,
+                'entries': entries,
+                'max_entries': self.max_entries,
+                'hits': self.hits,
+                'misses': self.misses,
+                'hit_rate': self.hits / lookups if lookups else 0.0,
+                'writes': self.writes,
+                'evictions': self.evictions,
+            }
+
+    def close(self):
+        """关闭当前线程的连接 (其他线程的连接随线程结束回收)"""
+        connection = getattr(self._local, 'connection', None)
+        if connection is not None:
+            connection.close()
+            self._local.connection = None
@@ -0,0 +1,331 @@
+"""
+    局域网瞄准解算服务 (无 GUI 依赖)
+
+    基于 asyncio，接收 UDP 数据报或 TCP 连接上的定长二进制请求，返回定长二进制应答。
+    每个客户端 (UDP 地址或 TCP 连接) 只处理最新的请求: 排队中的旧请求被新请求替换，正在求解的旧请求被取消。
+    加载射表时直接查表；否则先查方案缓存，未命中才在后台线程中求解。
+
+    用法:
+        python solve_server.py serve --port 5810 [--tcp-port 5811] [--firing-table table.ftbl]
+        python solve_server.py client --port 5810 --rate 100 --count 1000   # 本机测试客户端，输出往返延迟
+
+    请求 (22 字节，小端): magic 'A' (u8), 版本 (u8), 序号 (u32),
+        distance_m, vehicle_speed_ms, vehicle_direction_deg, target_direction_deg (f32 x 4)
+    应答 (32 字节，小端): magic 'A' (u8), 版本 (u8), 状态 (u8), 来源 (u8), 序号 (u32),
+        launcher_angle, aim_azimuth_deg, launcher_velocity, time, motor_rpm (f32 x 5), 服务端耗时 (u32，微秒)
+"""
+
+import argparse
+import asyncio
+import json
+import math
+import struct
+import sys
+import time
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+
+import numpy as np
+
+from firing_table import FiringTable, solver_constants
+from instrumentation import Instrumentation
+from solution_cache import SolutionCache
+from solution_store import DEFAULT_STORE_PATH, SolutionStore
+from solver import BallisticSolver, SolverConfig, SolveCancelled
+
+MAGIC = 0x41
+PROTOCOL_VERSION = 1
+REQUEST = struct.Struct('<BBIffff')
+RESPONSE = struct.Struct('<BBBBIfffffI')
+
+# 应答状态
+STATUS_OK, STATUS_NO_SOLUTION, STATUS_BAD_REQUEST = 0, 1, 2
+# 方案来源
+SOURCE_SOLVER, SOURCE_CACHE, SOURCE_FIRING_TABLE = 0, 1, 2
+SOURCE_NAMES = {SOURCE_SOLVER: 'solver', SOURCE_CACHE: 'cache', SOURCE_FIRING_TABLE: 'firing_table'}
+
+CALC_PARAM_NAMES = ('distance_m', 'vehicle_speed_ms', 'vehicle_direction_deg', 'target_direction_deg')
+# 序号落后最新序号不超过该值的请求视为乱序到达的旧请求并丢弃；落后更多则认为客户端重新开始计数。
+# 局域网内乱序通常只有几个包，窗口太大会让重启后从较小序号重新计数的客户端长时间得不到应答
+_REORDER_WINDOW = 64
+
+
+def pack_request(sequence, params):
+    return REQUEST.pack(MAGIC, PROTOCOL_VERSION, sequence & 0xFFFFFFFF, *(params[name] for name in CALC_PARAM_NAMES))
+
+
+def unpack_request(data):
+    """返回 (序号, calc_params)，格式不对时抛出 ValueError"""
+    if len(data) != REQUEST.size:
+        raise ValueError(f"expected {REQUEST.size} bytes, got {len(data)}")
+    magic, version, sequence, *values = REQUEST.unpack(data)
+    if magic != MAGIC or version != PROTOCOL_VERSION:
+        raise ValueError("bad magic or protocol version")
+    if not all(math.isfinite(value) for value in values):
+        raise ValueError("non-finite parameter")
+    return sequence, dict(zip(CALC_PARAM_NAMES, values))
+
+
+def pack_response(sequence, status, source=SOURCE_SOLVER, solution=None, motor_rpm=0.0, latency_us=0):
+    values = (solution['launcher_angle'], solution['aim_azimuth_deg'], solution['launcher_velocity'],
+              solution['time']) if solution else (0.0, 0.0, 0.0, 0.0)
+    return RESPONSE.pack(MAGIC, PROTOCOL_VERSION, status, source, sequence, *values, motor_rpm,
+                         min(int(latency_us), 0xFFFFFFFF))
+
+
+def unpack_response(data):
+    magic, version, status, source, sequence, angle, azimuth, velocity, flight_time, rpm, latency_us = \
+        RESPONSE.unpack(data)
+    if magic != MAGIC or version != PROTOCOL_VERSION:
+        raise ValueError("bad magic or protocol version")
+    return {'sequence': sequence, 'status': status, 'source': source, 'launcher_angle': angle,
+            'aim_azimuth_deg': azimuth, 'launcher_velocity': velocity, 'time': flight_time, 'motor_rpm': rpm,
+            'server_latency_us': latency_us}
+
+
+class SolveService:
+    """
+    按客户端合并请求并依次求解。submit 在事件循环中调用，run() 为常驻的求解任务，
+    求解在单独的线程中进行，期间事件循环继续接收请求。
+    """
+
+    def __init__(self, config=None, firing_table=None, cache=None, instrumentation=None):
+        self.solver = BallisticSolver(config)
+        self.firing_table = firing_table
+        self.cache = cache if cache is not None else SolutionCache()
+        self.instrumentation = instrumentation if instrumentation is not None else Instrumentation()
+        self.executor = ThreadPoolExecutor(max_workers=1)
+        self.pending = {}  # 客户端 -> (序号, calc_params, 应答函数, 收到时刻)，只保留最新一个
+        self.order = deque()  # 有待处理请求的客户端，按先后轮流服务
+        self.latest_sequence = {}  # 客户端 -> 收到的最新序号
+        self.warm_starts = {}  # 客户端 -> 上一个方案
+        self.wakeup = asyncio.Event()
+        self.served = self.coalesced = self.cancelled = self.rejected = self.failed = self.restarts = 0
+
+    def submit(self, client, data, reply):
+        received_at = time.perf_counter()
+        try:
+            sequence, params = unpack_request(data)
+        except (ValueError, struct.error):
+            self.rejected += 1
+            sequence = struct.unpack_from('<I', data, 2)[0] if len(data) >= 6 else 0
+            reply(pack_response(sequence, STATUS_BAD_REQUEST))
+            return
+        latest = self.latest_sequence.get(client)
+        if latest is not None:
+            behind = (latest - sequence) % 2 ** 32
+            # 序号回到 0 说明客户端重新开始计数 (例如机器人代码重启)，即使落在乱序窗口内也不能丢弃
+            if behind < _REORDER_WINDOW and not (sequence == 0 and behind):
+                self.coalesced += 1  # 重复或乱序到达的旧请求
+                return
+            if behind < 2 ** 31:
+                self.restarts += 1  # 序号大幅后退: 重新开始计数，以新的序号为准
+        self.latest_sequence[client] = sequence
+
+        # 射表和缓存只需几微秒，直接在事件循环中应答
+        solution, source = None, None
+        if self.firing_table is not None:
+            solution, source = self.firing_table.lookup(params), SOURCE_FIRING_TABLE
+        if solution is None:
+            hit, solution = self.cache.get(self.solver, params)
+            source = SOURCE_CACHE if hit else None
+        if source is not None:
+            self.pending.pop(client, None)
+            self.respond(client, sequence, solution, source, reply, received_at)
+            return
+
+        if client in self.pending:
+            self.coalesced += 1
+        else:
+            self.order.append(client)
+        self.pending[client] = (sequence, params, reply, received_at)
+        self.wakeup.set()
+
+    def solve(self, client, sequence, params):
+        """在求解线程中运行；同一客户端有更新的请求时放弃"""
+        return self.cache.solve(self.solver, params, warm_start=self.warm_starts.get(client),
+                                cancelled=lambda: self.latest_sequence.get(client) != sequence)
+
+    def respond(self, client, sequence, solution, source, reply, received_at):
+        if client not in self.latest_sequence:
+            return  # 求解期间 TCP 连接已断开: 不再写入已关闭的连接，也不为它保留热启动方案
+        if solution is not None:
+            self.warm_starts[client] = solution
+        latency_us = (time.perf_counter() - received_at) * 1e6
+        status = STATUS_OK if solution is not None else STATUS_NO_SOLUTION
+        motor_rpm = self.solver.calculate_motor_rpm(solution['launcher_velocity']) if solution else 0.0
+        reply(pack_response(sequence, status, source, solution, motor_rpm, latency_us))
+        self.served += 1
+        self.instrumentation.record('request', {'server_latency_ms': latency_us / 1000,
+                                                'source': SOURCE_NAMES[source]})
+
+    async def run(self):
+        loop = asyncio.get_running_loop()
+        while True:
+            await self.wakeup.wait()
+            self.wakeup.clear()
+            while self.order:
+                client = self.order.popleft()
+                if client not in self.pending:
+                    continue  # 排队期间已由射表或缓存应答
+                sequence, params, reply, received_at = self.pending.pop(client)
+                try:
+                    solution = await loop.run_in_executor(self.executor, self.solve, client, sequence, params)
+                except SolveCancelled:
+                    self.cancelled += 1
+                    continue
+                except Exception as e:
+                    # 单个请求求解出错时应答无解并继续服务，常驻任务一旦退出之后的请求都得不到应答
+                    self.failed += 1
+                    message = f"solve failed for {client} #{sequence} {params}: {type(e).__name__}: {e}"
+                    # 只写入日志的字符串字段，不混入按数值统计的指标
+                    self.instrumentation.record('solve_error', {'error': message})
+                    print(message, file=sys.stderr)
+                    solution = None
+                self.respond(client, sequence, solution, SOURCE_SOLVER, reply, received_at)
+
+    def forget(self, client):
+        """TCP 连接断开时清理该客户端的状态"""
+        for table in (self.pending, self.latest_sequence, self.warm_starts):
+            table.pop(client, None)
+
+    def report(self):
+        return (f"served {self.served}, coalesced {self.coalesced}, cancelled {self.cancelled}, "
+                f"rejected {self.rejected}, failed {self.failed}, restarts {self.restarts}\n"
+                f"{self.instrumentation.format_summary()}")
+
+
+class _UdpServerProtocol(asyncio.DatagramProtocol):
+    def __init__(self, service):
+        self.service = service
+        self.transport = None
+
+    def connection_made(self, transport):
+        self.transport = transport
+
+    def datagram_received(self, data, addr):
+        self.service.submit(addr, data, lambda response: self.transport.sendto(response, addr))
+
+
+async def _handle_tcp(service, reader, writer):
+    client = ('tcp', writer.get_extra_info('peername'))
+    try:
+        while True:
+            data = await reader.readexactly(REQUEST.size)
+            service.submit(client, data, writer.write)
+    except (asyncio.IncompleteReadError, ConnectionError):
+        pass
+    finally:
+        service.forget(client)
+        writer.close()
+
+
+async def serve(host, port, tcp_port=None, config=None, firing_table=None, report_interval_s=10.0, store_path=None):
+    # 内存缓存之后接磁盘方案存储 (若有)，重启后常见位置仍然可以直接命中
+    cache = SolutionCache(store=SolutionStore(store_path) if store_path else None)
+    service = SolveService(config, firing_table, cache)
+    service.instrumentation.enable()
+    loop = asyncio.get_running_loop()
+    transport, _ = await loop.create_datagram_endpoint(lambda: _UdpServerProtocol(service), local_addr=(host, port))
+    servers = [transport]
+    print(f"Listening on udp://{host}:{port}", file=sys.stderr)
+    if tcp_port is not None:
+        tcp_server = await asyncio.start_server(lambda r, w: _handle_tcp(service, r, w), host, tcp_port)
+        servers.append(tcp_server)
+        print(f"Listening on tcp://{host}:{tcp_port}", file=sys.stderr)
+    solve_task = asyncio.create_task(service.run())
+    try:
+        while True:
+            await asyncio.sleep(report_interval_s)
+            print(service.report(), file=sys.stderr)
+    finally:
+        solve_task.cancel()
+        for server in servers:
+            server.close()
+        service.executor.shutdown(wait=False)
+
+
+class _UdpClientProtocol(asyncio.DatagramProtocol):
+    def __init__(self, sent_at, responses):
+        self.sent_at = sent_at
+        self.responses = responses
+
+    def datagram_received(self, data, addr):
+        received_at = time.perf_counter()
+        response = unpack_response(data)
+        response['round_trip_ms'] = (received_at - self.sent_at.pop(response['sequence'], received_at)) * 1000
+        self.responses.append(response)
+
+
+async def run_client(host, port, rate_hz=100.0, count=1000, vehicle_speed_ms=1.0):
+    """
+    以 rate_hz 的频率发送 count 个请求，模拟机器人在场上来回移动，返回收到的应答列表。
+    没有收到应答的请求被服务端合并掉 (或丢包)。
+    """
+    loop = asyncio.get_running_loop()
+    sent_at, responses = {}, []
+    transport, _ = await loop.create_datagram_endpoint(lambda: _UdpClientProtocol(sent_at, responses),
+                                                       remote_addr=(host, port))
+    try:
+        start = time.perf_counter()
+        for sequence in range(count):
+            phase = sequence / rate_hz
+            params = {'distance_m': 2.5 + 1.5 * math.sin(0.5 * phase), 'vehicle_speed_ms': vehicle_speed_ms,
+                      'vehicle_direction_deg': (20.0 * phase) % 360.0, 'target_direction_deg': 30.0}
+            sent_at[sequence] = time.perf_counter()
+            transport.sendto(pack_request(sequence, params))
+            await asyncio.sleep(max(0.0, start + (sequence + 1) / rate_hz - time.perf_counter()))
+        await asyncio.sleep(0.5)  # 等待最后的应答
+    finally:
+        transport.close()
+    return responses
+
+
+def _client_summary(responses, count):
+    summary = {'sent': count, 'answered': len(responses)}
+    if responses:
+        round_trips = [response['round_trip_ms'] for response in responses]
+        server = [response['server_latency_us'] / 1000 for response in responses]
+        for name, values in (('round_trip_ms', round_trips), ('server_latency_ms', server)):
+            p50, p99 = np.percentile(values, (50, 99))
+            summary[name] = {'p50': round(float(p50), 3), 'p99': round(float(p99), 3),
+                             'max': round(float(max(values)), 3)}
+        summary['sources'] = {name: sum(response['source'] == source for response in responses)
+                              for source, name in SOURCE_NAMES.items()}
+    return summary
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Low-latency aiming solve server")
+    subparsers = parser.add_subparsers(dest="command", required=True)
+    serve_parser = subparsers.add_parser("serve", help="run the solve server")
+    serve_parser.add_argument("--host", default="0.0.0.0")
+    serve_parser.add_argument("--port", type=int, default=5810, help="UDP port")
+    serve_parser.add_argument("--tcp-port", type=int, default=None, help="also accept TCP connections on this port")
+    serve_parser.add_argument("--firing-table", help="answer from this firing table when possible")
+    serve_parser.add_argument("--report-interval", type=float, default=10.0, help="seconds between stats reports")
+    serve_parser.add_argument("--store", default=DEFAULT_STORE_PATH,
+                              help=f"solution store (default {DEFAULT_STORE_PATH})")
+    serve_parser.add_argument("--no-store", action="store_true", help="do not read or write the solution store")
+    client_parser = subparsers.add_parser("client", help="send test requests and report latency")
+    client_parser.add_argument("--host", default="127.0.0.1")
+    client_parser.add_argument("--port", type=int, default=5810)
+    client_parser.add_argument("--rate", type=float, default=100.0, help="requests per second")
+    client_parser.add_argument("--count", type=int, default=1000)
+    args = parser.parse_args()
+
+    if args.command == "serve":
+        config = SolverConfig()
+        firing_table = FiringTable.load(args.firing_table, solver_constants(config)) if args.firing_table else None
+        try:
+            asyncio.run(serve(args.host, args.port, args.tcp_port, config, firing_table, args.report_interval,
+                              None if args.no_store else args.store))
+        except KeyboardInterrupt:
+            pass
+    else:
+        responses = asyncio.run(run_client(args.host, args.port, args.rate, args.count))
+        print(json.dumps(_client_summary(responses, args.count), indent=2))
+
+
+if __name__ == "__main__":
+    main()
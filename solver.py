@@ -0,0 +1,622 @@
+"""
+    弹道解算器 (无 GUI 依赖)
+
+    只依赖 numpy，可以在机器人端、批处理脚本或多个进程中独立使用。
+    所有常量都放在不可变的 SolverConfig 中，不同配置可以各自创建 BallisticSolver 实例。
+"""
+
+import math
+from dataclasses import dataclass, fields
+
+import numpy as np
+
+from ballistics import simulate_batch, simulate_trajectory, compensate_for_vehicle, decimate_path
+
+# 可选的积分方法，含义见 ballistics.simulate_batch
+INTEGRATOR_CHOICES = ('euler', 'rk4', 'dopri5')
+
+# 黄金分割比 (3 - sqrt(5)) / 2
+_GOLDEN_SECTION = 0.3819660112501051
+
+# 记录路径时按估算飞行时间的该倍数预分配缓冲区，不够时再加倍
+_PATH_CAPACITY_MARGIN = 1.5
+_EMPTY_PATH = np.empty(0)
+
+# 弹道条数不超过该值时逐条积分；条数很少时 numpy 每步的固定开销比纯 Python 循环还大
+_SCALAR_SIMULATION_LIMIT = 16
+
+# 方案的精度等级 (方案字典中的 'quality')，数值越大越精确，见 find_launch_solution 的 progress 参数
+QUALITY_ESTIMATE = 0  # estimate_launch_solution: 不搜索俯仰角，速度只做一步修正
+QUALITY_BRACKET = 1  # 粗搜索或热启动中最好的采样俯仰角，速度已精确求解
+QUALITY_REFINED = 2  # 俯仰角寻优收敛后的最终方案
+QUALITY_NAMES = ('estimate', 'bracket', 'refined')
+# estimate_launch_solution 最多积分的弹道条数
+_ESTIMATE_SIMULATIONS = 4
+
+
+class SolveCancelled(Exception):
+    """求解过程中 cancelled() 返回 True 时抛出，表示结果已经不再需要"""
+
+
+@dataclass(frozen=True)
+class SolverConfig:
+    """解算器的全部可配置常量，字段名与首选项窗口中的名称一致"""
+
+    # --- 物理常量 ---
+    GRAVITY_MS2: float = 9.81
+    AIR_DENSITY: float = 1.225
+    HEIGHT_M: float = 1.065
+    MASS_KG: float = 0.012
+    DRAG_COEFFICIENT: float = 0.25
+    CROSS_SECTIONAL_AREA_M2: float = 0.00928
+
+    # --- 计算参数 ---
+    MIN_ANGLE_DEG: float = 55.0
+    MAX_ANGLE_DEG: float = 90.0
+    COARSE_PITCH_SAMPLES: int = 8  # 先在俯仰角范围内均匀取这么多个角度求解，找出最优解所在的区间
+    ANGLE_BATCH_SIZE: int = 4  # 粗搜索时每次批量求解的俯仰角个数
+    PITCH_TOLERANCE_DEG: float = 0.05  # 俯仰角寻优的收敛精度
+    MAX_PITCH_ITERATIONS: int = 30
+    WARM_START_GROWTH_FACTOR: float = 1.02  # 有可靠的速度预测时，区间扩展使用的等比
+    WARM_START_PITCH_STEP_DEG: float = 0.5  # 热启动时最优解已移动，沿下降方向扩大搜索窗口的距离
+    BRACKET_GROWTH_FACTOR: float = 1.25  # 寻找速度区间时相邻两个候选速度之比
+    BRACKET_POINTS_PER_SWEEP: int = 4  # 寻找速度区间时每次批量积分测试的速度个数
+    MAX_BRACKET_SWEEPS: int = 8
+    MAX_VELOCITY_MS: float = 60.0  # 速度区间扩展的上限，超过仍无法击中的俯仰角视为无解
+    ROOT_HEIGHT_TOLERANCE_M: float = 0.001  # 击中高度与目标高度之差小于该值时停止求根
+    MAX_ROOT_ITERATIONS: int = 30
+    HIT_TOLERANCE_M: float = 0.055
+    TIME_STEP_S: float = 0.006  # 欧拉法和 RK4 的固定步长，也是 Dormand-Prince 的初始步长
+    INTEGRATOR: str = 'euler'  # 积分方法: 'euler' / 'rk4' / 'dopri5'
+    INTEGRATION_TOLERANCE_M: float = 1e-4  # Dormand-Prince 每步的误差上限
+
+    # --- 发射器硬件常量 ---
+    MOTOR_RPM_LOSS_FACTOR_PERCENT: int = 55
+    FRICTION_WHEEL_DIAMETER_M: float = 0.072
+
+
+# 影响发射方案的常量，即除发射器硬件常量 (只用于换算电机转速) 以外的全部字段
+SOLUTION_CONSTANTS = tuple(field.name for field in fields(SolverConfig)
+                           if field.name not in ('MOTOR_RPM_LOSS_FACTOR_PERCENT', 'FRICTION_WHEEL_DIAMETER_M'))
+
+
+def solution_fingerprint(config):
+    """find_launch_solution 结果所依赖的全部常量，两个配置的指纹相同则解相同"""
+    return tuple(getattr(config, name) for name in SOLUTION_CONSTANTS)
+
+
+class BallisticSolver:
+    """根据 SolverConfig 求解发射方案"""
+
+    def __init__(self, config=None):
+        self.config = config if config is not None else SolverConfig()
+        # 累计的仿真弹道条数、导数计算次数、速度区间扩展轮数和求根迭代轮数，供性能统计使用
+        self.simulation_count = 0
+        self.derivative_evaluations = 0
+        self.bracket_sweeps = 0
+        self.root_iterations = 0
+
+    def calculate_motor_rpm(self, velocity_ms):
+        config = self.config
+        if velocity_ms <= 0:
+            return 0
+        theoretical_rpm = (velocity_ms * 60) / (math.pi * config.FRICTION_WHEEL_DIAMETER_M)
+        estimated_rpm = theoretical_rpm * (1 + config.MOTOR_RPM_LOSS_FACTOR_PERCENT / 100.0)
+        return estimated_rpm
+
+    def run_simulation_for_angle_and_velocity(self, launch_angle_deg, initial_velocity_ms, distance_m,
+                                              return_path=False):
+        """
+        积分单条弹道，返回 (击中高度, 飞行时间)，未到达目标平面时为 (-1.0, -1.0)。
+        return_path 为 True 时另外返回路径 path_x, path_y (NumPy 数组，未命中时为空数组)。
+        """
+        config = self.config
+        if config.INTEGRATOR != 'euler':
+            stats = {}
+            hit_h, hit_t, path_x, path_y = simulate_trajectory(
+                launch_angle_deg, initial_velocity_ms, distance_m, **self.physics_kwargs(),
+                method=config.INTEGRATOR, tolerance_m=config.INTEGRATION_TOLERANCE_M, stats=stats)
+            self.derivative_evaluations += stats.get('derivative_evaluations', 0)
+            return (hit_h, hit_t, np.asarray(path_x), np.asarray(path_y)) if return_path else (hit_h, hit_t)
+
+        angle_rad = math.radians(launch_angle_deg)
+        vx, vy = initial_velocity_ms * math.cos(angle_rad), initial_velocity_ms * math.sin(angle_rad)
+        x, y, current_time = 0.0, 0.0, 0.0
+
+        # 与 ballistics.simulate_batch 的欧拉法按相同的顺序运算，两者的结果逐位一致
+        time_step_s = config.TIME_STEP_S
+        drag_per_mass_dt = (0.5 * config.AIR_DENSITY * config.DRAG_COEFFICIENT * config.CROSS_SECTIONAL_AREA_M2
+                            / config.MASS_KG) * time_step_s
+        gravity_dt = config.GRAVITY_MS2 * time_step_s
+
+        if return_path:
+            # 路径写入预分配的数组而不是逐步追加到列表，每步不必新建 float 对象
+            capacity = self.estimate_path_steps(launch_angle_deg, initial_velocity_ms, distance_m)
+            path_x, path_y = np.empty(capacity), np.empty(capacity)
+            path_x[0] = path_y[0] = 0.0
+            count = 1
+
+        while True:
+            if (vx <= 0 and x < distance_m) or (y < 0 and vy < 0):
+                self.derivative_evaluations += round(current_time / time_step_s)
+                return (-1.0, -1.0, _EMPTY_PATH, _EMPTY_PATH) if return_path else (-1.0, -1.0)
+
+            prev_x, prev_y = x, y
+
+            drag_dt = drag_per_mass_dt * math.sqrt(vx * vx + vy * vy)
+            vx = vx - drag_dt * vx
+            vy = vy - (gravity_dt + drag_dt * vy)
+            x = x + vx * time_step_s
+            y = y + vy * time_step_s
+            current_time += time_step_s
+
+            if return_path:
+                if count == path_x.size:
+                    path_x, path_y = np.resize(path_x, 2 * count), np.resize(path_y, 2 * count)
+                path_x[count], path_y[count] = x, y
+                count += 1
+
+            if x >= distance_m:
+                # 欧拉法每步计算一次导数，步数由飞行时间得出，循环中不必单独计数
+                self.derivative_evaluations += round(current_time / time_step_s)
+                if (x - prev_x) == 0:
+                    hit_h, hit_t = y, current_time
+                else:
+                    frac = (distance_m - prev_x) / (x - prev_x)
+                    hit_h = prev_y + (y - prev_y) * frac
+                    hit_t = (current_time - time_step_s) + time_step_s * frac
+
+                if return_path:
+                    path_x[count - 1], path_y[count - 1] = distance_m, hit_h
+                    return hit_h, hit_t, path_x[:count], path_y[:count]
+
+                return hit_h, hit_t
+
+    def estimate_path_steps(self, launch_angle_deg, initial_velocity_ms, distance_m):
+        """
+        记录路径所需的步数估计: 取无阻力时水平到达目标距离和落回地面两者中较短的飞行时间，
+        乘以 _PATH_CAPACITY_MARGIN 给阻力留出余量。
+        """
+        config = self.config
+        angle_rad = math.radians(launch_angle_deg)
+        vx, vy = initial_velocity_ms * math.cos(angle_rad), initial_velocity_ms * math.sin(angle_rad)
+        flight_time = 2.0 * max(vy, 0.0) / config.GRAVITY_MS2
+        if vx > 0:
+            flight_time = min(flight_time, distance_m / vx)
+        return int(flight_time * _PATH_CAPACITY_MARGIN / config.TIME_STEP_S) + 2
+
+    def solution_path(self, solution, distance_m, max_points=None):
+        """
+        方案 (find_launch_solution 或射表查询的结果) 对应的弹道路径，返回 NumPy 数组 (path_x, path_y)。
+        批量积分时不记录路径，这里按方案的俯仰角和速度再积分一次；max_points 给出时均匀抽稀。
+        """
+        if solution is None:
+            return _EMPTY_PATH, _EMPTY_PATH
+        _, _, path_x, path_y = self.run_simulation_for_angle_and_velocity(
+            solution['projectile_vertical_angle'], solution['projectile_total_velocity'], distance_m,
+            return_path=True)
+        return decimate_path(path_x, path_y, max_points)
+
+    def estimate_initial_velocity(self, angle_deg, target_x, target_y):
+        angle_rad = math.radians(angle_deg)
+        cos_a, tan_a = math.cos(angle_rad), math.tan(angle_rad)
+        denominator = 2 * (cos_a ** 2) * (target_x * tan_a - target_y)
+        return math.sqrt((self.config.GRAVITY_MS2 * target_x ** 2) / denominator) if denominator > 0 else None
+
+    def min_launch_angle(self, distance_m):
+        """可行的最小俯仰角: 不高于目标仰角时无论速度多大都无法击中。整个俯仰角范围都不可行时返回 None"""
+        config = self.config
+        min_angle = max(config.MIN_ANGLE_DEG, math.degrees(math.atan2(config.HEIGHT_M, distance_m)))
+        return min_angle if min_angle < config.MAX_ANGLE_DEG else None
+
+    def estimate_launch_solution(self, params, warm_start=None):
+        """
+        只积分一两条弹道的粗略方案，用于在完整求解结束前先给出读数 (quality 为 QUALITY_ESTIMATE)。
+
+        俯仰角取 warm_start 的俯仰角，没有时取无阻力下速度最小的俯仰角 (45° 加目标仰角的一半)；
+        速度从 warm_start 的速度或无阻力估算出发，按击中高度误差修正: 第一步用无阻力弹道的 dh/dv，之后用割线，
+        最多积分 _ESTIMATE_SIMULATIONS 条弹道，误差小于 HIT_TOLERANCE_M 时提前停止。
+        弹道未到达目标平面时把速度乘以 BRACKET_GROWTH_FACTOR 重试，一条都没有到达或无法估算时返回 None。
+        """
+        config = self.config
+        distance_m = params['distance_m']
+        # 无穷远的距离会让区间扩展永不结束，NaN 则任何比较都为假
+        if not math.isfinite(distance_m) or distance_m <= 0: return None
+        min_angle = self.min_launch_angle(distance_m)
+        if min_angle is None:
+            return None
+
+        if warm_start:
+            pitch = warm_start['projectile_vertical_angle']
+        else:
+            pitch = 45.0 + 0.5 * math.degrees(math.atan2(config.HEIGHT_M, distance_m))
+        pitch = min(max(pitch, min_angle), config.MAX_ANGLE_DEG)
+        velocity = self.estimate_initial_velocity(pitch, distance_m, config.HEIGHT_M)
+        if velocity is None:
+            return None
+        if warm_start:
+            velocity = warm_start['projectile_total_velocity']
+
+        cos_a = math.cos(math.radians(pitch))
+        too_slow = 0.0  # 已知未到达目标平面的最大速度，修正后的速度不低于它
+        previous = hit = None  # 上一次和最近一次到达目标平面的 (速度, 高度误差, 飞行时间)
+        for _ in range(_ESTIMATE_SIMULATIONS):
+            self.simulation_count += 1
+            hit_h, hit_t = self.run_simulation_for_angle_and_velocity(pitch, velocity, distance_m)
+            if hit_t < 0:
+                too_slow = velocity
+                velocity *= config.BRACKET_GROWTH_FACTOR
+                continue
+            previous, hit = hit, (velocity, hit_h - config.HEIGHT_M, hit_t)
+            if abs(hit[1]) <= config.HIT_TOLERANCE_M:
+                break
+            if previous is not None and previous[1] != hit[1]:
+                slope = (hit[1] - previous[1]) / (hit[0] - previous[0])
+            else:
+                # 无阻力弹道 h(v) = d·tanθ - g·d² / (2·v²·cos²θ)，dh/dv = g·d² / (v³·cos²θ)
+                slope = config.GRAVITY_MS2 * distance_m ** 2 / (velocity ** 3 * cos_a ** 2)
+            velocity -= hit[1] / slope
+            if velocity <= too_slow:
+                velocity = 0.5 * (too_slow + hit[0])
+        if hit is None:
+            return None
+        # 最后一次修正后的速度没有再积分，飞行时间沿用最近一次到达目标平面的弹道
+        if hit_t < 0:
+            velocity = hit[0]
+        hit_t = hit[2]
+        solution = compensate_for_vehicle(pitch, velocity, hit_t, params['vehicle_speed_ms'],
+                                          params['vehicle_direction_deg'], params['target_direction_deg'])
+        solution['quality'] = QUALITY_ESTIMATE
+        return solution
+
+    def physics_kwargs(self):
+        """传给 ballistics 中积分函数的物理常量"""
+        config = self.config
+        return {
+            'gravity_ms2': config.GRAVITY_MS2,
+            'air_density': config.AIR_DENSITY,
+            'drag_coefficient': config.DRAG_COEFFICIENT,
+            'cross_sectional_area_m2': config.CROSS_SECTIONAL_AREA_M2,
+            'mass_kg': config.MASS_KG,
+            'time_step_s': config.TIME_STEP_S,
+        }
+
+    def simulate_batch(self, launch_angles_deg, initial_velocities_ms, distance_m):
+        """使用当前常量和积分方法批量积分一组弹道，见 ballistics.simulate_batch"""
+        config = self.config
+        launch_angles_deg, initial_velocities_ms = np.broadcast_arrays(launch_angles_deg, initial_velocities_ms)
+        self.simulation_count += launch_angles_deg.size
+        if launch_angles_deg.size <= _SCALAR_SIMULATION_LIMIT:
+            results = [self.run_simulation_for_angle_and_velocity(angle, velocity, distance_m)
+                       for angle, velocity in zip(launch_angles_deg.ravel().tolist(),
+                                                  initial_velocities_ms.ravel().tolist())]
+            results = np.array(results, dtype=float).reshape(launch_angles_deg.shape + (2,))
+            return results[..., 0], results[..., 1]
+        stats = {}
+        hit_h, hit_t = simulate_batch(launch_angles_deg, initial_velocities_ms, distance_m, **self.physics_kwargs(),
+                                      method=config.INTEGRATOR, tolerance_m=config.INTEGRATION_TOLERANCE_M,
+                                      stats=stats)
+        self.derivative_evaluations += int(stats['derivative_evaluations'])
+        return hit_h, hit_t
+
+    def bracket_velocities(self, launch_angles_deg, pred_vs, distance_m, growth=None, points_per_sweep=None,
+                           cancelled=None):
+        """
+        从预测速度出发按等比数列扩展，为每个俯仰角找出击中高度跨过目标高度的速度区间。
+
+        每次批量积分为每个角度测试 points_per_sweep 个速度，公比为 growth，
+        默认分别为 BRACKET_POINTS_PER_SWEEP 和 BRACKET_GROWTH_FACTOR；预测速度很准时可以传入更小的值。
+        返回 (low_v, low_f, high_v, high_f, high_t, found)，f 为击中高度减目标高度，low_f < 0 < high_f。
+        未到达目标平面的弹道记为 -1.0 - HEIGHT_M，符号同样正确。
+        每次批量积分前调用 cancelled (若提供)，返回 True 时抛出 SolveCancelled。
+        """
+        config = self.config
+        n = launch_angles_deg.size
+        growth = growth if growth is not None else config.BRACKET_GROWTH_FACTOR
+        points_per_sweep = points_per_sweep if points_per_sweep is not None else config.BRACKET_POINTS_PER_SWEEP
+        low_v, low_f = np.zeros(n), np.full(n, -np.inf)
+        high_v, high_f, high_t = np.zeros(n), np.full(n, np.inf), np.full(n, -1.0)
+        found, exhausted = np.zeros(n, dtype=bool), np.zeros(n, dtype=bool)
+
+        # 第一次从估算速度的下方一点开始；之后每个角度沿自己的方向 (+1 向上 / -1 向下) 继续扩展
+        base = pred_vs / growth ** 2
+        direction = np.ones(n)
+        steps = np.arange(1, points_per_sweep + 1)
+        for _ in range(config.MAX_BRACKET_SWEEPS):
+            pending = np.flatnonzero(~found & ~exhausted)
+            if not pending.size:
+                break
+            if cancelled is not None and cancelled():
+                raise SolveCancelled()
+            self.bracket_sweeps += 1
+            test_v = np.minimum(base[pending, None] * growth ** (direction[pending, None] * steps[None, :]),
+                                config.MAX_VELOCITY_MS)
+            hit_h, hit_t = self.simulate_batch(launch_angles_deg[pending, None], test_v, distance_m)
+            f = hit_h - config.HEIGHT_M
+            above = f > 0
+            for row, lane in enumerate(pending.tolist()):
+                # 向下扩展时测试点从大到小排列，翻转后统一按速度升序处理
+                order = slice(None) if direction[lane] > 0 else slice(None, None, -1)
+                v_row, f_row, t_row, above_row = test_v[row, order], f[row, order], hit_t[row, order], above[row, order]
+                if above_row.all():
+                    # 全部高于目标: 最小的速度作为上界，下界未知时继续向下扩展
+                    high_v[lane], high_f[lane], high_t[lane] = v_row[0], f_row[0], t_row[0]
+                    found[lane] = low_f[lane] > -np.inf
+                    direction[lane], base[lane] = -1.0, v_row[0]
+                elif not above_row.any():
+                    # 全部低于目标: 最大的速度作为下界，上界未知时继续向上扩展
+                    low_v[lane], low_f[lane] = v_row[-1], f_row[-1]
+                    found[lane] = high_f[lane] < np.inf
+                    exhausted[lane] = v_row[-1] >= config.MAX_VELOCITY_MS
+                    direction[lane], base[lane] = 1.0, v_row[-1]
+                else:
+                    first = int(above_row.argmax())
+                    low_v[lane], low_f[lane] = v_row[first - 1], f_row[first - 1]
+                    high_v[lane], high_f[lane], high_t[lane] = v_row[first], f_row[first], t_row[first]
+                    found[lane] = True
+        return low_v, low_f, high_v, high_f, high_t, found
+
+    def solve_velocities(self, launch_angles_deg, pred_vs, distance_m, growth=None, points_per_sweep=None,
+                         cancelled=None):
+        """
+        对一组俯仰角同时求解击中目标高度所需的初速度。
+
+        返回 (速度, 击中高度, 飞行时间, 是否找到) 四个数组。先用 bracket_velocities 从 pred_vs 出发找出速度区间，
+        再对 击中高度 - 目标高度 用 Illinois 改进的试位法求根，所有角度的试探速度放进同一次批量积分，
+        击中高度误差小于 ROOT_HEIGHT_TOLERANCE_M 时停止。
+        """
+        config = self.config
+        low_v, low_f, high_v, high_f, high_t, found = self.bracket_velocities(launch_angles_deg, pred_vs, distance_m,
+                                                                              growth, points_per_sweep, cancelled)
+
+        # 当前最好的解: 区间两端中离目标高度更近的一端 (初始只有上端有飞行时间，先用上端)
+        best_v, best_f, best_t = high_v.copy(), high_f.copy(), high_t.copy()
+        # Illinois 记录上一次替换的是哪一端 (+1 上端 / -1 下端)，同一端连续被替换时把另一端的函数值减半
+        last_side = np.zeros(launch_angles_deg.size)
+        for _ in range(config.MAX_ROOT_ITERATIONS):
+            lanes = np.flatnonzero(found & (np.abs(best_f) > config.ROOT_HEIGHT_TOLERANCE_M))
+            if not lanes.size:
+                break
+            if cancelled is not None and cancelled():
+                raise SolveCancelled()
+            self.root_iterations += 1
+            a, fa, b, fb = low_v[lanes], low_f[lanes], high_v[lanes], high_f[lanes]
+            test_v = b - fb * (b - a) / (fb - fa)
+            # 数值问题导致试位点不在区间内部时退回二分
+            outside = ~((test_v > a) & (test_v < b))
+            test_v[outside] = 0.5 * (a + b)[outside]
+            hit_h, hit_t = self.simulate_batch(launch_angles_deg[lanes], test_v, distance_m)
+            f = hit_h - config.HEIGHT_M
+
+            better = np.abs(f) < np.abs(best_f[lanes])
+            best_v[lanes[better]], best_f[lanes[better]], best_t[lanes[better]] = \
+                test_v[better], f[better], hit_t[better]
+
+            above = f > 0
+            up, down = lanes[above], lanes[~above]
+            high_v[up], high_f[up] = test_v[above], f[above]
+            low_v[down], low_f[down] = test_v[~above], f[~above]
+            low_f[up[last_side[up] > 0]] *= 0.5
+            high_f[down[last_side[down] < 0]] *= 0.5
+            last_side[up], last_side[down] = 1.0, -1.0
+
+        return best_v, best_f + config.HEIGHT_M, best_t, found
+
+    def find_launch_solution(self, params, warm_start=None, cancelled=None, progress=None):
+        """
+        在 [MIN_ANGLE_DEG, MAX_ANGLE_DEG] 内连续地寻找发射器速度最小的俯仰角。
+
+        先在 COARSE_PITCH_SAMPLES 个均匀分布的俯仰角上从小到大分块求解，发射器速度开始上升时停止，
+        取发射器速度最小者相邻的区间，再用 Brent 方法在区间内精确寻优。寻优过程中每个俯仰角的速度
+        都从已解出的最近角度预测，区间扩展只需很小的公比。
+
+        warm_start 为上一次的方案 (例如拖动机器人时上一帧的结果) 时，只在它的俯仰角附近
+        (WARM_START_PITCH_STEP_DEG) 搜索，附近找不到最优解时才退回完整搜索。
+
+        返回的字典中 'inner_solves' 为求解速度的次数 (即尝试过的俯仰角个数)，
+        'warm_started' 表示结果是否来自热启动搜索。
+
+        cancelled 为无参数的可调用对象 (例如比较请求序号)，每次批量积分前检查，返回 True 时放弃求解并抛出
+        SolveCancelled，界面可以立即转去处理更新的请求。
+
+        progress 为接受一个方案的可调用对象时，求解过程中依次传入精度逐步提高的中间结果:
+        先是 estimate_launch_solution 的粗略方案，再是找到俯仰角区间时最好的采样点。
+        每个方案 (包括返回值) 的 'quality' 为 QUALITY_* 之一，返回值总是 QUALITY_REFINED。
+        """
+        distance_m = params['distance_m']
+        # 无穷远的距离会让区间扩展永不结束，NaN 则任何比较都为假
+        if not math.isfinite(distance_m) or distance_m <= 0: return None
+        min_angle = self.min_launch_angle(distance_m)
+        if min_angle is None:
+            return None
+
+        if progress is not None:
+            estimate = self.estimate_launch_solution(params, warm_start)
+            if estimate is not None:
+                progress(estimate)
+        search = _PitchSearch(self, params, min_angle, cancelled)
+        bracket = search.warm_bracket(warm_start) if warm_start else None
+        warm_started = bracket is not None
+        if bracket is None:
+            bracket = search.coarse_bracket()
+        if bracket is None:
+            return None
+        if progress is not None:
+            progress(dict(search.solutions[bracket[2]], quality=QUALITY_BRACKET))
+        solution = dict(search.solutions[search.refine(*bracket)])
+        solution['inner_solves'] = len(search.solutions)
+        solution['warm_started'] = warm_started
+        solution['quality'] = QUALITY_REFINED
+        return solution
+
+
+class _PitchSearch:
+    """一次 find_launch_solution 调用中的俯仰角搜索，记录所有已求解过的俯仰角"""
+
+    def __init__(self, solver, params, min_angle, cancelled=None):
+        self.solver = solver
+        self.config = solver.config
+        self.params = params
+        self.min_angle = min_angle
+        self.cancelled = cancelled
+        self.solutions = {}  # 俯仰角 -> 补偿后的方案 (无解为 None)
+
+    def estimate(self, angle):
+        return self.solver.estimate_initial_velocity(angle, self.params['distance_m'], self.config.HEIGHT_M)
+
+    def evaluate(self, angles, pred_vs, growth=None, points_per_sweep=None):
+        """批量求解一组俯仰角的速度，并记录补偿后的方案"""
+        config, params = self.config, self.params
+        velocities, hit_hs, hit_ts, found = self.solver.solve_velocities(angles, pred_vs, params['distance_m'],
+                                                                         growth, points_per_sweep, self.cancelled)
+        for projectile_vertical_angle, projectile_total_velocity, final_h, final_t, ok in zip(
+                angles.tolist(), velocities.tolist(), hit_hs.tolist(), hit_ts.tolist(), found.tolist()):
+            if not ok or abs(final_h - config.HEIGHT_M) > config.HIT_TOLERANCE_M:
+                self.solutions[projectile_vertical_angle] = None
+                continue
+            self.solutions[projectile_vertical_angle] = compensate_for_vehicle(
+                projectile_vertical_angle, projectile_total_velocity, final_t, params['vehicle_speed_ms'],
+                params['vehicle_direction_deg'], params['target_direction_deg'])
+
+    def launcher_velocity(self, angle):
+        solution = self.solutions.get(angle)
+        return solution['launcher_velocity'] if solution else float('inf')
+
+    def coarse_bracket(self):
+        """
+        粗搜索: 均匀分布的俯仰角按从小到大的顺序分块批量求解。
+        发射器速度开始上升后，最优解已经被夹在区间内，陡峭 (飞行时间很长) 的角度无需计算。
+        返回 (下界, 上界, 最优角度, 最优发射器速度)，全部无解时返回 None。
+        """
+        config = self.config
+        coarse = np.linspace(self.min_angle, config.MAX_ANGLE_DEG, config.COARSE_PITCH_SAMPLES)
+        coarse_values = []
+        for block_start in range(0, coarse.size, config.ANGLE_BATCH_SIZE):
+            block = coarse[block_start:block_start + config.ANGLE_BATCH_SIZE]
+            pred_vs = [self.estimate(angle) for angle in block.tolist()]
+            # 无阻力估算是所需速度的下界: 超过 MAX_VELOCITY_MS 的角度 (例如接近 90°) 不可能有解，不必积分；
+            # 速度区间也从估算速度往上一步开始扩展，第一个测试点不会浪费在必然打低的速度上
+            feasible = [i for i, pred_v in enumerate(pred_vs)
+                        if pred_v is not None and pred_v <= config.MAX_VELOCITY_MS]
+            self.evaluate(block[feasible], np.array([pred_vs[i] for i in feasible]) * config.BRACKET_GROWTH_FACTOR)
+            coarse_values += [self.launcher_velocity(angle) for angle in block.tolist()]
+            best = int(np.argmin(coarse_values))
+            if coarse_values[best] < float('inf') and best < len(coarse_values) - 1:
+                break
+        if coarse_values[best] == float('inf'):
+            return None
+        return (float(coarse[max(best - 1, 0)]), float(coarse[min(best + 1, len(coarse_values) - 1)]),
+                float(coarse[best]), coarse_values[best])
+
+    def warm_bracket(self, previous):
+        """
+        热启动: 先在上一次方案的俯仰角及其两侧各 PITCH_TOLERANCE_DEG 处求解，速度由上一次的速度预测；
+        中间最优说明最优解几乎没有移动。否则沿下降方向再试一个相距 WARM_START_PITCH_STEP_DEG 的角度。
+        最优点被夹住 (或落在可行域边界) 时返回与 coarse_bracket 相同格式的区间，否则返回 None。
+        """
+        config = self.config
+        pitch = min(max(previous['projectile_vertical_angle'], self.min_angle), config.MAX_ANGLE_DEG)
+        pitch_estimate = self.estimate(pitch)
+        if pitch_estimate is None:
+            return None
+        # 上一次的速度按无阻力估算随俯仰角的变化比例换算到附近的角度
+        scale = previous['projectile_total_velocity'] / pitch_estimate
+
+        angles = sorted({max(pitch - config.PITCH_TOLERANCE_DEG, self.min_angle), pitch,
+                         min(pitch + config.PITCH_TOLERANCE_DEG, config.MAX_ANGLE_DEG)})
+        for attempt in range(2):
+            new_angles = [angle for angle in angles if angle not in self.solutions]
+            estimates = [self.estimate(angle) for angle in new_angles]
+            if None in estimates:
+                return None
+            self.evaluate(np.array(new_angles), np.array(estimates) * scale, config.WARM_START_GROWTH_FACTOR, 2)
+
+            values = [self.launcher_velocity(angle) for angle in angles]
+            best = int(np.argmin(values))
+            if values[best] == float('inf'):
+                return None
+            # 最优点在端点且端点不是可行域边界: 最优解可能在更远处
+            if best == 0 and angles[0] > self.min_angle:
+                angles.insert(0, max(pitch - config.WARM_START_PITCH_STEP_DEG, self.min_angle))
+            elif best == len(angles) - 1 and angles[-1] < config.MAX_ANGLE_DEG:
+                angles.append(min(pitch + config.WARM_START_PITCH_STEP_DEG, config.MAX_ANGLE_DEG))
+            else:
+                return angles[max(best - 1, 0)], angles[min(best + 1, len(angles) - 1)], angles[best], values[best]
+        return None
+
+    def objective(self, angle):
+        """Brent 寻优的目标函数: 该俯仰角下的发射器速度，无解为 inf"""
+        if angle in self.solutions:
+            return self.launcher_velocity(angle)
+        pred_v = self.estimate(angle)
+        if pred_v is None:
+            return float('inf')
+        # 用最近的已解角度修正无阻力估算，预测误差通常只有千分之几
+        nearest = min((a for a, solution in self.solutions.items() if solution), key=lambda a: abs(a - angle))
+        pred_v *= self.solutions[nearest]['projectile_total_velocity'] / self.estimate(nearest)
+        self.evaluate(np.array([angle]), np.array([pred_v]), self.config.WARM_START_GROWTH_FACTOR, 2)
+        return self.launcher_velocity(angle)
+
+    def refine(self, lower, upper, x, fx):
+        """在 [lower, upper] 内从 (x, fx) 出发精确寻优，返回最优俯仰角"""
+        tolerance = self.config.PITCH_TOLERANCE_DEG
+        # 最优点在可行域下边界时，只要向内一步发射器速度就上升，最优解就是边界本身
+        if x == self.min_angle and upper > x and self.objective(x + tolerance) >= fx:
+            return x
+        best_angle, _ = _brent_minimize(self.objective, lower, upper, x, fx, tolerance,
+                                        self.config.MAX_PITCH_ITERATIONS)
+        return best_angle
+
+
+def _brent_minimize(func, lower, upper, x, fx, tolerance, max_iterations):
+    """
+    Brent 一维极小化 (抛物线插值 + 黄金分割)，在 [lower, upper] 内从已知点 (x, fx) 出发。
+
+    func 返回 inf 表示该点不可行，此时只走黄金分割步。返回 (x, fx)。
+    """
+    a, b = lower, upper
+    v = w = x
+    fv = fw = fx
+    d = e = 0.0
+    for _ in range(max_iterations):
+        mid = 0.5 * (a + b)
+        if abs(x - mid) <= 2 * tolerance - 0.5 * (b - a):
+            break
+        golden = True
+        if abs(e) > tolerance and math.isfinite(fx) and math.isfinite(fw) and math.isfinite(fv):
+            # 过 x, w, v 三点的抛物线的极小点
+            r = (x - w) * (fx - fv)
+            q = (x - v) * (fx - fw)
+            p = (x - v) * q - (x - w) * r
+            q = 2.0 * (q - r)
+            if q > 0:
+                p = -p
+            q = abs(q)
+            if abs(p) < abs(0.5 * q * e) and q * (a - x) < p < q * (b - x):
+                e, d = d, p / q
+                golden = False
+                if (x + d) - a < 2 * tolerance or b - (x + d) < 2 * tolerance:
+                    d = math.copysign(tolerance, mid - x)
+        if golden:
+            e = (a - x) if x >= mid else (b - x)
+            d = _GOLDEN_SECTION * e
+        u = x + d if abs(d) >= tolerance else x + math.copysign(tolerance, d)
+        fu = func(u)
+        if fu <= fx:
+            if u >= x:
+                a = x
+            else:
+                b = x
+            v, w, x = w, x, u
+            fv, fw, fx = fw, fx, fu
+        else:
+            if u < x:
+                a = u
+            else:
+                b = u
+            if fu <= fw or w == x:
+                v, w = w, u
+                fv, fw = fw, fu
+            elif fu <= fv or v == x or v == w:
+                v, fv = u, fu
+    return x, fx
@@ -0,0 +1,402 @@
+"""
+    发射方案代理模型 (无 GUI 依赖)
+
+    把 (距离, 径向速度, 切向速度) 直接映射为发射器俯仰角、方位角偏移、发射器速度和飞行时间，
+    查询只做多项式求值和几次初等运算，不做任何积分。
+
+    径向速度为载具速度沿目标方向的分量 (朝向目标为正)，切向速度为垂直于目标方向的分量
+    (目标方向逆时针转 90° 为正)，方位角偏移为 aim_azimuth_deg - target_direction_deg。
+
+    求解器在目标方向的竖直平面内搜索弹丸方案 (P_h, P_v)，使发射器速度
+    |P - V_vehicle|² = (P_h - 径向速度)² + 切向速度² + P_v² 最小，切向速度一项与弹丸方案无关，
+    所以弹丸方案和飞行时间只取决于 (距离, 径向速度)。模型沿距离分段，每段用二维张量积切比雪夫多项式
+    拟合 P_h、P_v 和飞行时间，再按上式精确换算出发射器方案。直接拟合发射器方位角不可行:
+    径向速度接近 P_h 时发射器的水平分量过零，方位角在 ±180° 之间跳变。
+
+    拟合后用随机抽取、不参与拟合的完整求解 (三个维度都随机) 检验，报告各输出的最大误差，以及按代理模型
+    给出的方案实际发射时目标平面处的最大高度误差；检验结果随模型一起保存。
+
+    用法:
+        python surrogate.py fit surrogate.json --max-speed 5 --workers 4
+        python surrogate.py check surrogate.json --samples 1000
+"""
+
+import argparse
+import json
+import math
+import multiprocessing
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor
+
+import numpy as np
+from numpy.polynomial import chebyshev
+
+from ballistics import launcher_to_projectile
+from firing_table import FIRING_TABLE_CONSTANTS, solver_constants
+from solver import BallisticSolver, SolverConfig
+
+SURROGATE_VERSION = 1
+SURROGATE_OUTPUTS = ('launcher_angle', 'azimuth_offset_deg', 'launcher_velocity', 'time')
+# 每段拟合的量: 弹丸水平速度、竖直速度和飞行时间，都只取决于 (距离, 径向速度)
+SURROGATE_FITTED = ('projectile_horizontal_velocity', 'projectile_vertical_velocity', 'time')
+
+# 距离、径向速度两个方向的默认多项式阶数
+DEFAULT_DEGREES = (6, 6)
+
+
+def vehicle_components(params):
+    """把 calc_params 中的载具速度分解为 (径向速度, 切向速度)"""
+    relative = math.radians(params['vehicle_direction_deg'] - params['target_direction_deg'])
+    speed = params['vehicle_speed_ms']
+    return speed * math.cos(relative), speed * math.sin(relative)
+
+
+def component_params(distance_m, radial_ms, tangential_ms):
+    """vehicle_components 的逆: 以目标方向为 0° 构造 calc_params"""
+    return {'distance_m': distance_m, 'vehicle_speed_ms': math.hypot(radial_ms, tangential_ms),
+            'vehicle_direction_deg': math.degrees(math.atan2(tangential_ms, radial_ms)),
+            'target_direction_deg': 0.0}
+
+
+def launcher_solution(projectile_h, projectile_v, radial_ms, tangential_ms):
+    """由弹丸方案和载具速度分量换算发射器的 (俯仰角, 方位角偏移, 速度)，即 compensate_for_vehicle 在目标坐标系中的形式"""
+    launcher_x, launcher_y = projectile_h - radial_ms, -tangential_ms
+    launcher_h = math.hypot(launcher_x, launcher_y)
+    return (math.degrees(math.atan2(projectile_v, launcher_h)), math.degrees(math.atan2(launcher_y, launcher_x)),
+            math.hypot(launcher_h, projectile_v))
+
+
+def _wrap_degrees(angle):
+    return (angle + 180.0) % 360.0 - 180.0
+
+
+def solve_points(config, points):
+    """
+    依次求解一组 (距离, 径向速度, 切向速度) 点 (在工作进程中运行)。
+    不使用热启动: 最优点附近发射器速度对俯仰角很不敏感，热启动的俯仰角会粘在上一个点附近，
+    使采样值带上与求解顺序有关的偏差，插值后的误差约为冷启动的两倍。
+    返回形状为 (点数, 6) 的数组，前三列为 SURROGATE_FITTED，后三列为发射器的俯仰角、方位角偏移和速度，
+    无解处为 NaN。
+    """
+    solver = BallisticSolver(config)
+    results = np.full((len(points), 6), np.nan)
+    for i, (distance_m, radial_ms, tangential_ms) in enumerate(points):
+        solution = solver.find_launch_solution(component_params(distance_m, radial_ms, tangential_ms))
+        if solution is not None:
+            angle = math.radians(solution['projectile_vertical_angle'])
+            velocity = solution['projectile_total_velocity']
+            results[i] = (velocity * math.cos(angle), velocity * math.sin(angle), solution['time'],
+                          solution['launcher_angle'], _wrap_degrees(solution['aim_azimuth_deg']),
+                          solution['launcher_velocity'])
+    return results
+
+
+def _solve_all(config, tasks, workers):
+    """把若干组点交给进程池求解 (workers 为 1 或只有一组时在当前进程中求解)"""
+    workers = min(workers or os.cpu_count() or 1, len(tasks))
+    if workers <= 1:
+        return [solve_points(config, points) for points in tasks]
+    # 与热力图相同，用 spawn 启动工作进程: 调用方可能是有 Tk 和其他线程的界面进程
+    with ProcessPoolExecutor(max_workers=workers, mp_context=multiprocessing.get_context("spawn")) as executor:
+        return list(executor.map(solve_points, [config] * len(tasks), tasks))
+
+
+def chebyshev_nodes(count, low, high):
+    """[low, high] 上的 count 个第一类切比雪夫节点 (从小到大)"""
+    x = -np.cos((2 * np.arange(count) + 1) * np.pi / (2 * count))
+    return 0.5 * (low + high) + 0.5 * (high - low) * x
+
+
+def _chebyshev_terms(x, degree):
+    """T_0(x) ... T_degree(x)"""
+    terms = [1.0, x]
+    for _ in range(degree - 1):
+        terms.append(2.0 * x * terms[-1] - terms[-2])
+    return terms[:degree + 1]
+
+
+class SurrogateModel:
+    """
+    分段张量积切比雪夫多项式代理模型。
+
+    coefficients 的形状为 (段数, len(SURROGATE_FITTED), 距离阶数 + 1, 径向阶数 + 1)，
+    第 p 段覆盖距离 [min_distance_m + p * 段长, min_distance_m + (p + 1) * 段长]，
+    径向速度范围为 ±max_speed_ms；valid[p] 为 False 表示该段有节点无解，查询时返回 None。
+    """
+
+    def __init__(self, constants, min_distance_m, max_distance_m, max_speed_ms, coefficients, valid,
+                 validation=None):
+        self.constants = dict(constants)
+        self.min_distance_m = float(min_distance_m)
+        self.max_distance_m = float(max_distance_m)
+        self.max_speed_ms = float(max_speed_ms)
+        self.coefficients = np.asarray(coefficients, dtype=float)
+        self.valid = np.asarray(valid, dtype=bool)
+        self.validation = validation
+        self.patch_length_m = (self.max_distance_m - self.min_distance_m) / len(self.valid)
+        self.degrees = tuple(n - 1 for n in self.coefficients.shape[2:])
+        # 标量求值用的嵌套列表，比逐个索引 NumPy 数组快一个数量级
+        self._patches = [patch.tolist() if ok else None for patch, ok in zip(self.coefficients, self.valid)]
+
+    @property
+    def patch_count(self):
+        return len(self.valid)
+
+    @classmethod
+    def fit(cls, config=None, min_distance_m=0.5, max_distance_m=4.7, max_speed_ms=5.0, patches=12,
+            degrees=DEFAULT_DEGREES, workers=None):
+        """
+        在每段的切比雪夫节点上 (切向速度为 0) 求解并插值。每段需要 (距离阶数 + 1) × (径向阶数 + 1) 次完整求解，
+        各段交给进程池并行求解。
+        """
+        config = config if config is not None else SolverConfig()
+        if patches < 1 or max_distance_m <= min_distance_m:
+            raise ValueError("Surrogate needs at least one patch and a non-empty distance range")
+        patch_length = (max_distance_m - min_distance_m) / patches
+        radial = chebyshev_nodes(degrees[1] + 1, -max_speed_ms, max_speed_ms).tolist()
+
+        tasks = []
+        for p in range(patches):
+            low = min_distance_m + p * patch_length
+            distances = chebyshev_nodes(degrees[0] + 1, low, low + patch_length).tolist()
+            tasks.append([(d, vr, 0.0) for d in distances for vr in radial])
+        results = _solve_all(config, tasks, workers)
+
+        coefficients = np.zeros((patches, len(SURROGATE_FITTED), degrees[0] + 1, degrees[1] + 1))
+        valid = np.zeros(patches, dtype=bool)
+        for p, (points, values) in enumerate(zip(tasks, results)):
+            values = values[:, :len(SURROGATE_FITTED)]
+            if np.isnan(values).any():
+                continue
+            points = np.array(points)
+            low = min_distance_m + p * patch_length
+            vander = chebyshev.chebvander2d(2.0 * (points[:, 0] - low) / patch_length - 1.0,
+                                            points[:, 1] / max_speed_ms, degrees)
+            # 节点数等于系数个数，最小二乘即为插值
+            solved = np.linalg.lstsq(vander, values, rcond=None)[0]
+            coefficients[p] = solved.T.reshape((len(SURROGATE_FITTED), degrees[0] + 1, degrees[1] + 1))
+            valid[p] = True
+        return cls(solver_constants(config), min_distance_m, max_distance_m, max_speed_ms, coefficients, valid)
+
+    def evaluate_projectile(self, distance_m, radial_ms):
+        """
+        纯 Python 标量求值，返回 (弹丸水平速度, 弹丸竖直速度, 飞行时间)；超出拟合范围、输入为 NaN 或无穷大、
+        或该段无解时返回 None。
+        """
+        if not (math.isfinite(distance_m) and math.isfinite(radial_ms)):
+            return None
+        pos = (distance_m - self.min_distance_m) / self.patch_length_m
+        if pos < 0 or pos > len(self._patches) or abs(radial_ms) > self.max_speed_ms:
+            return None
+        p = min(int(pos), len(self._patches) - 1)
+        patch = self._patches[p]
+        if patch is None:
+            return None
+        td = _chebyshev_terms(2.0 * (pos - p) - 1.0, self.degrees[0])
+        tr = _chebyshev_terms(radial_ms / self.max_speed_ms, self.degrees[1])
+        values = []
+        for output in patch:
+            total = 0.0
+            for a, row in zip(td, output):
+                s = 0.0
+                for b, coefficient in zip(tr, row):
+                    s += b * coefficient
+                total += a * s
+            values.append(total)
+        return values
+
+    def evaluate(self, distance_m, radial_ms, tangential_ms):
+        """
+        纯 Python 标量求值，返回 (俯仰角, 方位角偏移, 发射器速度, 飞行时间)；超出拟合范围或该段无解时返回 None。
+        切向速度不受拟合范围限制。
+        """
+        projectile = self.evaluate_projectile(distance_m, radial_ms) if math.isfinite(tangential_ms) else None
+        if projectile is None:
+            return None
+        projectile_h, projectile_v, flight_time = projectile
+        return launcher_solution(projectile_h, projectile_v, radial_ms, tangential_ms) + (flight_time,)
+
+    def evaluate_batch(self, distance_m, radial_ms, tangential_ms):
+        """
+        向量化求值，返回形状为 (点数, len(SURROGATE_OUTPUTS)) 的数组，超出范围或无解处为 NaN。
+        """
+        d, vr, vt = np.broadcast_arrays(*(np.asarray(a, dtype=float).ravel() for a in
+                                          (distance_m, radial_ms, tangential_ms)))
+        pos = (d - self.min_distance_m) / self.patch_length_m
+        patch = np.clip(np.floor(pos).astype(int), 0, self.patch_count - 1)
+        inside = (pos >= 0) & (pos <= self.patch_count) & (np.abs(vr) <= self.max_speed_ms) & self.valid[patch]
+        td = chebyshev.chebvander(2.0 * (pos - patch) - 1.0, self.degrees[0])
+        tr = chebyshev.chebvander(vr / self.max_speed_ms, self.degrees[1])
+        projectile_h, projectile_v, flight_time = np.einsum('noij,ni,nj->on', self.coefficients[patch], td, tr)
+        launcher_x, launcher_y = projectile_h - vr, -vt
+        launcher_h = np.hypot(launcher_x, launcher_y)
+        values = np.column_stack([np.degrees(np.arctan2(projectile_v, launcher_h)),
+                                  np.degrees(np.arctan2(launcher_y, launcher_x)),
+                                  np.hypot(launcher_h, projectile_v), flight_time])
+        values[~inside] = np.nan
+        return values
+
+    def lookup(self, params):
+        """按 calc_params 查询，返回与 find_launch_solution 相同格式的字典，超出范围或无解时返回 None"""
+        radial_ms, tangential_ms = vehicle_components(params)
+        if not math.isfinite(tangential_ms):
+            return None
+        projectile = self.evaluate_projectile(params['distance_m'], radial_ms)
+        if projectile is None:
+            return None
+        projectile_h, projectile_v, flight_time = projectile
+        pitch, offset, velocity = launcher_solution(projectile_h, projectile_v, radial_ms, tangential_ms)
+        return {
+            'launcher_velocity': velocity,
+            'launcher_angle': pitch,
+            'aim_azimuth_deg': _wrap_degrees(params['target_direction_deg'] + offset),
+            'time': flight_time,
+            'projectile_total_velocity': math.hypot(projectile_h, projectile_v),
+            'projectile_vertical_angle': math.degrees(math.atan2(projectile_v, projectile_h)),
+        }
+
+    def matches(self, constants):
+        return all(self.constants.get(name) == constants.get(name) for name in FIRING_TABLE_CONSTANTS)
+
+    def save(self, path):
+        with open(path, "w", encoding="utf-8") as f:
+            json.dump({
+                'version': SURROGATE_VERSION,
+                'constants': self.constants,
+                'fitted': SURROGATE_FITTED,
+                'min_distance_m': self.min_distance_m,
+                'max_distance_m': self.max_distance_m,
+                'max_speed_ms': self.max_speed_ms,
+                'degrees': self.degrees,
+                'valid': self.valid.tolist(),
+                'coefficients': self.coefficients.tolist(),
+                'validation': self.validation,
+            }, f)
+
+    @classmethod
+    def load(cls, path, expected_constants=None):
+        """
+        读取模型文件。传入 expected_constants (通常是 solver_constants(config)) 时会逐项比较，
+        不一致则抛出 ValueError，避免使用过期的模型。
+        """
+        with open(path, encoding="utf-8") as f:
+            data = json.load(f)
+        if data.get('version') != SURROGATE_VERSION:
+            raise ValueError(f"Unsupported surrogate model version: {data.get('version')}")
+        if expected_constants is not None:
+            stale = sorted(name for name in FIRING_TABLE_CONSTANTS
+                           if data['constants'].get(name) != expected_constants.get(name))
+            if stale:
+                raise ValueError(f"Surrogate model is stale, constants changed: {', '.join(stale)}")
+        return cls(data['constants'], data['min_distance_m'], data['max_distance_m'], data['max_speed_ms'],
+                   data['coefficients'], data['valid'], data.get('validation'))
+
+
+def validate(model, config=None, samples=500, seed=None, workers=None):
+    """
+    在拟合范围内 (切向速度同样取 ±max_speed_ms) 均匀随机抽取 samples 个点，用完整求解器求解后与代理模型比较。
+
+    返回的字典 (同时保存到 model.validation) 中:
+        max_error / p99_error   各输出的最大误差和 99% 分位误差 (两者都有解的点)
+        max_height_miss_m       按代理模型的方案发射 (同一积分方法) 时目标平面处与 HEIGHT_M 的最大偏差，
+                                未到达目标平面的点记为无穷大；求解器本身允许 HIT_TOLERANCE_M 的偏差
+        solver_only / surrogate_only   只有一方有解的点数 (段内有节点无解、或可行区域边界附近)
+    """
+    config = config if config is not None else SolverConfig()
+    rng = np.random.default_rng(seed)
+    points = np.column_stack([
+        rng.uniform(model.min_distance_m, model.max_distance_m, samples),
+        rng.uniform(-model.max_speed_ms, model.max_speed_ms, samples),
+        rng.uniform(-model.max_speed_ms, model.max_speed_ms, samples),
+    ])
+    groups = max(1, min(workers or os.cpu_count() or 1, samples // 32))
+    solved = np.concatenate(_solve_all(config, [chunk.tolist() for chunk in np.array_split(points, groups)],
+                                       workers))
+    expected = np.column_stack([solved[:, 3:], solved[:, 2]])  # 与 SURROGATE_OUTPUTS 相同的列顺序
+    predicted = model.evaluate_batch(points[:, 0], points[:, 1], points[:, 2])
+
+    have_expected = ~np.isnan(expected[:, 0])
+    have_predicted = ~np.isnan(predicted[:, 0])
+    both = have_expected & have_predicted
+    errors = np.abs(predicted[both] - expected[both])
+    errors[:, 1] = np.abs(_wrap_degrees(errors[:, 1]))
+
+    # 代理模型给出的弹丸方案逐点积分到目标平面 (每个点的距离不同，不能合成一批)
+    solver = BallisticSolver(config)
+    heights = []
+    for (d, vr, vt), (pitch, offset, velocity, _) in zip(points[both].tolist(), predicted[both].tolist()):
+        angle, total_velocity = launcher_to_projectile(velocity, pitch, offset, math.hypot(vr, vt),
+                                                       math.degrees(math.atan2(vt, vr)), 0.0)
+        heights.append(solver.run_simulation_for_angle_and_velocity(float(angle), float(total_velocity), d)[0])
+    heights = np.array(heights)
+    misses = np.where(heights >= 0, np.abs(heights - config.HEIGHT_M), np.inf)
+
+    report = {
+        'samples': samples,
+        'compared': int(both.sum()),
+        'solver_only': int(np.sum(have_expected & ~have_predicted)),
+        'surrogate_only': int(np.sum(have_predicted & ~have_expected)),
+        'max_error': {name: float(errors[:, i].max()) if errors.size else 0.0
+                      for i, name in enumerate(SURROGATE_OUTPUTS)},
+        'p99_error': {name: float(np.percentile(errors[:, i], 99)) if errors.size else 0.0
+                      for i, name in enumerate(SURROGATE_OUTPUTS)},
+        'max_height_miss_m': float(misses.max()) if misses.size else 0.0,
+        'hit_tolerance_m': config.HIT_TOLERANCE_M,
+    }
+    model.validation = report
+    return report
+
+
+def format_validation(report):
+    units = {'launcher_angle': 'deg', 'azimuth_offset_deg': 'deg', 'launcher_velocity': 'm/s', 'time': 's'}
+    lines = [f"Held-out solves: {report['samples']}, compared {report['compared']}, "
+             f"solver only {report['solver_only']}, surrogate only {report['surrogate_only']}",
+             f"{'output':<22}{'max error':>14}{'p99 error':>14}"]
+    for name in SURROGATE_OUTPUTS:
+        lines.append(f"{name:<22}{report['max_error'][name]:>10.5f} {units[name]:<3}"
+                     f"{report['p99_error'][name]:>10.5f} {units[name]}")
+    lines.append(f"Max height miss at target: {report['max_height_miss_m'] * 100:.2f} cm "
+                 f"(solver tolerance {report['hit_tolerance_m'] * 100:.1f} cm)")
+    return "\n".join(lines)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Fit and validate a polynomial surrogate of the launch solver")
+    commands = parser.add_subparsers(dest="command", required=True)
+    fit_parser = commands.add_parser("fit", help="sample the solver and fit a new model")
+    fit_parser.add_argument("output", help="model file (JSON)")
+    fit_parser.add_argument("--min-distance", type=float, default=0.5, help="meters (default 0.5)")
+    fit_parser.add_argument("--max-distance", type=float, default=4.7, help="meters (default 4.7)")
+    fit_parser.add_argument("--max-speed", type=float, default=5.0, help="max |radial| speed, m/s (default 5)")
+    fit_parser.add_argument("--patches", type=int, default=12, help="distance patches (default 12)")
+    fit_parser.add_argument("--degrees", default=",".join(map(str, DEFAULT_DEGREES)),
+                            help="polynomial degrees in distance and radial speed (default %(default)s)")
+    check_parser = commands.add_parser("check", help="validate an existing model against the current constants")
+    check_parser.add_argument("model", help="model file (JSON)")
+    for sub in (fit_parser, check_parser):
+        sub.add_argument("--samples", type=int, default=500, help="held-out full solves (default 500)")
+        sub.add_argument("--seed", type=int, default=None, help="random seed for the held-out points")
+        sub.add_argument("--workers", type=int, default=None, help="worker processes (default: CPU count)")
+    args = parser.parse_args()
+
+    config = SolverConfig()
+    if args.command == "fit":
+        degrees = tuple(int(value) for value in args.degrees.split(","))
+        start = time.perf_counter()
+        model = SurrogateModel.fit(config, args.min_distance, args.max_distance, args.max_speed, args.patches,
+                                   degrees, args.workers)
+        print(f"Fitted {model.patch_count} patches ({int(model.valid.sum())} valid) with degrees {degrees} "
+              f"in {time.perf_counter() - start:.1f} s")
+    else:
+        model = SurrogateModel.load(args.model, solver_constants(config))
+
+    start = time.perf_counter()
+    report = validate(model, config, args.samples, args.seed, args.workers)
+    print(f"Validated in {time.perf_counter() - start:.1f} s")
+    print(format_validation(report))
+    model.save(args.output if args.command == "fit" else args.model)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,144 @@
+"""
+    firmware_table 的单元测试: 节点选择、与机器人端相同的整数运算和二进制格式
+
+    建表用按解析曲线给出方案的替身解算器，不做任何积分。运行: python -m pytest -q
+"""
+
+import math
+import shutil
+import subprocess
+from fractions import Fraction
+
+import numpy as np
+import pytest
+
+from firmware_table import FirmwareTable, _div_trunc, _interpolate_fixed, build_firmware_table, place_knots
+from solver import BallisticSolver, SolverConfig
+
+
+class _CurveSolver:
+    """静止方案按平滑的解析曲线给出，0.3 m 以内无解 (与真实曲线的形状大致相同)"""
+
+    def __init__(self):
+        self.config = SolverConfig()
+        self._rpm = BallisticSolver(self.config)
+
+    def find_launch_solution(self, params):
+        d = params['distance_m']
+        if d < 0.3:
+            return None
+        return {'launcher_angle': 55.0 + 30.0 * math.exp(-d), 'launcher_velocity': 4.5 + 1.2 * d + 0.1 * d * d}
+
+    def calculate_motor_rpm(self, velocity_ms):
+        return self._rpm.calculate_motor_rpm(velocity_ms)
+
+
+@pytest.fixture(scope="module")
+def table():
+    return build_firmware_table(_CurveSolver(), 0.0, 4.7)[0]
+
+
+def _reference_lookup(table, distance_mm):
+    """逐项按定义计算: 夹到表的范围内，线性查找区间，商用有理数算出后向零取整"""
+    knots = [int(d) for d in table.distance_mm]
+    d = min(max(distance_mm, knots[0]), knots[-1])
+    k = max(i for i in range(len(knots) - 1) if knots[i] <= d)
+    values = []
+    for column in (table.pitch_cdeg, table.rpm):
+        v0, v1 = int(column[k]), int(column[k + 1])
+        values.append(v0 + int(Fraction((v1 - v0) * (d - knots[k]), knots[k + 1] - knots[k])))
+    return tuple(values)
+
+
+def test_div_trunc_rounds_toward_zero():
+    assert (_div_trunc(7, 2), _div_trunc(-7, 2), _div_trunc(-6, 3), _div_trunc(0, 5)) == (3, -3, -2, 0)
+    for numerator in range(-60, 61):
+        for denominator in range(1, 9):
+            assert _div_trunc(numerator, denominator) == int(Fraction(numerator, denominator))
+
+
+def test_vectorized_interpolation_matches_scalar():
+    d = np.arange(100, 201, dtype=np.int64)
+    for v0, v1 in ((10, 47), (47, 10), (-30, 25), (5, 5)):
+        expected = [v0 + _div_trunc((v1 - v0) * (x - 100), 100) for x in d.tolist()]
+        knot_d, knot_v = np.array([100, 200]), np.array([v0, v1])
+        assert _interpolate_fixed(d, knot_d, knot_v).tolist() == expected
+
+
+def test_place_knots_finds_breakpoints_of_piecewise_linear_curve():
+    distance_mm = np.arange(0, 1001, 10, dtype=np.int64)
+    # 折点在 300 mm 和 700 mm，每个采样间隔变化整数个单位，节点间的整数插值是精确的
+    pitch = np.where(distance_mm < 300, 5000 - distance_mm,
+                     np.where(distance_mm < 700, 4700 - 3 * (distance_mm - 300) // 10, 4580 + (distance_mm - 700)))
+    rpm = np.full(distance_mm.size, 3000, dtype=np.int64)
+    knots = place_knots(distance_mm, pitch, rpm, pitch.astype(float), rpm.astype(float), 0.5, 0.5)
+    assert distance_mm[knots].tolist() == [0, 300, 700, 1000]
+
+
+def test_place_knots_is_within_bounds_and_minimal():
+    distance_mm = np.arange(300, 4701, 5, dtype=np.int64)
+    true_pitch = 100 * (55.0 + 30.0 * np.exp(-distance_mm / 1000))
+    true_rpm = 3000 + 0.0004 * (distance_mm - 300) ** 2
+    pitch, rpm = np.round(true_pitch).astype(np.int64), np.round(true_rpm).astype(np.int64)
+    pitch_bound, rpm_bound = 19.0, 19.0
+    knots = place_knots(distance_mm, pitch, rpm, true_pitch, true_rpm, pitch_bound, rpm_bound)
+
+    def max_errors(knots):
+        knot_mm = distance_mm[knots]
+        k = np.clip(np.searchsorted(knot_mm, distance_mm, side='right') - 1, 0, len(knots) - 2)
+        segment_knots = np.asarray(knots)[[k, k + 1]]
+        return [np.abs(_interpolate_fixed(distance_mm, distance_mm[segment_knots], values[segment_knots])
+                       - true).max() for values, true in ((pitch, true_pitch), (rpm, true_rpm))]
+
+    assert knots[0] == 0 and knots[-1] == distance_mm.size - 1
+    assert all(error <= bound for error, bound in zip(max_errors(knots), (pitch_bound, rpm_bound)))
+    # 最短路的结果: 去掉任何一个中间节点都会超出误差上限
+    for i in range(1, len(knots) - 1):
+        errors = max_errors(knots[:i] + knots[i + 1:])
+        assert any(error > bound for error, bound in zip(errors, (pitch_bound, rpm_bound)))
+
+
+def test_segment_contains_distance(table):
+    for distance_mm in range(int(table.distance_mm[0]), int(table.distance_mm[-1]) + 1):
+        k = table.segment(distance_mm)
+        assert table.distance_mm[k] <= distance_mm <= table.distance_mm[k + 1]
+
+
+def test_lookup_fixed_matches_reference(table):
+    for distance_mm in range(int(table.distance_mm[0]) - 50, int(table.distance_mm[-1]) + 50, 7):
+        assert table.lookup_fixed(distance_mm) == _reference_lookup(table, distance_mm)
+    assert table.lookup(float(table.distance_mm[-1]) / 1000 + 0.01) is None
+
+
+@pytest.mark.skipif(shutil.which("gcc") is None, reason="gcc is not installed")
+def test_generated_c_matches_lookup_fixed(table, tmp_path):
+    (tmp_path / "table.h").write_text(table.to_c("table"), encoding="utf-8")
+    first, last = int(table.distance_mm[0]) - 100, int(table.distance_mm[-1]) + 100
+    (tmp_path / "main.c").write_text(
+        '#include <stdio.h>\n#include "table.h"\n'
+        f'int main(void) {{ for (int32_t d = {first}; d <= {last}; d++) '
+        'printf("%d %d\\n", (int)table_pitch_cdeg_at(d), (int)table_rpm_at(d)); return 0; }\n', encoding="utf-8")
+    subprocess.run(["gcc", "-std=c99", "-Wall", "-Werror", "-o", str(tmp_path / "lookup"), str(tmp_path / "main.c")],
+                   check=True)
+    output = subprocess.run([str(tmp_path / "lookup")], check=True, capture_output=True, text=True).stdout
+    expected = [f"{pitch} {rpm}" for pitch, rpm in map(table.lookup_fixed, range(first, last + 1))]
+    assert output.splitlines() == expected
+
+
+def test_binary_round_trip(table):
+    loaded = FirmwareTable.from_bytes(table.to_bytes())
+    for name in ('distance_mm', 'pitch_cdeg', 'rpm', 'bucket'):
+        original, restored = getattr(table, name), getattr(loaded, name)
+        assert restored.dtype == original.dtype
+        assert np.array_equal(restored, original)
+    assert (loaded.bucket_shift, loaded.digest) == (table.bucket_shift, table.digest)
+    assert loaded.to_bytes() == table.to_bytes()
+    assert len(table.to_bytes()) == 24 + table.byte_size
+
+
+def test_from_bytes_rejects_other_data(table):
+    data = table.to_bytes()
+    with pytest.raises(ValueError):
+        FirmwareTable.from_bytes(b"NOTATABL" + data[8:])
+    with pytest.raises(ValueError):
+        FirmwareTable.from_bytes(data[:8] + b"\x63\x00" + data[10:])
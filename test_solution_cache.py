@@ -0,0 +1,106 @@
+"""
+    solution_cache 的单元测试: 量化、常量指纹失效和 LRU 淘汰 (用计数的替身解算器，不做任何积分)
+
+    运行: python -m pytest -q
+"""
+
+import dataclasses
+import math
+
+import pytest
+
+from solution_cache import DEFAULT_RESOLUTIONS, SolutionCache, quantize_params
+from solver import SolverConfig, solution_fingerprint
+
+
+class _CountingSolver:
+    """记录 find_launch_solution 调用次数的替身，方案只包含输入的距离"""
+
+    def __init__(self, config=None):
+        self.config = config if config is not None else SolverConfig()
+        self.calls = 0
+
+    def find_launch_solution(self, params, warm_start=None, cancelled=None, progress=None):
+        self.calls += 1
+        return {'distance_m': params['distance_m']}
+
+
+def _params(distance_m=2.0, vehicle_speed_ms=1.0, vehicle_direction_deg=30.0, target_direction_deg=-45.0):
+    return {'distance_m': distance_m, 'vehicle_speed_ms': vehicle_speed_ms,
+            'vehicle_direction_deg': vehicle_direction_deg, 'target_direction_deg': target_direction_deg}
+
+
+def test_quantize_params_merges_values_within_resolution():
+    assert quantize_params(_params(2.0001), DEFAULT_RESOLUTIONS) == quantize_params(_params(1.9999),
+                                                                                    DEFAULT_RESOLUTIONS)
+    assert quantize_params(_params(2.0), DEFAULT_RESOLUTIONS) != quantize_params(_params(2.002), DEFAULT_RESOLUTIONS)
+
+
+def test_quantize_params_wraps_directions():
+    wrapped = quantize_params(_params(vehicle_direction_deg=-90.0, target_direction_deg=180.0), DEFAULT_RESOLUTIONS)
+    assert wrapped == quantize_params(_params(vehicle_direction_deg=270.0, target_direction_deg=-180.0),
+                                      DEFAULT_RESOLUTIONS)
+    assert wrapped == quantize_params(_params(vehicle_direction_deg=630.0, target_direction_deg=540.0),
+                                      DEFAULT_RESOLUTIONS)
+
+
+@pytest.mark.parametrize("name", sorted(DEFAULT_RESOLUTIONS))
+@pytest.mark.parametrize("value", [math.nan, math.inf, -math.inf])
+def test_quantize_params_rejects_non_finite(name, value):
+    with pytest.raises(ValueError):
+        quantize_params(dict(_params(), **{name: value}), DEFAULT_RESOLUTIONS)
+
+
+def test_cache_hits_within_resolution():
+    cache, solver = SolutionCache(), _CountingSolver()
+    first = cache.solve(solver, _params(2.0))
+    assert cache.solve(solver, _params(2.0004)) is first
+    assert solver.calls == 1
+    assert cache.get(solver, _params(1.9996)) == (True, first)
+    assert (cache.hits, cache.misses) == (2, 1)
+
+
+def test_non_finite_params_bypass_cache():
+    cache, solver = SolutionCache(), _CountingSolver()
+    params = _params(vehicle_speed_ms=math.nan)
+    assert cache.get(solver, params) == (False, None)
+    cache.solve(solver, params)
+    cache.solve(solver, params)
+    assert solver.calls == 2
+    assert cache.stats()['entries'] == 0
+
+
+def test_fingerprint_ignores_launcher_hardware_constants():
+    config = SolverConfig()
+    assert solution_fingerprint(config) == solution_fingerprint(
+        dataclasses.replace(config, MOTOR_RPM_LOSS_FACTOR_PERCENT=40, FRICTION_WHEEL_DIAMETER_M=0.1))
+    assert solution_fingerprint(config) != solution_fingerprint(dataclasses.replace(config, DRAG_COEFFICIENT=0.3))
+
+
+def test_changed_constants_miss_and_invalidate():
+    cache, solver = SolutionCache(), _CountingSolver()
+    cache.solve(solver, _params())
+
+    # 只改发射器硬件常量: 方案仍然有效
+    hardware = _CountingSolver(dataclasses.replace(solver.config, MOTOR_RPM_LOSS_FACTOR_PERCENT=40))
+    assert cache.invalidate(hardware.config) == 0
+    cache.solve(hardware, _params())
+    assert hardware.calls == 0
+
+    # 改物理常量: 查询不命中，invalidate 删除旧条目
+    heavier = _CountingSolver(dataclasses.replace(solver.config, MASS_KG=0.02))
+    assert cache.get(heavier, _params()) == (False, None)
+    assert cache.invalidate(heavier.config) == 1
+    assert cache.stats()['entries'] == 0
+    assert cache.invalidate() == 0
+
+
+def test_least_recently_used_entry_is_evicted():
+    cache, solver = SolutionCache(max_entries=2), _CountingSolver()
+    cache.solve(solver, _params(1.0))
+    cache.solve(solver, _params(2.0))
+    cache.solve(solver, _params(1.0))  # 1.0 变为最近使用
+    cache.solve(solver, _params(3.0))
+    assert cache.evictions == 1
+    assert cache.get(solver, _params(1.0))[0]
+    assert not cache.get(solver, _params(2.0))[0]